@@ -0,0 +1,257 @@
+""" Mede o cliente X9H de ponta a ponta contra o servidor simulado (bench/servidor_simulado.py), sem intranet.
+
+Uso: python bench/bench_cliente.py [--secoes inicializacao sondas catalogos envio] [--repeticoes 5]
+                                   [--latencia-ms 40] [--usuarios 2000] [--etag forte] ...
+
+Seções:
+  inicializacao  `X9H.py --headless --sem-jitter` em processo novo: fria (diretório de dados vazio)
+                 e morna (cache de sondas e último envio já gravados); e, com PyQt5, a interface
+                 offscreen até os combos ficarem prontos e até a revalidação terminar
+  sondas         cada sonda de SONDAS_HARDWARE isolada e get_hardware_info com e sem cache
+  catalogos      obter_usuarios/obter_salas/obter_patrimonios_para_combobox: download frio,
+                 revalidação (304) e leitura só do cache local
+  envio          enviar_dados_post: envio completo e envio dispensado por não haver mudança
+
+Os arquivos de dados ficam num diretório temporário (X9H_DIR_DADOS), nunca ao lado do script.
+As medições em processo repetem as mesmas requisições em sequência; para não medir só o limite local
+de taxa do cliente (HTTP_LIMITE_POR_MINUTO), ele é desligado ali, a menos que se passe --com-limite-local.
+Com --api-base, mede contra um servidor já em execução em vez de subir o simulado.
+"""
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+DIRETORIO_SCRIPT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRETORIO_SCRIPT)
+
+from bench.servidor_simulado import ServidorSimulado, adicionar_argumentos, estado_dos_argumentos  # noqa: E402
+
+SECOES = ("inicializacao", "sondas", "catalogos", "envio")
+DADOS_USUARIO_EXEMPLO = {"patrimonio": "2024000042", "responsavel": "1042", "sala": "542"}
+
+# Sobe a interface offscreen e imprime (pronto_ms, revalidado_ms) em JSON na última linha
+SCRIPT_INTERFACE = r"""
+import json, sys, time
+inicio = time.perf_counter()
+from PyQt5 import QtCore, QtWidgets
+from x9h_gui import FormDialog
+app = QtWidgets.QApplication(sys.argv)
+dialog = FormDialog()
+dialog.show()
+marcas = {}
+def verificar():
+    agora = (time.perf_counter() - inicio) * 1000
+    if not dialog._catalogos_pendentes and "pronto_ms" not in marcas:
+        marcas["pronto_ms"] = agora
+    if all(t.isFinished() for t in dialog.catalogo_threads):
+        marcas.setdefault("pronto_ms", agora)
+        marcas["revalidado_ms"] = agora
+        app.quit()
+temporizador = QtCore.QTimer()
+temporizador.timeout.connect(verificar)
+temporizador.start(5)
+QtCore.QTimer.singleShot(120000, app.quit)
+app.exec_()
+dialog.close()
+print(json.dumps(marcas))
+"""
+
+
+def relatar(texto):
+    """ Escreve no console real, mesmo com os prints do cliente redirecionados para /dev/null. """
+    sys.__stdout__.write(texto + "\n")
+    sys.__stdout__.flush()
+
+
+def resumir(nome, tempos_s, observacao=""):
+    tempos_ms = [t * 1000 for t in tempos_s]
+    relatar(f"  {nome:<42} {statistics.median(tempos_ms):>10.1f} {min(tempos_ms):>10.1f} {max(tempos_ms):>10.1f}"
+            f"  {observacao}")
+
+
+def cabecalho(titulo):
+    relatar(f"\n{titulo}")
+    relatar(f"  {'caso':<42} {'mediana ms':>10} {'mín ms':>10} {'máx ms':>10}")
+
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return time.perf_counter() - inicio, resultado
+
+
+def ambiente_processo(api_base, diretorio_dados):
+    return dict(os.environ, X9H_API_BASE=api_base, X9H_DIR_DADOS=diretorio_dados, QT_QPA_PLATFORM="offscreen")
+
+
+def novo_diretorio_dados(com_usuario=True):
+    diretorio = tempfile.mkdtemp(prefix="x9h_bench_")
+    if com_usuario:
+        with open(os.path.join(diretorio, "user_data.json"), "w") as f:
+            json.dump(DADOS_USUARIO_EXEMPLO, f)
+    return diretorio
+
+
+def medir_inicializacao(api_base, repeticoes):
+    cabecalho("Inicialização (processo novo)")
+    comando = [sys.executable, os.path.join(DIRETORIO_SCRIPT, "X9H.py"), "--headless", "--sem-jitter"]
+    frias, mornas, codigos = [], [], set()
+    for _ in range(repeticoes):
+        diretorio = novo_diretorio_dados()
+        try:
+            for tempos in (frias, mornas):
+                duracao, resultado = cronometrar(lambda: subprocess.run(
+                    comando, cwd=DIRETORIO_SCRIPT, env=ambiente_processo(api_base, diretorio),
+                    capture_output=True, text=True, timeout=300))
+                tempos.append(duracao)
+                codigos.add(resultado.returncode)
+        finally:
+            shutil.rmtree(diretorio, ignore_errors=True)
+    resumir("headless fria (sem caches)", frias, f"códigos de saída: {sorted(codigos)}")
+    resumir("headless morna (cache de sondas, sem mudança)", mornas)
+
+    try:
+        import PyQt5  # noqa: F401
+    except ImportError:
+        relatar("  interface: PyQt5 indisponível, medição omitida")
+        return
+
+    marcas = {"fria": [], "morna": []}
+    for _ in range(repeticoes):
+        diretorio = novo_diretorio_dados()
+        try:
+            for rotulo in ("fria", "morna"):
+                resultado = subprocess.run([sys.executable, "-c", SCRIPT_INTERFACE], cwd=DIRETORIO_SCRIPT,
+                                           env=ambiente_processo(api_base, diretorio),
+                                           capture_output=True, text=True, timeout=300)
+                linhas = resultado.stdout.strip().splitlines()
+                if resultado.returncode != 0 or not linhas:
+                    relatar(f"  interface {rotulo}: falhou (código {resultado.returncode}): {resultado.stderr[-500:]}")
+                    return
+                marcas[rotulo].append(json.loads(linhas[-1]))
+        finally:
+            shutil.rmtree(diretorio, ignore_errors=True)
+    for rotulo, descricao in (("fria", "sem cache de catálogos"), ("morna", "catálogos em cache")):
+        resumir(f"interface {rotulo}: combos prontos", [m["pronto_ms"] / 1000 for m in marcas[rotulo]], descricao)
+        resumir(f"interface {rotulo}: revalidação concluída", [m["revalidado_ms"] / 1000 for m in marcas[rotulo]])
+
+
+def medir_sondas(coleta, repeticoes):
+    cabecalho("Sondas de hardware (em processo)")
+    for nome, sonda in sorted(coleta.SONDAS_HARDWARE.items()):
+        tempos = [cronometrar(sonda)[0] for _ in range(repeticoes)]
+        resumir(f"sonda {nome}", tempos)
+    resumir("get_hardware_info(usar_cache=False)",
+            [cronometrar(lambda: coleta.get_hardware_info(usar_cache=False))[0] for _ in range(repeticoes)])
+    coleta.get_hardware_info(usar_cache=True)  # Garante o cache gravado antes da medição morna
+    resumir("get_hardware_info(usar_cache=True)",
+            [cronometrar(lambda: coleta.get_hardware_info(usar_cache=True))[0] for _ in range(repeticoes)])
+
+
+def limpar_cache_catalogos(coleta):
+    with coleta._cache_catalogos_lock:
+        coleta._cache_catalogos = None
+    if os.path.exists(coleta.CACHE_CATALOGOS_FILE):
+        os.remove(coleta.CACHE_CATALOGOS_FILE)
+
+
+def medir_catalogos(coleta, repeticoes):
+    cabecalho("Catálogos (em processo)")
+    catalogos = (
+        ("usuarios", lambda **kw: coleta.obter_usuarios(**kw)),
+        ("salas", lambda **kw: coleta.obter_salas(**kw)),
+        ("patrimonios", lambda **kw: coleta.obter_patrimonios_para_combobox(forcar_atualizacao=True, **kw)),
+    )
+    for nome, obter in catalogos:
+        frios, primeira_pagina = [], []
+        for _ in range(repeticoes):
+            limpar_cache_catalogos(coleta)
+            inicio = time.perf_counter()
+            marcas = []
+            duracao, itens = cronometrar(lambda: obter(
+                ao_receber_pagina=lambda _itens: marcas.append(time.perf_counter() - inicio)))
+            frios.append(duracao)
+            if marcas:
+                primeira_pagina.append(marcas[0])
+        resumir(f"{nome}: download frio", frios, f"{len(itens or [])} itens")
+        if primeira_pagina:
+            resumir(f"{nome}: primeira página (frio)", primeira_pagina)
+        resumir(f"{nome}: revalidação", [cronometrar(lambda: obter())[0] for _ in range(repeticoes)])
+        if nome != "patrimonios":  # Patrimônios só cache usa o catálogo já em memória
+            resumir(f"{nome}: somente cache", [cronometrar(lambda: obter(somente_cache=True))[0]
+                                               for _ in range(repeticoes)])
+    relatar(f"  estatísticas do cache: {coleta.obter_estatisticas_cache_catalogos()}")
+
+
+def medir_envio(coleta, repeticoes):
+    cabecalho("Envio (em processo)")
+    hardware = coleta.get_hardware_info()
+    completos, dispensados = [], []
+    for _ in range(repeticoes):
+        if os.path.exists(coleta.ULTIMO_ENVIO_FILE):
+            os.remove(coleta.ULTIMO_ENVIO_FILE)
+        completos.append(cronometrar(lambda: coleta.enviar_dados_post(
+            DADOS_USUARIO_EXEMPLO, hardware, drenar_em_background=False))[0])
+        dispensados.append(cronometrar(lambda: coleta.enviar_dados_post(
+            DADOS_USUARIO_EXEMPLO, hardware, drenar_em_background=False))[0])
+    resumir("enviar_dados_post: envio completo", completos, f"fila pendente: {len(coleta.listar_spool())}")
+    resumir("enviar_dados_post: sem mudança (hash)", dispensados)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--secoes", nargs="+", choices=SECOES, default=list(SECOES))
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--api-base", help="Usa um servidor já em execução em vez de subir o simulado.")
+    parser.add_argument("--mostrar-log", action="store_true", help="Não silencia os prints do cliente.")
+    parser.add_argument("--com-limite-local", action="store_true",
+                        help="Mantém o limite local de taxa do cliente também nas medições em processo.")
+    adicionar_argumentos(parser)
+    args = parser.parse_args()
+
+    servidor = None
+    if args.api_base:
+        api_base = args.api_base.rstrip("/")
+    else:
+        servidor = ServidorSimulado(estado_dos_argumentos(args)).iniciar()
+        api_base = servidor.url_base
+    diretorio_dados = novo_diretorio_dados()
+
+    # x9h_coleta lê estas variáveis na importação
+    os.environ["X9H_API_BASE"] = api_base
+    os.environ["X9H_DIR_DADOS"] = diretorio_dados
+    ambiente_original = dict(os.environ)
+    if not args.com_limite_local:
+        os.environ["X9H_HTTP_LIMITE_POR_MINUTO"] = "1000000"
+        os.environ["X9H_HTTP_LIMITE_RAJADA"] = "1000"
+    import x9h_coleta as coleta
+    os.environ.clear()
+    os.environ.update(ambiente_original)  # Os processos novos da seção inicializacao usam o limite real
+
+    relatar(f"Servidor: {api_base}  |  dados: {diretorio_dados}  |  repetições: {args.repeticoes}")
+    medidores = {"inicializacao": lambda _coleta, repeticoes: medir_inicializacao(api_base, repeticoes),
+                 "sondas": medir_sondas, "catalogos": medir_catalogos, "envio": medir_envio}
+    try:
+        with open(os.devnull, "w") as nulo:
+            # Os DEBUG do cliente vão para /dev/null; o relatório sai por relatar()
+            with contextlib.redirect_stdout(sys.stdout if args.mostrar_log else nulo):
+                for secao in args.secoes:
+                    medidores[secao](coleta, args.repeticoes)
+    finally:
+        coleta.fechar_sessao_http()
+        if servidor:
+            servidor.parar()
+            relatar(f"\nContadores do servidor: {json.dumps(servidor.estado.contadores, sort_keys=True)}")
+        shutil.rmtree(diretorio_dados, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
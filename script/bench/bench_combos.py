@@ -0,0 +1,72 @@
+""" Mede o preenchimento e a seleção dos combos do formulário com 1k, 10k e 100k itens.
+
+Uso: python bench/bench_combos.py [--tamanhos 1000 10000 100000] [--buscas 1000]
+
+Compara o preenchimento antigo (um addItem por item + findData/findText) com o ComboBoxPesquisavel
+(ModeloListaItens montado num único reset + dicionários id/rótulo -> linha). Roda sem janela visível
+(QT_QPA_PLATFORM=offscreen).
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5 import QtCore, QtWidgets  # noqa: E402
+
+from x9h_gui import ComboBoxPesquisavel  # noqa: E402
+
+
+def itens_exemplo(quantidade):
+    return [{"label": f"Usuário Exemplo {i:06d} da Conceição", "id": str(100000 + i)} for i in range(quantidade)]
+
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    funcao()
+    return (time.perf_counter() - inicio) * 1000
+
+
+def preencher_com_additem(combo, itens):
+    combo.clear()
+    combo.addItem("-- Selecione --", None)
+    for item in itens:
+        combo.addItem(item["label"], item["id"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--buscas", type=int, default=1000)
+    args = parser.parse_args()
+
+    app = QtWidgets.QApplication(sys.argv)  # noqa: F841 - necessário para criar widgets
+    print(f"{'itens':>8} {'método':>10} {'preencher (ms)':>15} {'busca id (µs)':>14} {'busca rótulo (µs)':>18}")
+    for quantidade in args.tamanhos:
+        itens = itens_exemplo(quantidade)
+        amostra = random.Random(quantidade).sample(itens, min(args.buscas, quantidade))
+
+        antigo = QtWidgets.QComboBox()
+        t_preencher = cronometrar(lambda: preencher_com_additem(antigo, itens))
+        t_id = cronometrar(lambda: [antigo.findData(item["id"]) for item in amostra])
+        t_rotulo = cronometrar(lambda: [antigo.findText(item["label"], QtCore.Qt.MatchFixedString) for item in amostra])
+        print(f"{quantidade:>8} {'addItem':>10} {t_preencher:>15.1f} {t_id * 1000 / len(amostra):>14.1f} "
+              f"{t_rotulo * 1000 / len(amostra):>18.1f}")
+
+        novo = ComboBoxPesquisavel()
+        t_preencher = cronometrar(lambda: novo.definir_itens("-- Selecione --", itens))
+        t_id = cronometrar(lambda: [novo.indice_por_id(item["id"]) for item in amostra])
+        t_rotulo = cronometrar(lambda: [novo.indice_por_rotulo(item["label"]) for item in amostra])
+        print(f"{quantidade:>8} {'modelo':>10} {t_preencher:>15.1f} {t_id * 1000 / len(amostra):>14.1f} "
+              f"{t_rotulo * 1000 / len(amostra):>18.1f}")
+
+        t_filtro = cronometrar(lambda: [novo.modelo_filtro.filtrar(c) for c in ("c", "co", "con", "conc", "")])
+        print(f"{'':>8} {'filtro':>10} {t_filtro / 5:>15.1f} ms por tecla (média de 5 consultas)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+""" Mede o custo de importação dos módulos do X9H (no estilo de `python -X importtime`).
+
+Uso: python bench/bench_importacao.py [--modulo x9h_coleta] [--orcamento-ms 150] [--repeticoes 5]
+
+Sai com código 1 se o tempo cumulativo de importação do módulo exceder o orçamento,
+para que regressões de inicialização apareçam ao rodar o benchmark.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+DIRETORIO_SCRIPT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def medir_importacao(modulo):
+    """ Importa `modulo` num interpretador novo e retorna [(cumulativo_us, proprio_us, nome)] do -X importtime. """
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=DIRETORIO_SCRIPT, capture_output=True, text=True, check=False, timeout=120,
+    )
+    if resultado.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {modulo}:\n{resultado.stderr[-2000:]}")
+
+    linhas = []
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        proprio, cumulativo, nome = (parte.strip() for parte in linha[len("import time:"):].split("|", 2))
+        linhas.append((int(cumulativo), int(proprio), nome.strip()))
+    return linhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modulo", default="x9h_coleta")
+    parser.add_argument("--orcamento-ms", type=float, default=150.0)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    totais_ms = []
+    ultima = []
+    for _ in range(args.repeticoes):
+        ultima = medir_importacao(args.modulo)
+        total = next((cumulativo for cumulativo, _p, nome in ultima if nome == args.modulo), 0)
+        totais_ms.append(total / 1000.0)
+
+    print(f"Módulos mais caros ao importar '{args.modulo}' (última execução):")
+    print(f"{'cumulativo (ms)':>16} {'próprio (ms)':>13}  módulo")
+    for cumulativo, proprio, nome in sorted(ultima, reverse=True)[:args.top]:
+        print(f"{cumulativo / 1000.0:16.2f} {proprio / 1000.0:13.2f}  {nome}")
+
+    mediana = statistics.median(totais_ms)
+    print(f"\nImportação de '{args.modulo}': mediana {mediana:.2f} ms em {args.repeticoes} execuções "
+          f"(mín {min(totais_ms):.2f} ms, máx {max(totais_ms):.2f} ms); orçamento {args.orcamento_ms:.0f} ms.")
+    if mediana > args.orcamento_ms:
+        print("FALHA: tempo de importação acima do orçamento.")
+        return 1
+    print("OK: dentro do orçamento.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
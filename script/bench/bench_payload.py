@@ -0,0 +1,76 @@
+""" Compara tamanho e tempo de serialização do payload de envio para inventários grandes.
+
+Uso: python bench/bench_payload.py [--pacotes 200 2000 8000] [--repeticoes 50]
+
+Formatos medidos:
+  legado         data codificado como string JSON dentro do envelope JSON, mais o print com indent=2
+  compacto       envelope e data codificados uma única vez, sem espaços (codificar_payload)
+  compacto+gzip  compacto comprimido como no envio com Content-Encoding: gzip
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from x9h_coleta import codificar_payload, montar_payload  # noqa: E402
+
+
+def inventario_exemplo(quantidade_pacotes):
+    """ Dados de um computador com `quantidade_pacotes` pacotes de software, discos e interfaces de rede. """
+    dados = {
+        "patrimonio": "2024001234", "responsavel": "5123", "sala": "871",
+        "sistema": "Linux 6.8.0-45-generic", "arquitetura": "64bit", "nome_pc": "lab-farmacia-042",
+        "ip": "150.164.120.42", "mac": "3C:52:82:1A:2B:3C",
+        "processador": "Intel(R) Core(TM) i5-10500 CPU @ 3.10GHz", "gpu": "Intel Corporation CometLake-S GT2 [UHD Graphics 630]",
+        "nucleos": 6, "threads": 12, "ram": "15.49 GB", "disco_total": "233.67 GB", "tipo_disco_principal": "SSD (NVMe)",
+        "discos": [
+            {"nome": f"nvme{i}n1", "modelo": "Samsung SSD 980 250GB", "serial": f"S64BNJ0R{i:06d}",
+             "tamanho_bytes": 250059350016, "rotacional": False, "transporte": "nvme"} for i in range(3)
+        ],
+        "interfaces_rede": [
+            {"nome": f"enp{i}s0", "mac": f"3C:52:82:1A:2B:{i:02X}", "ipv4": [f"10.0.{i}.42"],
+             "ipv6": [f"fe80::3e52:82ff:fe1a:2b{i:02x}"], "velocidade_mbps": 1000, "ativa": True} for i in range(4)
+        ],
+        "software": [
+            {"nome": f"libexemplo-pacote-{i}", "versao": f"{i % 7}.{i % 13}.{i % 29}-{i % 5}ubuntu1",
+             "arquitetura": "amd64"} for i in range(quantidade_pacotes)
+        ],
+    }
+    return dados
+
+
+def codificar_legado(dados):
+    payload = {"object_name": "equipament", "data": json.dumps(dados)}
+    debug = json.dumps(payload, indent=2)  # O envio antigo sempre imprimia o payload formatado
+    return json.dumps(payload).encode("utf-8"), debug
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pacotes", type=int, nargs="+", default=[200, 2000, 8000])
+    parser.add_argument("--repeticoes", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'pacotes':>8} {'formato':>14} {'bytes':>10} {'tempo (ms)':>11}")
+    for quantidade in args.pacotes:
+        dados = inventario_exemplo(quantidade)
+        payload = montar_payload(dados)
+        compacto = codificar_payload(payload)
+        formatos = {
+            "legado": (len(codificar_legado(dados)[0]), lambda: codificar_legado(dados)),
+            "compacto": (len(compacto), lambda: codificar_payload(payload)),
+            "compacto+gzip": (len(gzip.compress(compacto, compresslevel=6)),
+                              lambda: gzip.compress(codificar_payload(payload), compresslevel=6)),
+        }
+        for nome, (tamanho, funcao) in formatos.items():
+            tempo_ms = min(timeit.repeat(funcao, number=1, repeat=args.repeticoes)) * 1000
+            print(f"{quantidade:>8} {nome:>14} {tamanho:>10} {tempo_ms:>11.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+""" Mede o modo relay (x9h_relay.py) em loopback: muitas máquinas enviando a um relay, que repassa ao servidor simulado.
+
+Uso: python bench/bench_relay.py [--maquinas 300] [--concorrencia 32] [--fracao-alterada 0.2] [--latencia-ms 40] ...
+
+Fases:
+  catalogos   cada máquina baixa os três catálogos pelo relay (paginados, com revalidação 304 na segunda vez)
+  envio       cada máquina faz um POST completo; o relay repassa a fila à intranet simulada em lotes
+  reenvio     todas reenviam: só a --fracao-alterada muda (parte como envio parcial), o resto é duplicado
+
+Ao final compara quantas requisições as máquinas fizeram ao relay com quantas chegaram à "intranet".
+"""
+import argparse
+import concurrent.futures
+import contextlib
+import gzip
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+DIRETORIO_SCRIPT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRETORIO_SCRIPT)
+
+from bench.servidor_simulado import ServidorSimulado, adicionar_argumentos, estado_dos_argumentos  # noqa: E402
+from bench.bench_cliente import relatar  # noqa: E402
+
+
+def dados_maquina(indice, versao=0):
+    pacotes = [{"nome": f"pacote-{p:04d}", "versao": f"1.{versao if p == indice % 400 else 0}", "arquitetura": "amd64"}
+               for p in range(400)]
+    return {"patrimonio": f"{2024000000 + indice}", "responsavel": str(1000 + indice), "sala": str(500 + indice % 50),
+            "nome_pc": f"lab-farmacia-{indice:05d}", "ram": "16.00 GB", "processador": "Intel(R) Core(TM) i5",
+            "software": pacotes}
+
+
+def postar(sessao, url_envio, payload):
+    corpo = gzip.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+    inicio = time.perf_counter()
+    resposta = sessao.post(url_envio, data=corpo, timeout=30,
+                           headers={"Content-Type": "application/json", "Content-Encoding": "gzip"})
+    return time.perf_counter() - inicio, resposta.status_code
+
+
+def baixar_catalogos(sessao, url_base, etags):
+    """ Baixa os três catálogos página a página, com If-None-Match das páginas já vistas. """
+    tempos = []
+    rotas = ("/users/", "/submissions/object/place", "/submissions/equipaments/?client=x9h&type=computador")
+    for rota in rotas:
+        pagina, total = 1, 1
+        inicio = time.perf_counter()
+        while pagina <= total:
+            separador = "&" if "?" in rota else "?"
+            url = f"{url_base}{rota}{separador}page={pagina}&per_page=500"
+            cabecalhos = {"If-None-Match": etags[url]} if url in etags else {}
+            resposta = sessao.get(url, headers=cabecalhos, timeout=30)
+            if resposta.status_code not in (200, 304):
+                break
+            etags[url] = resposta.headers.get("ETag", "")
+            total = int(resposta.headers.get("X-WP-TotalPages", "1"))
+            pagina += 1
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def em_paralelo(funcao, argumentos, concorrencia):
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        return list(executor.map(funcao, argumentos))
+
+
+def resumir_tempos(nome, tempos_s, observacao=""):
+    tempos_ms = sorted(t * 1000 for t in tempos_s)
+    p95 = tempos_ms[min(len(tempos_ms) - 1, int(0.95 * len(tempos_ms)))]
+    relatar(f"  {nome:<38} p50 {statistics.median(tempos_ms):>8.1f} ms  p95 {p95:>8.1f} ms  {observacao}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--maquinas", type=int, default=300)
+    parser.add_argument("--concorrencia", type=int, default=32)
+    parser.add_argument("--fracao-alterada", type=float, default=0.2)
+    parser.add_argument("--sem-lote", action="store_true", help="Repassa um POST por patrimônio (X9H_API_LOTE=0).")
+    parser.add_argument("--mostrar-log", action="store_true", help="Não silencia os prints do relay.")
+    adicionar_argumentos(parser)
+    args = parser.parse_args()
+
+    upstream = ServidorSimulado(estado_dos_argumentos(args)).iniciar()
+    diretorio_dados = tempfile.mkdtemp(prefix="x9h-bench-relay-")
+    # x9h_coleta (usado pelo relay) lê estas variáveis na importação
+    os.environ.update({"X9H_API_BASE": upstream.url_base, "X9H_DIR_DADOS": diretorio_dados,
+                       "X9H_API_LOTE": "0" if args.sem_lote else "1", "X9H_HTTP_LIMITE_POR_MINUTO": "1000000",
+                       "X9H_HTTP_LIMITE_RAJADA": "1000"})
+    import requests
+    import x9h_relay
+
+    relay = x9h_relay.ServidorRelay("127.0.0.1", 0, intervalo_envio=3600).iniciar()
+    url_envio = relay.url_base + "/submission"
+    sessoes = [requests.Session() for _ in range(args.concorrencia)]
+    sessao_da = lambda indice: sessoes[indice % len(sessoes)]
+    relatar(f"Relay: {relay.url_base}  |  intranet simulada: {upstream.url_base}  |  máquinas: {args.maquinas}")
+    try:
+        with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(sys.stdout if args.mostrar_log else nulo):
+            relatar("\ncatalogos")
+            etags = [{} for _ in range(args.maquinas)]
+            for rodada in ("primeiro download", "revalidação"):
+                antes = dict(upstream.estado.contadores)
+                tempos = em_paralelo(lambda i: sum(baixar_catalogos(sessao_da(i), relay.url_base, etags[i])),
+                                     range(args.maquinas), args.concorrencia)
+                gets = sum(v - antes.get(k, 0) for k, v in upstream.estado.contadores.items() if k.startswith("get"))
+                resumir_tempos(f"3 catálogos por máquina ({rodada})", tempos, f"GETs na intranet: {gets}")
+
+            relatar("\nenvio")
+            antes = dict(upstream.estado.contadores)
+            resultados = em_paralelo(lambda i: postar(sessao_da(i), url_envio, {"data": dados_maquina(i)}),
+                                     range(args.maquinas), args.concorrencia)
+            inicio = time.perf_counter()
+            enviadas, restantes = relay.repassar_fila()
+            duracao_repasse = time.perf_counter() - inicio
+            posts = upstream.estado.contadores.get("post_201", 0) - antes.get("post_201", 0)
+            resumir_tempos("POST máquina -> relay", [t for t, _s in resultados],
+                           f"status: {sorted(set(s for _t, s in resultados))}")
+            relatar(f"  repasse: {enviadas} snapshots em {posts} POSTs à intranet, {duracao_repasse * 1000:.0f} ms"
+                    f" ({restantes} na fila)")
+
+            relatar("\nreenvio")
+            rnd = random.Random(7)
+            alteradas = set(rnd.sample(range(args.maquinas), int(args.maquinas * args.fracao_alterada)))
+
+            def reenviar(i):
+                if i not in alteradas:
+                    return postar(sessao_da(i), url_envio, {"data": dados_maquina(i)})
+                if i % 2:  # Metade das alteradas manda só a diferença (X9H_API_PARCIAL=1 na máquina)
+                    return postar(sessao_da(i), url_envio, {"data": {"patrimonio": dados_maquina(i)["patrimonio"],
+                                                                     "ram": "32.00 GB"}, "partial": True})
+                return postar(sessao_da(i), url_envio, {"data": dados_maquina(i, versao=1)})
+
+            antes = dict(upstream.estado.contadores)
+            resultados = em_paralelo(reenviar, range(args.maquinas), args.concorrencia)
+            enviadas, restantes = relay.repassar_fila()
+            posts = upstream.estado.contadores.get("post_201", 0) - antes.get("post_201", 0)
+            resumir_tempos("POST máquina -> relay", [t for t, _s in resultados],
+                           f"status: {sorted(set(s for _t, s in resultados))}")
+            relatar(f"  repasse: {enviadas} snapshots em {posts} POSTs à intranet ({restantes} na fila); "
+                    f"relay: {json.dumps(relay.agregador.contadores, sort_keys=True)}")
+    finally:
+        relay.parar()
+        upstream.parar()
+        relatar(f"\nContadores da intranet simulada: {json.dumps(upstream.estado.contadores, sort_keys=True)}")
+        shutil.rmtree(diretorio_dados, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
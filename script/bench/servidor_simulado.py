@@ -0,0 +1,327 @@
+""" Servidor local que imita os endpoints da intranet usados pelo X9H, para medir o cliente sem rede.
+
+Uso: python bench/servidor_simulado.py [--porta 8765] [--latencia-ms 80] [--taxa-erro 0.05] ...
+Depois: X9H_API_BASE=http://127.0.0.1:8765 python X9H.py
+
+Endpoints (mesmos caminhos de API_BASE_URL):
+  POST /submission                   aceita {"data": ...}, {"batch": [...]} e corpo gzip (anunciado em
+                                     Accept-Encoding nas respostas, exceto com --sem-gzip)
+  GET  /submissions/object/place     salas
+  GET  /submissions/equipaments/     equipamentos (patrimônio, hostname, MAC, responsável, sala)
+  GET  /users/                       usuários
+
+Os GETs são paginados como na API REST do WordPress (?page=N&per_page=M, X-WP-Total, X-WP-TotalPages,
+400 além da última página ou com per_page acima de --por-pagina-max) e respondem 304 a
+If-None-Match/If-Modified-Since conforme --etag.
+"""
+import argparse
+import email.utils
+import gzip
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIXO_PADRAO = "/wp-json/intranet/v1"
+MODOS_ETAG = ("forte", "fraco", "nenhum", "rotativo")
+
+
+def gerar_catalogos(usuarios, salas, equipamentos, bytes_extras=0, semente=42):
+    """ Gera os três catálogos com dados sintéticos, no formato que o cliente espera em "results". """
+    rnd = random.Random(semente)
+    enchimento = "x" * bytes_extras  # Aumenta cada item para simular respostas maiores
+    lista_usuarios = [
+        {"ID": 1000 + i, "display_name": f"Usuário {i:05d} {rnd.choice(['Conceição', 'João', 'Márcia', 'André'])}",
+         "user_email": f"usuario{i}@ufmg.br", "extra": enchimento}
+        for i in range(usuarios)
+    ]
+    lista_salas = [
+        {"id": 500 + i, "data": {"number": f"{i // 100 + 1}{i % 100:03d}", "desc": f"Laboratório {i}",
+                                 "extra": enchimento}}
+        for i in range(salas)
+    ]
+    lista_equipamentos = []
+    for i in range(equipamentos):
+        usuario = lista_usuarios[i % len(lista_usuarios)] if lista_usuarios else {"ID": 0, "display_name": ""}
+        sala = lista_salas[i % len(lista_salas)] if lista_salas else {"id": 0}
+        lista_equipamentos.append({
+            "id": 90000 + i,
+            "data": {"asset": f"{2024000000 + i}", "nome_pc": f"lab-farmacia-{i:05d}",
+                     "mac": f"3C:52:82:{(i >> 16) & 0xFF:02X}:{(i >> 8) & 0xFF:02X}:{i & 0xFF:02X}",
+                     "type": "computador", "extra": enchimento},
+            "relationships": {"applicant": {"ID": usuario["ID"], "display_name": usuario["display_name"]},
+                              "place": {"id": sala["id"]}},
+        })
+    return {
+        "/users/": lista_usuarios,
+        "/submissions/object/place": lista_salas,
+        "/submissions/equipaments/": lista_equipamentos,
+    }
+
+
+class EstadoServidor:
+    """ Configuração e contadores compartilhados pelas threads do servidor. """
+
+    def __init__(self, catalogos, latencia_ms=0.0, jitter_ms=0.0, taxa_erro=0.0, taxa_429=0.0,
+                 retry_after=5, etag="forte", aceita_gzip=True, por_pagina_max=100, prefixo=PREFIXO_PADRAO,
+                 semente=None):
+        self.catalogos = catalogos
+        self.latencia_ms = latencia_ms
+        self.jitter_ms = jitter_ms
+        self.taxa_erro = taxa_erro
+        self.taxa_429 = taxa_429
+        self.retry_after = retry_after
+        self.etag = etag
+        self.aceita_gzip = aceita_gzip
+        self.por_pagina_max = por_pagina_max
+        self.prefixo = prefixo.rstrip("/")
+        self.ultima_modificacao = email.utils.formatdate(time.time() - 3600, usegmt=True)
+        self.envios = []
+        self.contadores = {}
+        self.etags = {}  # (caminho, página, por_página) -> resumo, calculado uma vez por página
+        self._rnd = random.Random(semente)
+        self._lock = threading.Lock()
+
+    def contar(self, chave):
+        with self._lock:
+            self.contadores[chave] = self.contadores.get(chave, 0) + 1
+
+    def sortear(self):
+        with self._lock:
+            return self._rnd.random()
+
+    def atraso(self):
+        with self._lock:
+            variacao = self._rnd.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.latencia_ms + variacao) / 1000
+
+
+class ManipuladorIntranet(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, como o servidor real atrás do nginx
+    server_version = "X9HSimulado/1.0"
+
+    @property
+    def estado(self):
+        return self.server.estado
+
+    def log_message(self, formato, *args):
+        if self.server.verboso:
+            super().log_message(formato, *args)
+
+    def _responder(self, status, corpo=b"", cabecalhos=None):
+        self.send_response(status)
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        # RFC 7694: anuncia se aceita corpo gzip no POST (o cliente com X9H_GZIP=auto só comprime depois disso)
+        self.send_header("Accept-Encoding", "gzip" if self.estado.aceita_gzip else "identity")
+        if status != 304:
+            self.send_header("Content-Type", "application/json; charset=UTF-8")
+            self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        if corpo and status != 304:
+            self.wfile.write(corpo)
+
+    def _responder_json(self, status, objeto, cabecalhos=None):
+        self._responder(status, json.dumps(objeto, ensure_ascii=False).encode("utf-8"), cabecalhos)
+
+    def _falha_simulada(self):
+        """ Sorteia 429 (com Retry-After) ou 500 conforme as taxas configuradas. True se respondeu. """
+        sorteio = self.estado.sortear()
+        if sorteio < self.estado.taxa_429:
+            self.estado.contar("status_429")
+            self._responder_json(429, {"code": "rest_too_many_requests"},
+                                 {"Retry-After": str(self.estado.retry_after)})
+            return True
+        if sorteio < self.estado.taxa_429 + self.estado.taxa_erro:
+            self.estado.contar("status_500")
+            self._responder_json(500, {"code": "internal_server_error"})
+            return True
+        return False
+
+    def _caminho_relativo(self):
+        partes = urllib.parse.urlsplit(self.path)
+        caminho = partes.path
+        if caminho.startswith(self.estado.prefixo):
+            caminho = caminho[len(self.estado.prefixo):]
+        return caminho, dict(urllib.parse.parse_qsl(partes.query))
+
+    def _etag_pagina(self, caminho, pagina, por_pagina, itens):
+        if self.estado.etag == "nenhum":
+            return None
+        if self.estado.etag == "rotativo":
+            return f'"{time.monotonic_ns()}"'  # Nunca casa: força o download completo a cada revalidação
+        chave = (caminho, pagina, por_pagina)
+        resumo = self.estado.etags.get(chave)
+        if resumo is None:
+            resumo = hashlib.sha1(json.dumps([caminho, pagina, por_pagina, itens]).encode("utf-8")).hexdigest()[:16]
+            self.estado.etags[chave] = resumo
+        return f'W/"{resumo}"' if self.estado.etag == "fraco" else f'"{resumo}"'
+
+    def do_GET(self):
+        time.sleep(self.estado.atraso())
+        caminho, consulta = self._caminho_relativo()
+        itens = self.estado.catalogos.get(caminho)
+        if itens is None:
+            self.estado.contar("status_404")
+            self._responder_json(404, {"code": "rest_no_route"})
+            return
+        if self._falha_simulada():
+            return
+
+        try:
+            pagina = max(1, int(consulta.get("page", "1")))
+            por_pagina = int(consulta.get("per_page", "10"))
+        except ValueError:
+            self._responder_json(400, {"code": "rest_invalid_param"})
+            return
+        if not 1 <= por_pagina <= self.estado.por_pagina_max:
+            # Como o WordPress: per_page fora de [1, máximo] é recusado, não limitado
+            self.estado.contar("get_400_per_page")
+            self._responder_json(400, {"code": "rest_invalid_param", "data": {"params": {"per_page": "inválido"}}})
+            return
+        total_paginas = max(1, -(-len(itens) // por_pagina))
+        if pagina > total_paginas:
+            self.estado.contar("get_400_pagina")
+            self._responder_json(400, {"code": "rest_post_invalid_page_number"})
+            return
+
+        pagina_itens = itens[(pagina - 1) * por_pagina:pagina * por_pagina]
+        etag = self._etag_pagina(caminho, pagina, por_pagina, pagina_itens)
+        cabecalhos = {"X-WP-Total": str(len(itens)), "X-WP-TotalPages": str(total_paginas)}
+        if etag:
+            cabecalhos["ETag"] = etag
+        if self.estado.etag != "nenhum":
+            cabecalhos["Last-Modified"] = self.estado.ultima_modificacao
+
+        if etag and self.headers.get("If-None-Match") == etag or (
+                self.estado.etag not in ("nenhum", "rotativo")
+                and self.headers.get("If-Modified-Since") == self.estado.ultima_modificacao):
+            self.estado.contar("get_304")
+            self._responder(304, cabecalhos=cabecalhos)
+            return
+        self.estado.contar("get_200")
+        self._responder_json(200, {"results": pagina_itens, "count": len(pagina_itens)}, cabecalhos)
+
+    def do_POST(self):
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        corpo = self.rfile.read(tamanho)
+        time.sleep(self.estado.atraso())
+        caminho, _consulta = self._caminho_relativo()
+        if caminho.rstrip("/") != "/submission":
+            self.estado.contar("status_404")
+            self._responder_json(404, {"code": "rest_no_route"})
+            return
+        if self._falha_simulada():
+            return
+
+        if self.headers.get("Content-Encoding", "").lower() == "gzip":
+            if not self.estado.aceita_gzip:
+                self.estado.contar("post_415")
+                self._responder_json(415, {"code": "unsupported_media_type"})
+                return
+            try:
+                corpo = gzip.decompress(corpo)
+            except OSError:
+                self._responder_json(400, {"code": "invalid_gzip"})
+                return
+        try:
+            payload = json.loads(corpo.decode("utf-8"))
+        except ValueError:
+            self.estado.contar("post_400")
+            self._responder_json(400, {"code": "invalid_json"})
+            return
+
+        registros = payload.get("batch") if isinstance(payload.get("batch"), list) else [payload.get("data")]
+        with self.estado._lock:
+            self.estado.envios.extend(registros)
+        self.estado.contar("post_201")
+        self._responder_json(201, {"success": True, "recebidos": len(registros)})
+
+
+class ServidorSimulado:
+    """ Servidor em thread própria, para uso em benchmarks: `with ServidorSimulado(...) as servidor: ...`. """
+
+    def __init__(self, estado, host="127.0.0.1", porta=0, verboso=False):
+        self.httpd = ThreadingHTTPServer((host, porta), ManipuladorIntranet)
+        self.httpd.daemon_threads = True
+        self.httpd.estado = estado
+        self.httpd.verboso = verboso
+        self.estado = estado
+        self._thread = None
+
+    @property
+    def url_base(self):
+        host, porta = self.httpd.server_address[:2]
+        return f"http://{host}:{porta}{self.estado.prefixo}"
+
+    def iniciar(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="ServidorSimulado", daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.parar()
+
+
+def adicionar_argumentos(parser):
+    """ Opções do servidor, compartilhadas com bench/bench_cliente.py. """
+    grupo = parser.add_argument_group("servidor simulado")
+    grupo.add_argument("--latencia-ms", type=float, default=0.0, help="Atraso fixo de cada resposta.")
+    grupo.add_argument("--jitter-ms", type=float, default=0.0, help="Variação aleatória (+/-) da latência.")
+    grupo.add_argument("--taxa-erro", type=float, default=0.0, help="Fração de respostas 500.")
+    grupo.add_argument("--taxa-429", type=float, default=0.0, help="Fração de respostas 429 com Retry-After.")
+    grupo.add_argument("--retry-after", type=int, default=5, help="Segundos no Retry-After das respostas 429.")
+    grupo.add_argument("--etag", choices=MODOS_ETAG, default="forte",
+                       help="forte/fraco: 304 quando nada mudou; nenhum: sem validadores; rotativo: nunca 304.")
+    grupo.add_argument("--sem-gzip", action="store_true", help="Recusa POST com Content-Encoding: gzip (415).")
+    grupo.add_argument("--usuarios", type=int, default=2000)
+    grupo.add_argument("--salas", type=int, default=400)
+    grupo.add_argument("--equipamentos", type=int, default=5000)
+    grupo.add_argument("--bytes-extras", type=int, default=0, help="Bytes de enchimento em cada item.")
+    grupo.add_argument("--por-pagina-max", type=int, default=100,
+                       help="Maior per_page aceito; acima dele responde 400, como o rest_api padrão do WordPress.")
+
+
+def estado_dos_argumentos(args):
+    catalogos = gerar_catalogos(args.usuarios, args.salas, args.equipamentos, args.bytes_extras)
+    return EstadoServidor(catalogos, latencia_ms=args.latencia_ms, jitter_ms=args.jitter_ms,
+                          taxa_erro=args.taxa_erro, taxa_429=args.taxa_429, retry_after=args.retry_after,
+                          etag=args.etag, aceita_gzip=not args.sem_gzip, por_pagina_max=args.por_pagina_max)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--verboso", action="store_true", help="Registra cada requisição no console.")
+    adicionar_argumentos(parser)
+    args = parser.parse_args()
+
+    servidor = ServidorSimulado(estado_dos_argumentos(args), args.host, args.porta, args.verboso)
+    print(f"Servidor simulado em {servidor.url_base} (Ctrl+C para sair)")
+    print(f"  X9H_API_BASE={servidor.url_base}")
+    try:
+        servidor.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.httpd.server_close()
+        print(f"Contadores: {json.dumps(servidor.estado.contadores, sort_keys=True)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,7 @@
+""" Os testes importam os módulos de script/ com os dados do aplicativo num diretório temporário. """
+import os
+import sys
+import tempfile
+
+os.environ["X9H_DIR_DADOS"] = tempfile.mkdtemp(prefix="x9h-testes-")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
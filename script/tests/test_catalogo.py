@@ -0,0 +1,64 @@
+import pytest
+
+import x9h_coleta
+
+
+@pytest.fixture
+def catalogo_vazio(monkeypatch):
+    monkeypatch.setattr(x9h_coleta, "_catalogo_equipamentos", None)
+    monkeypatch.setattr(x9h_coleta, "ler_catalogo_em_cache",
+                        lambda url: {"results": [{"id": 1, "patrimonio": "2024000001"}]})
+
+
+def test_cache_nao_substitui_download_em_andamento(catalogo_vazio):
+    with x9h_coleta._busca_equipamentos_lock:  # Download em andamento em outra thread
+        catalogo = x9h_coleta.obter_catalogo_equipamentos(somente_cache=True)
+    assert len(catalogo) == 1
+    assert x9h_coleta._catalogo_equipamentos is None
+
+    catalogo = x9h_coleta.obter_catalogo_equipamentos(somente_cache=True)
+    assert x9h_coleta._catalogo_equipamentos is catalogo
+
+
+def test_cache_nao_sobrescreve_catalogo_baixado(catalogo_vazio, monkeypatch):
+    baixado = x9h_coleta.CatalogoEquipamentos([])
+    monkeypatch.setattr(x9h_coleta, "_catalogo_equipamentos", baixado)
+    x9h_coleta.obter_catalogo_equipamentos(forcar_atualizacao=True, somente_cache=True)
+    assert x9h_coleta._catalogo_equipamentos is baixado
+
+
+def _item(patrimonio, **dados):
+    return {"data": {"asset": patrimonio, **dados},
+            "relationships": {"applicant": {"ID": 7, "display_name": "Ana"}, "place": {"id": 30}}}
+
+
+CATALOGO = x9h_coleta.CatalogoEquipamentos([
+    _item("100", nome_pc="LAB-01", mac="aa-bb-cc-00-00-01", serial_placa="SN100"),
+    _item("101", nome_pc="lab-clone", mac="AA:BB:CC:00:00:02", serial_placa="To be filled by O.E.M."),
+    _item("102", nome_pc="LAB-CLONE", interfaces_rede=[{"mac": "aa:bb:cc:00:00:02"}, {"mac": "aa:bb:cc:00:00:03"}],
+          serial_placa="SN102"),
+    _item("100", nome_pc="duplicado", serial_placa="SN-DUP"),  # Vale o primeiro registro do patrimônio
+    "lixo",
+])
+
+
+def test_localizar_do_mais_especifico_ao_menos():
+    assert CATALOGO.localizar(seriais=["sn100"], macs=["AA:BB:CC:00:00:03"]) == ("100", "serial")
+    assert CATALOGO.localizar(seriais=["desconhecido"], macs=["aa-bb-cc-00-00-03"]) == ("102", "mac")
+    assert CATALOGO.localizar(hostnames=[" Lab-01 "]) == ("100", "hostname")
+    assert CATALOGO.localizar(seriais=[None, ""], macs=[None], hostnames=[]) == (None, None)
+
+
+def test_chaves_ambiguas_nao_casam():
+    # MAC e nome do PC repetidos em 101 e 102 (imagem clonada): só outro identificador decide
+    assert CATALOGO.patrimonio_por_mac("aa:bb:cc:00:00:02") is None
+    assert CATALOGO.patrimonio_por_hostname("lab-clone") is None
+    assert CATALOGO.localizar(macs=["aa:bb:cc:00:00:02"], hostnames=["lab-clone"]) == (None, None)
+    assert CATALOGO.localizar(macs=["aa:bb:cc:00:00:02", "aa:bb:cc:00:00:03"]) == ("102", "mac")
+
+
+def test_serial_generico_e_registro_repetido_ignorados():
+    assert CATALOGO.patrimonio_por_serial("TO BE FILLED BY O.E.M") is None
+    assert CATALOGO.patrimonio_por_serial("SN-DUP") is None
+    assert len(CATALOGO) == 3
+    assert CATALOGO.configuracao("100") == {"responsavel_label": "Ana", "responsavel_id": "7", "sala_id": "30"}
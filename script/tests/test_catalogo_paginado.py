@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+import x9h_coleta
+
+DOCUMENTO = (
+    '{"total": 8, "results": [\n'
+    '  {"id": 1, "nome": "Sala \\"Azul\\" ]}, \\\\ fim", "acentos": "\\u00e7\\u00e3o \u00e9"},\n'
+    '  -12.5e+3, 0.125, "texto com \\\\u e \\" escapados",\n'
+    '  [1, [2, {"a": "]"}]], true, null, 987654321\n'
+    '], "depois": {"results": ["ignorado"]}}'
+)
+ESPERADO = json.loads(DOCUMENTO)["results"]
+
+
+def _cortes(texto, *posicoes):
+    anterior = 0
+    for posicao in posicoes:
+        yield texto[anterior:posicao]
+        anterior = posicao
+    yield texto[anterior:]
+
+
+def test_documento_inteiro():
+    assert list(x9h_coleta.iterar_resultados_json([DOCUMENTO])) == ESPERADO
+
+
+@pytest.mark.parametrize("tamanho", [1, 2, 3, 7])
+def test_blocos_de_tamanho_fixo(tamanho):
+    blocos = [DOCUMENTO[i:i + tamanho] for i in range(0, len(DOCUMENTO), tamanho)]
+    assert list(x9h_coleta.iterar_resultados_json(blocos)) == ESPERADO
+
+
+def test_qualquer_corte_em_dois_blocos():
+    # Inclui cortes dentro de strings, escapes (\" \\ \u), números ("12." | "5", "e+" | "3") e do marcador
+    for corte in range(len(DOCUMENTO) + 1):
+        assert list(x9h_coleta.iterar_resultados_json(_cortes(DOCUMENTO, corte))) == ESPERADO, corte
+
+
+def test_qualquer_corte_em_tres_blocos_nos_numeros():
+    inicio = DOCUMENTO.index("-12.5e+3")
+    fim = DOCUMENTO.index("987654321") + len("987654321")
+    for a in range(inicio, fim):
+        for b in range(a, fim + 1):
+            assert list(x9h_coleta.iterar_resultados_json(_cortes(DOCUMENTO, a, b))) == ESPERADO, (a, b)
+
+
+def test_numero_no_fim_do_bloco_nao_e_lido_pela_metade():
+    assert list(x9h_coleta.iterar_resultados_json(['{"results":[12.', '5,1', 'e3]}'])) == [12.5, 1000.0]
+
+
+def test_sem_results_e_truncado():
+    assert list(x9h_coleta.iterar_resultados_json(['{"dados": [1, 2]}'])) == []
+    with pytest.raises(ValueError):
+        list(x9h_coleta.iterar_resultados_json(['{"results": [1, {"a": ']))
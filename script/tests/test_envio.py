@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+import x9h_coleta
+
+SOFTWARE = [{"nome": "firefox", "versao": "120.0", "arquitetura": "amd64"},
+            {"nome": "libc6", "versao": "2.36", "arquitetura": "amd64"},
+            {"nome": "libc6", "versao": "2.36", "arquitetura": "i386"}]
+DADOS = {"patrimonio": "2024000001", "ram": "16.00 GB", "sala": "12", "software": SOFTWARE}
+
+
+@pytest.fixture
+def ultimo_envio(tmp_path, monkeypatch):
+    monkeypatch.setattr(x9h_coleta, "ULTIMO_ENVIO_FILE", str(tmp_path / "ultimo_envio.json"))
+    monkeypatch.setattr(x9h_coleta, "API_SUPORTA_PARCIAL", True)
+
+
+def test_hash_ignora_ordem_das_chaves():
+    invertido = dict(reversed(list(DADOS.items())))
+    assert x9h_coleta.hash_canonico(invertido) == x9h_coleta.hash_canonico(DADOS)
+    assert x9h_coleta.hash_canonico({**DADOS, "ram": "8.00 GB"}) != x9h_coleta.hash_canonico(DADOS)
+
+
+def test_primeiro_envio_e_completo(ultimo_envio):
+    assert x9h_coleta.verificar_envio(DADOS) == ("completo", DADOS)
+
+
+def test_nada_mudou(ultimo_envio):
+    x9h_coleta.registrar_envio_aceito(DADOS)
+    assert x9h_coleta.verificar_envio(dict(DADOS)) == ("nenhum", {})
+
+
+def test_parcial_so_com_campos_alterados_e_delta_de_software(ultimo_envio):
+    x9h_coleta.registrar_envio_aceito(DADOS)
+    atuais = {key: valor for key, valor in DADOS.items() if key != "sala"}
+    atuais["ram"] = "32.00 GB"
+    atuais["software"] = [{**SOFTWARE[0], "versao": "121.0"}, SOFTWARE[1],
+                          {"nome": "vlc", "versao": "3.0", "arquitetura": "amd64"}]
+    tipo, alterados = x9h_coleta.verificar_envio(atuais)
+    assert tipo == "parcial"
+    assert alterados["ram"] == "32.00 GB"
+    assert alterados["sala"] is None
+    assert "software" not in alterados and "patrimonio" not in alterados
+    assert alterados["software_delta"] == {
+        "adicionados": [{"nome": "vlc", "versao": "3.0", "arquitetura": "amd64"}],
+        "removidos": [{"nome": "libc6", "versao": "2.36", "arquitetura": "i386"}],
+        "atualizados": [{"nome": "firefox", "arquitetura": "amd64", "de": "120.0", "para": "121.0"}],
+    }
+
+
+def test_batimento_vencido_envia_completo(ultimo_envio, monkeypatch):
+    x9h_coleta.registrar_envio_aceito(DADOS)
+    agora = time.time() + (x9h_coleta.ENVIO_HEARTBEAT_DIAS + 1) * 86400
+    monkeypatch.setattr(x9h_coleta.time, "time", lambda: agora)
+    assert x9h_coleta.verificar_envio(DADOS) == ("completo", DADOS)
+
+
+def test_sem_envio_parcial_no_servidor(ultimo_envio, monkeypatch):
+    monkeypatch.setattr(x9h_coleta, "API_SUPORTA_PARCIAL", False)
+    x9h_coleta.registrar_envio_aceito(DADOS)
+    atuais = {**DADOS, "ram": "32.00 GB"}
+    assert x9h_coleta.verificar_envio(atuais) == ("completo", atuais)
+
+
+def test_delta_de_software_ida_e_volta():
+    atuais = [{"nome": "firefox", "versao": "121.0", "arquitetura": "amd64"},
+              {"nome": "vlc", "versao": "3.0", "arquitetura": "amd64"}]
+    delta = x9h_coleta.calcular_delta_software(SOFTWARE, atuais)
+    assert x9h_coleta.aplicar_delta_software(SOFTWARE, delta) == sorted(
+        atuais, key=lambda p: (p["nome"], p["arquitetura"]))
+    vazio = x9h_coleta.calcular_delta_software(SOFTWARE, list(reversed(SOFTWARE)))
+    assert vazio == {"adicionados": [], "removidos": [], "atualizados": []}
+    assert x9h_coleta.aplicar_delta_software([], x9h_coleta.calcular_delta_software([], SOFTWARE)) == SOFTWARE
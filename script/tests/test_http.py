@@ -0,0 +1,82 @@
+import email.utils
+import http.server
+import threading
+import time
+
+import pytest
+
+import x9h_coleta
+
+
+class _Responde429(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(429)
+        self.send_header("Retry-After", "3600")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def servidor_429():
+    servidor = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Responde429)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{servidor.server_address[1]}/"
+    servidor.shutdown()
+    servidor.server_close()
+    x9h_coleta.fechar_sessao_http()
+    x9h_coleta._bloqueado_ate = 0.0
+    x9h_coleta.atualizar_estado_servidor(bloqueado_ate=0.0)
+
+
+def test_429_volta_na_hora_e_bloqueia_o_servidor(servidor_429):
+    inicio = time.monotonic()
+    response = x9h_coleta.http_get(servidor_429, limitar=False)
+    assert response.status_code == 429
+    assert time.monotonic() - inicio < 5  # O urllib3 não dorme o Retry-After dentro do adaptador
+    assert x9h_coleta.servidor_bloqueado_ate() > time.time() + 3500
+    with pytest.raises(x9h_coleta.ServidorSobrecarregado):
+        x9h_coleta.http_get(servidor_429, limitar=False)
+
+
+def test_interpretar_retry_after():
+    assert x9h_coleta.interpretar_retry_after("120") == 120.0
+    assert x9h_coleta.interpretar_retry_after(" 0 ") == 0.0
+    daqui_a_90s = email.utils.formatdate(time.time() + 90, usegmt=True)
+    assert 85 <= x9h_coleta.interpretar_retry_after(daqui_a_90s) <= 90
+    assert x9h_coleta.interpretar_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0  # Data já passada
+    for invalido in (None, "", "-5", "1.5", "amanhã"):
+        assert x9h_coleta.interpretar_retry_after(invalido) is None
+
+
+def test_limitador_permite_rajada_e_depois_espaca(monkeypatch):
+    relogio = [1000.0]
+    esperas = []
+
+    def esperar(segundos):
+        esperas.append(segundos)
+        relogio[0] += segundos
+        return False
+
+    monkeypatch.setattr(x9h_coleta.time, "monotonic", lambda: relogio[0])
+    monkeypatch.setattr(x9h_coleta._cancelamento, "wait", esperar)
+    limitador = x9h_coleta.LimitadorTaxa(por_minuto=60, rajada=3)
+    for _ in range(3):
+        limitador.adquirir()
+    assert esperas == []
+    limitador.adquirir()
+    assert esperas == [pytest.approx(1.0)]  # 60/min: um token por segundo depois da rajada
+    relogio[0] += 10
+    for _ in range(3):
+        limitador.adquirir()
+    assert len(esperas) == 1  # Tokens acumulados, limitados à rajada
+
+
+def test_limitador_cancelado(monkeypatch):
+    monkeypatch.setattr(x9h_coleta._cancelamento, "wait", lambda segundos: True)
+    limitador = x9h_coleta.LimitadorTaxa(por_minuto=1, rajada=1)
+    limitador.adquirir()
+    with pytest.raises(x9h_coleta.OperacaoCancelada):
+        limitador.adquirir()
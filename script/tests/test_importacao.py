@@ -0,0 +1,19 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+DIRETORIO_SCRIPT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PESADOS = ("PyQt5", "requests", "psutil", "cpuinfo", "urllib3")
+
+
+@pytest.mark.parametrize("modulo", ["x9h_coleta", "x9h_relay"])
+def test_importar_nao_carrega_dependencias_pesadas(modulo):
+    # Interpretador novo: neste processo outros testes já podem ter importado requests/psutil
+    codigo = (f"import sys, {modulo}; "
+              f"print(','.join(m for m in {PESADOS!r} if m in sys.modules))")
+    resultado = subprocess.run([sys.executable, "-c", codigo], cwd=DIRETORIO_SCRIPT, capture_output=True, text=True,
+                               timeout=120, env={**os.environ, "X9H_METRICAS": "0"})
+    assert resultado.returncode == 0, resultado.stderr
+    assert resultado.stdout.strip() == ""
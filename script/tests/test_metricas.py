@@ -0,0 +1,21 @@
+import collections
+
+import x9h_metricas
+
+
+def test_memoria_limitada_com_contagens_exatas(monkeypatch):
+    monkeypatch.setattr(x9h_metricas, "METRICAS_ATIVAS", True)
+    monkeypatch.setattr(x9h_metricas, "_spans", collections.deque(maxlen=x9h_metricas.MAX_SPANS_EXPORTADOS))
+    monkeypatch.setattr(x9h_metricas, "_duracoes_por_nome", {})
+    total = 3 * x9h_metricas.MAX_SPANS_EXPORTADOS
+    for i in range(total):
+        x9h_metricas.registrar("teste", (i % 100) / 1000)  # 0 a 99 ms, distribuição uniforme
+
+    assert len(x9h_metricas._spans) == x9h_metricas.MAX_SPANS_EXPORTADOS
+    assert len(x9h_metricas._duracoes_por_nome["teste"].amostra) == x9h_metricas.MAX_AMOSTRAS_PERCENTIL
+    histograma = x9h_metricas.resumo()["teste"]
+    assert histograma["contagem"] == total
+    assert sum(histograma["baldes"].values()) == total
+    assert histograma["max_ms"] == 99
+    assert 35 <= histograma["p50_ms"] <= 65
+    assert 85 <= histograma["p95_ms"] <= 99
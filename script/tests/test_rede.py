@@ -0,0 +1,28 @@
+import socket
+
+import x9h_coleta
+
+
+def test_ipv6_temporarios_e_depreciados_sao_reconhecidos(tmp_path, monkeypatch):
+    arquivo = tmp_path / "if_inet6"
+    arquivo.write_text(
+        "20010db8000000000000000000000001 02 40 00 00     eth0\n"  # estável
+        "20010db80000000012345678abcdef01 02 40 00 01     eth0\n"  # temporário (RFC 4941)
+        "20010db80000000087654321fedcba01 02 40 00 21     eth0\n"  # temporário depreciado
+        "fe800000000000000000000000000001 02 40 20 80     eth0\n")
+    monkeypatch.setattr(x9h_coleta, "PROC_NET_IF_INET6", str(arquivo))
+    efemeros = x9h_coleta._ipv6_efemeros_linux()
+    assert socket.inet_pton(socket.AF_INET6, "2001:db8::1234:5678:abcd:ef01").hex() in efemeros
+    assert socket.inet_pton(socket.AF_INET6, "2001:db8::8765:4321:fedc:ba01").hex() in efemeros
+    assert socket.inet_pton(socket.AF_INET6, "2001:db8::1").hex() not in efemeros
+    assert len(efemeros) == 2
+
+
+def test_troca_de_ipv6_nao_muda_o_hash():
+    interface = {"nome": "eth0", "mac": "02:00:00:00:00:01", "ipv4": ["10.0.0.2"], "ipv6": ["2001:db8::a"],
+                 "velocidade_mbps": 1000, "ativa": True, "principal": True}
+    trocada = {**interface, "ipv6": ["2001:db8::b"], "velocidade_mbps": 100}
+    assert x9h_coleta.hash_canonico({"interfaces_rede": [interface]}) == \
+        x9h_coleta.hash_canonico({"interfaces_rede": [trocada]})
+    assert x9h_coleta.hash_canonico({"interfaces_rede": [interface]}) != \
+        x9h_coleta.hash_canonico({"interfaces_rede": [{**interface, "ipv4": ["10.0.0.3"]}]})
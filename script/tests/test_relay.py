@@ -0,0 +1,22 @@
+import gzip
+
+import pytest
+
+import x9h_relay
+
+
+def test_gzip_limitado_recusa_saida_maior_que_o_limite():
+    assert x9h_relay.descomprimir_gzip_limitado(gzip.compress(b"a" * 100), 100) == b"a" * 100
+    assert x9h_relay.descomprimir_gzip_limitado(gzip.compress(b"\0" * (1 << 20)), 1000) is None
+    with pytest.raises(ValueError):
+        x9h_relay.descomprimir_gzip_limitado(gzip.compress(b"a" * 100)[:-6], 1000)
+
+
+def test_estado_sobrevive_a_reinicio_do_relay(tmp_path):
+    completo = {"patrimonio": "2024000001", "ram": "8 GB", "software": [{"nome": "a", "versao": "1"}]}
+    assert x9h_relay.AgregadorEnvios(str(tmp_path)).receber(completo) == "enfileirado"
+
+    reiniciado = x9h_relay.AgregadorEnvios(str(tmp_path))
+    assert reiniciado.receber(dict(completo)) == "duplicado"
+    assert reiniciado.receber({"patrimonio": "2024000001", "ram": "16 GB"}, parcial=True) == "enfileirado"
+    assert reiniciado.receber({"patrimonio": "2024000002", "ram": "4 GB"}, parcial=True) == "sem_base"
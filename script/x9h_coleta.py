@@ -0,0 +1,2535 @@
+""" Coleta de hardware e comunicação com a intranet, sem dependência de Qt.
+
+Bibliotecas pesadas (requests, psutil, py-cpuinfo, urllib3) são importadas só no primeiro uso,
+para que o modo sem interface e o início do executável não paguem por elas antecipadamente.
+"""
+import os
+import sys
+import platform
+import subprocess
+import json
+import time
+import hashlib
+import threading
+import concurrent.futures
+import functools
+import random
+import gzip
+import email.utils
+import codecs
+import urllib.parse
+import socket
+import re
+import struct
+import weakref
+import locale
+
+import x9h_metricas
+
+
+# --- Determinar Caminho Base para Arquivos de Dados (Importante para Executável) ---
+def get_base_path():
+    """ Retorna o caminho base para arquivos de dados, seja rodando como script ou como bundle.
+
+    A variável X9H_DIR_DADOS substitui esse caminho (usada pelos benchmarks para não tocar nos dados reais).
+    """
+    if os.environ.get("X9H_DIR_DADOS"):
+        return os.environ["X9H_DIR_DADOS"]
+    if getattr(sys, 'frozen', False):
+        application_path = os.path.dirname(sys.executable)
+    else:
+        application_path = os.path.dirname(os.path.abspath(__file__))
+    return application_path
+
+
+BASE_APP_PATH = get_base_path()
+
+# --- Constantes ---
+ULTIMO_ENVIO_FILE = os.path.join(BASE_APP_PATH, "ultimo_envio.json")
+USER_DATA_FILE = os.path.join(BASE_APP_PATH, "user_data.json")
+CACHE_SONDAS_FILE = os.path.join(BASE_APP_PATH, "hardware_cache.json")
+CACHE_CATALOGOS_FILE = os.path.join(BASE_APP_PATH, "catalogos_cache.json")
+CACHE_SOFTWARE_FILE = os.path.join(BASE_APP_PATH, "software_cache.json")
+SPOOL_DIR = os.path.join(BASE_APP_PATH, "spool")
+ESTADO_SERVIDOR_FILE = os.path.join(BASE_APP_PATH, "servidor_api.json")  # Capacidades aprendidas de API_BASE_URL
+METRICAS_FILE = os.path.join(BASE_APP_PATH, "metricas.jsonl")  # Usado com X9H_METRICAS=1
+x9h_metricas.definir_arquivo_padrao(METRICAS_FILE)
+# X9H_API_BASE aponta o cliente para outro servidor (ex.: bench/servidor_simulado.py em http://127.0.0.1:8765)
+API_BASE_URL = os.environ.get("X9H_API_BASE", "https://intranet.farmacia.ufmg.br/wp-json/intranet/v1").rstrip("/")
+API_POST_URL = f"{API_BASE_URL}/submission"
+API_GET_PLACES_URL = f"{API_BASE_URL}/submissions/object/place"
+API_GET_CONFIG_PATRIMONIO_URL = f"{API_BASE_URL}/submissions/equipaments/?client=x9h&type=computador,netbook,notebook"
+API_GET_USERS_URL = f"{API_BASE_URL}/users/"
+
+# Cliente HTTP compartilhado (conexões keep-alive reaproveitadas entre chamadas)
+HTTP_POOL_SIZE = int(os.environ.get("X9H_HTTP_POOL_SIZE", "4"))
+HTTP_TIMEOUT_GET = 15
+HTTP_TIMEOUT_POST = 30
+HTTP_RETRIES_GET = 3
+HTTP_BACKOFF_FACTOR = 0.5
+
+# Catálogos paginados no estilo da API REST do WordPress (?page=N&per_page=M, cabeçalho X-WP-TotalPages)
+CATALOGO_POR_PAGINA = 100  # Máximo aceito pelo WordPress; acima disso a página 1 recebe 400
+CATALOGO_MAX_PAGINAS = 1000
+CATALOGO_BLOCO_BYTES = 64 * 1024  # Tamanho dos blocos lidos da resposta durante o parse incremental
+
+# Controle de carga da frota: jitter determinístico no logon, limite local de taxa e respeito ao Retry-After
+JITTER_LOGON_SEGUNDOS = float(os.environ.get("X9H_JITTER_SEGUNDOS", "300"))
+HTTP_LIMITE_POR_MINUTO = float(os.environ.get("X9H_HTTP_LIMITE_POR_MINUTO", "30"))
+HTTP_LIMITE_RAJADA = int(os.environ.get("X9H_HTTP_LIMITE_RAJADA", "6"))
+HTTP_RETRY_AFTER_PADRAO = 60.0  # Usado quando 429/503 chega sem cabeçalho Retry-After válido
+HTTP_RETRY_AFTER_MAX = 3600.0
+
+# Fila local de envios pendentes (reenviados com backoff exponencial e jitter)
+SPOOL_BACKOFF_BASE = 30.0
+SPOOL_BACKOFF_MAX = 6 * 3600.0
+SPOOL_LOTE_MAX = 20
+API_SUPORTA_LOTE = os.environ.get("X9H_API_LOTE", "0") == "1"  # Servidor aceita {"batch": [{...}, ...]} no POST
+
+# Detecção de mudanças: só envia quando algo mudou, com um envio completo periódico de "batimento"
+ENVIO_HEARTBEAT_DIAS = 30
+API_SUPORTA_PARCIAL = os.environ.get("X9H_API_PARCIAL", "0") == "1"  # Servidor aceita "partial": true
+
+# Codificação do corpo do POST: JSON compacto, comprimido com gzip acima do limite se o servidor aceitar.
+# "0" (padrão) nunca comprime; "1" sempre; "auto" só depois que o servidor anunciar "Accept-Encoding: gzip"
+# numa resposta (RFC 7694). O que foi aprendido fica em ESTADO_SERVIDOR_FILE, ao lado da fila.
+PAYLOAD_GZIP_MIN_BYTES = 1024
+PAYLOAD_GZIP_MODO = os.environ.get("X9H_GZIP", "0")
+PAYLOAD_GZIP_RECUSA_VALIDADE = 30 * 24 * 3600  # Depois de uma recusa, não tenta gzip de novo por esse tempo
+DEBUG_ATIVO = os.environ.get("X9H_DEBUG", "0") == "1"  # Imprime os payloads completos no console
+
+# Orçamento de tempo (segundos) de cada sonda de hardware executada em paralelo
+SONDA_TIMEOUT_PADRAO = 5.0
+SONDAS_TIMEOUTS = {
+    "gpu": 8.0,
+    "tipo_disco": 6.0,
+    "processador": 6.0,
+    "ip": 3.0,
+    "software": 10.0,
+}
+SONDAS_MAX_WORKERS = 10
+
+# Comandos externos usados pelas sondas (wmic, powershell, glxinfo, lspci, rpm...)
+SUBPROCESSO_TIMEOUT_PADRAO = 5.0
+SUBPROCESSO_SAIDA_MAX = 1024 * 1024  # Bytes de stdout guardados; o restante é lido e descartado
+
+# Validade (segundos) de cada campo no cache de sondas; campos fora daqui (ex.: IP) são sempre medidos
+SONDAS_CACHE_TTL = {
+    "processador": 30 * 24 * 3600,
+    "gpu": 7 * 24 * 3600,
+    "nucleos": 30 * 24 * 3600,
+    "threads": 30 * 24 * 3600,
+    "ram": 7 * 24 * 3600,
+    "tipo_disco": 7 * 24 * 3600,
+    "disco_total": 24 * 3600,
+    "mac": 24 * 3600,
+    "serial_placa": 30 * 24 * 3600,
+}
+
+# --- Execução Cancelável de Comandos Externos ---
+class OperacaoCancelada(Exception):
+    """ A coleta ou o envio foi cancelado (ex.: janela fechada) antes de terminar. """
+
+
+_cancelamento = threading.Event()
+_processos_ativos = {}  # pid -> (Popen, ident da thread que o iniciou)
+_processos_lock = threading.Lock()
+
+
+def cancelamento_solicitado():
+    return _cancelamento.is_set()
+
+
+def verificar_cancelamento():
+    if _cancelamento.is_set():
+        raise OperacaoCancelada()
+
+
+def reiniciar_cancelamento():
+    _cancelamento.clear()
+
+
+def cancelar_operacoes():
+    """ Interrompe tudo o que estiver em andamento: mata os comandos externos (com seus filhos) e
+    derruba as conexões HTTP abertas. Novas operações falham com OperacaoCancelada até reiniciar_cancelamento().
+    """
+    _cancelamento.set()
+    with _processos_lock:
+        processos = [processo for processo, _ident in _processos_ativos.values()]
+    for processo in processos:
+        _matar_grupo_processo(processo)
+    _derrubar_conexoes_http()
+
+
+def _matar_grupo_processo(processo):
+    """ Mata o processo e todos os descendentes (powershell, wmic e glxinfo podem abrir filhos). """
+    if processo.poll() is not None:
+        return
+    try:
+        if platform.system() == "Windows":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(processo.pid)], stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL, timeout=5, creationflags=subprocess.CREATE_NO_WINDOW)
+        else:
+            import signal
+            os.killpg(processo.pid, signal.SIGKILL)  # start_new_session: o pgid é o próprio pid
+    except (OSError, subprocess.SubprocessError):
+        pass
+    try:
+        processo.kill()
+    except OSError:
+        pass
+
+
+def matar_processos_da_thread(ident):
+    """ Mata os comandos iniciados por uma thread específica (sonda que estourou o prazo). """
+    with _processos_lock:
+        processos = [processo for processo, dono in _processos_ativos.values() if dono == ident]
+    for processo in processos:
+        _matar_grupo_processo(processo)
+
+
+def executar_comando(args, timeout=SUBPROCESSO_TIMEOUT_PADRAO, check=False, encoding=None, errors="replace",
+                     max_saida=SUBPROCESSO_SAIDA_MAX):
+    """ Substituto de subprocess.run(args, capture_output=True, text=True) com prazo rígido e cancelamento.
+
+    O comando roda num grupo de processos próprio; ao estourar `timeout` (TimeoutExpired) ou ao chamar
+    cancelar_operacoes() (OperacaoCancelada), o grupo inteiro é morto. A saída guardada é limitada a
+    `max_saida` bytes; o excedente é lido e descartado para que o filho não trave com o pipe cheio.
+    """
+    verificar_cancelamento()
+    opcoes = {}
+    if platform.system() == "Windows":
+        opcoes["creationflags"] = subprocess.CREATE_NO_WINDOW | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        opcoes["start_new_session"] = True
+    processo = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, **opcoes)
+    with _processos_lock:
+        _processos_ativos[processo.pid] = (processo, threading.get_ident())
+
+    blocos = []
+    def _ler_saida():
+        guardados = 0
+        for bloco in iter(lambda: processo.stdout.read(65536), b""):
+            if guardados < max_saida:
+                blocos.append(bloco[:max_saida - guardados])
+                guardados += len(blocos[-1])
+    leitor = threading.Thread(target=_ler_saida, name="x9h-saida-comando", daemon=True)
+    leitor.start()
+
+    prazo = time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                processo.wait(timeout=min(0.1, max(0.0, prazo - time.monotonic())))
+                break
+            except subprocess.TimeoutExpired:
+                if _cancelamento.is_set():
+                    _matar_grupo_processo(processo)
+                    raise OperacaoCancelada()
+                if time.monotonic() >= prazo:
+                    _matar_grupo_processo(processo)
+                    raise subprocess.TimeoutExpired(args, timeout)
+    finally:
+        with _processos_lock:
+            _processos_ativos.pop(processo.pid, None)
+        if processo.poll() is None:
+            _matar_grupo_processo(processo)
+        processo.wait()
+        leitor.join(timeout=1.0)
+        processo.stdout.close()
+
+    if processo.returncode != 0 and _cancelamento.is_set():
+        raise OperacaoCancelada()  # Morto por cancelar_operacoes() a partir de outra thread
+    saida = b"".join(blocos).decode(encoding or locale.getpreferredencoding(False), errors)
+    resultado = subprocess.CompletedProcess(args, processo.returncode, stdout=saida, stderr="")
+    if check:
+        resultado.check_returncode()
+    return resultado
+
+
+# --- Leitura Direta de sysfs/procfs (Linux, sem subprocessos) ---
+PCI_IDS_PATHS = [
+    os.path.join(BASE_APP_PATH, "pci.ids"),  # Cópia opcional distribuída junto ao executável
+    "/usr/share/hwdata/pci.ids",
+    "/usr/share/misc/pci.ids",
+    "/usr/share/pci.ids",
+]
+PCI_CLASSE_DISPLAY = "0x03"  # Classe PCI 03xxxx: controladoras de vídeo (VGA, 3D, display)
+
+
+def _ler_texto(caminho):
+    try:
+        with open(caminho, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def _listar_diretorio(caminho):
+    try:
+        return sorted(os.listdir(caminho))
+    except OSError:
+        return []
+
+
+def buscar_nomes_pci_ids(pares_ids):
+    """ Resolve pares (vendor, device) em hexadecimal minúsculo para (nome_vendor, nome_device) via pci.ids. """
+    pendentes = set(pares_ids)
+    vendors_procurados = {vendor for vendor, _device in pendentes}
+    nomes = {}
+    caminho = next((c for c in PCI_IDS_PATHS if os.path.isfile(c)), None)
+    if not caminho or not pendentes:
+        return nomes
+
+    vendor_atual, nome_vendor_atual = None, None
+    try:
+        with open(caminho, "r", encoding="utf-8", errors="ignore") as f:
+            for linha in f:
+                if not pendentes or linha.startswith("C "):  # "C " inicia a lista de classes
+                    break
+                if not linha.strip() or linha.startswith("#"):
+                    continue
+                if not linha.startswith("\t"):
+                    vendor_atual = linha[:4].lower()
+                    nome_vendor_atual = linha[4:].strip()
+                    for par in pendentes:
+                        if par[0] == vendor_atual:
+                            nomes[par] = (nome_vendor_atual, None)
+                elif not linha.startswith("\t\t") and vendor_atual in vendors_procurados:
+                    par = (vendor_atual, linha[1:5].lower())
+                    if par in pendentes:
+                        nomes[par] = (nome_vendor_atual, linha[5:].strip())
+                        pendentes.discard(par)
+    except OSError as e:
+        print(f"DEBUG: Erro ao ler {caminho}: {e}")
+    return nomes
+
+
+def get_gpu_linux_sysfs():
+    """ Lista as controladoras de vídeo em /sys/bus/pci/devices sem executar nenhum processo. """
+    base = "/sys/bus/pci/devices"
+    pares = []
+    for dispositivo in _listar_diretorio(base):
+        caminho = os.path.join(base, dispositivo)
+        if not _ler_texto(os.path.join(caminho, "class")).startswith(PCI_CLASSE_DISPLAY):
+            continue
+        vendor = _ler_texto(os.path.join(caminho, "vendor")).lower().replace("0x", "")
+        device = _ler_texto(os.path.join(caminho, "device")).lower().replace("0x", "")
+        if vendor and device:
+            pares.append((vendor, device))
+    if not pares:
+        return "N/A"
+
+    nomes = buscar_nomes_pci_ids(pares)
+    gpus = []
+    for par in pares:
+        nome_vendor, nome_device = nomes.get(par, (None, None))
+        if nome_device:
+            descricao = f"{nome_vendor} {nome_device}"
+        elif nome_vendor:
+            descricao = f"{nome_vendor} [{par[1]}]"
+        else:
+            descricao = f"PCI {par[0]}:{par[1]}"
+        if descricao not in gpus:
+            gpus.append(descricao)
+    return ", ".join(gpus)
+
+
+def _discos_base_sysfs(caminho_sysfs):
+    """ Segue partições e dispositivos empilhados (dm/LVM/mdraid) até os discos físicos. """
+    caminho = os.path.realpath(caminho_sysfs)
+    if os.path.exists(os.path.join(caminho, "partition")):
+        caminho = os.path.dirname(caminho)
+    escravos = _listar_diretorio(os.path.join(caminho, "slaves"))
+    if not escravos:
+        return [os.path.basename(caminho)]
+    discos = []
+    for escravo in escravos:
+        for disco in _discos_base_sysfs(os.path.join(caminho, "slaves", escravo)):
+            if disco not in discos:
+                discos.append(disco)
+    return discos
+
+
+def _desescapar_mountinfo(texto):
+    # mountinfo escapa espaço, tab, quebra de linha e barra invertida como \040, \011, \012 e \134
+    return re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), texto) if "\\" in texto else texto
+
+
+def _montagens_por_disco_linux():
+    """ Mapeia disco físico -> [{"ponto", "sistema_arquivos"}] numa leitura de /proc/self/mountinfo. """
+    montagens = {}
+    discos_por_dispositivo = {}
+    try:
+        with open("/proc/self/mountinfo", "r") as f:
+            linhas = f.readlines()
+    except OSError:
+        return montagens
+    for linha in linhas:
+        campos = linha.split()
+        try:
+            separador = campos.index("-")
+            sistema_arquivos, origem = campos[separador + 1], campos[separador + 2]
+        except (ValueError, IndexError):
+            continue
+        dispositivo = campos[2]
+        if dispositivo.startswith("0:"):
+            # btrfs e afins usam dispositivo anônimo; só interessa se a origem for um nó em /dev
+            if not origem.startswith("/dev/"):
+                continue
+            try:
+                rdev = os.stat(origem).st_rdev
+            except OSError:
+                continue
+            dispositivo = f"{os.major(rdev)}:{os.minor(rdev)}"
+        if dispositivo not in discos_por_dispositivo:
+            caminho = f"/sys/dev/block/{dispositivo}"
+            discos_por_dispositivo[dispositivo] = _discos_base_sysfs(caminho) if os.path.exists(caminho) else []
+        ponto = _desescapar_mountinfo(campos[4])
+        for disco in discos_por_dispositivo[dispositivo]:
+            lista = montagens.setdefault(disco, [])
+            if not any(m["ponto"] == ponto for m in lista):
+                lista.append({"ponto": ponto, "sistema_arquivos": sistema_arquivos})
+    return montagens
+
+
+def _transporte_disco_sysfs(nome_disco, caminho_real):
+    if nome_disco.startswith("nvme"):
+        return "nvme"
+    if nome_disco.startswith("mmcblk"):
+        return "mmc"
+    for marcador, transporte in (("/usb", "usb"), ("/ata", "sata"), ("/virtio", "virtio"), ("/end_device-", "sas")):
+        if marcador in caminho_real:
+            return transporte
+    return "scsi" if "/host" in caminho_real else ""
+
+
+def _serial_disco_sysfs(caminho_disco):
+    for arquivo in ("device/serial", "serial"):  # NVMe/eMMC e virtio expõem o serial em texto
+        serial = _ler_texto(os.path.join(caminho_disco, arquivo))
+        if serial:
+            return serial
+    try:
+        # SATA/SAS: página VPD 0x80 (Unit Serial Number) = 4 bytes de cabeçalho + serial ASCII
+        with open(os.path.join(caminho_disco, "device", "vpd_pg80"), "rb") as f:
+            pagina = f.read()
+        return pagina[4:4 + pagina[3]].decode("ascii", "replace").strip() if len(pagina) > 4 else ""
+    except OSError:
+        return ""
+
+
+def listar_discos_linux():
+    """ Discos físicos de /sys/block com tamanho, rotacional, modelo, serial, transporte e montagens.
+
+    Ignora dispositivos virtuais (loop, zram, dm, md), removíveis e sem mídia; não usa subprocessos.
+    """
+    montagens = _montagens_por_disco_linux()
+    discos = []
+    for nome in _listar_diretorio("/sys/block"):
+        caminho = os.path.join("/sys/block", nome)
+        caminho_real = os.path.realpath(caminho)
+        if "/virtual/" in caminho_real or not os.path.exists(os.path.join(caminho, "device")):
+            continue
+        try:
+            setores = int(_ler_texto(os.path.join(caminho, "size")) or 0)
+        except ValueError:
+            setores = 0
+        if setores == 0 or _ler_texto(os.path.join(caminho, "removable")) == "1":
+            continue
+        rotacional = {"0": False, "1": True}.get(_ler_texto(os.path.join(caminho, "queue", "rotational")))
+        if nome.startswith("nvme"):
+            tipo = "SSD (NVMe)"
+        else:
+            tipo = {False: "SSD", True: "HDD"}.get(rotacional, "Desconhecido")
+        modelo = " ".join(_ler_texto(os.path.join(caminho, "device", "model")).split())
+        fabricante = _ler_texto(os.path.join(caminho, "device", "vendor"))
+        if fabricante and fabricante != "ATA" and not fabricante.startswith("0x") and fabricante not in modelo:
+            modelo = f"{fabricante} {modelo}".strip()
+        discos.append({
+            "nome": nome,
+            "tipo": tipo,
+            "tamanho_bytes": setores * 512,  # /sys/block/*/size é sempre em setores de 512 bytes
+            "rotacional": rotacional,
+            "modelo": modelo,
+            "serial": _serial_disco_sysfs(caminho),
+            "transporte": _transporte_disco_sysfs(nome, caminho_real),
+            "montagens": sorted(montagens.get(nome, []), key=lambda m: m["ponto"]),
+        })
+    return discos
+
+
+def get_disk_type_linux_sysfs(ponto_montagem="/", discos=None):
+    """ Tipo (SSD/HDD/NVMe) dos discos físicos por trás de `ponto_montagem`, a partir de listar_discos_linux
+    (ou de `discos`, uma varredura já feita). """
+    tipos = []
+    for disco in discos if discos is not None else listar_discos_linux():
+        if disco["tipo"] not in tipos and any(m["ponto"] == ponto_montagem for m in disco["montagens"]):
+            tipos.append(disco["tipo"])
+    conhecidos = [t for t in tipos if t != "Desconhecido"]
+    return " / ".join(conhecidos) if conhecidos else "Desconhecido"
+
+
+# --- Funções Auxiliares para GPU ---
+def get_gpu_windows():
+    try:
+        result = executar_comando(["wmic", "path", "Win32_VideoController", "get", "Name"],
+                                  timeout=SONDAS_TIMEOUTS["gpu"], check=True, encoding='cp850', errors='ignore')
+        gpus = [line.strip() for line in result.stdout.splitlines() if line.strip() and line.strip().lower() != "name"]
+        return ", ".join(gpus) if gpus else "N/A"
+    except Exception as e:
+        print(f"DEBUG: Erro ao obter GPU (Windows): {e}")
+        return "N/A"
+
+
+def get_gpu_linux():
+    try:
+        gpu_name = get_gpu_linux_sysfs()
+        if gpu_name != "N/A":
+            return gpu_name
+    except Exception as e:
+        print(f"DEBUG: Erro ao obter GPU via sysfs: {e}")
+    return get_gpu_linux_subprocesso()
+
+
+def get_gpu_linux_subprocesso():
+    gpu_name = "N/A"
+    try:
+        result_glx = executar_comando(["glxinfo"], timeout=SONDAS_TIMEOUTS["gpu"])
+        if result_glx.returncode == 0:
+            for line in result_glx.stdout.splitlines():
+                if "OpenGL renderer string" in line:
+                    gpu_name = line.split(":", 1)[1].strip()
+                    return gpu_name
+    except FileNotFoundError:
+        print("DEBUG: glxinfo não encontrado.")
+    except Exception as e_glx:
+        print(f"DEBUG: Erro com glxinfo: {e_glx}.")
+
+    if gpu_name == "N/A":
+        try:
+            result_lspci = executar_comando(["lspci"], check=True)
+            gpus_lspci = []
+            for line in result_lspci.stdout.splitlines():
+                if "VGA compatible controller" in line or "3D controller" in line or "Display controller" in line:
+                    parts = line.split(":", 2)
+                    gpu_desc = parts[-1].strip() if len(parts) > 2 else line.strip()
+                    gpu_desc = re.sub(r'^\[.*?\]\s*', '', gpu_desc)
+                    gpu_desc = re.sub(r'\s*\(rev .*\)\s*$', '', gpu_desc)
+                    if gpu_desc:
+                        gpus_lspci.append(gpu_desc.strip())
+            if gpus_lspci:
+                return ", ".join(list(set(gpus_lspci)))
+        except FileNotFoundError:
+            print("DEBUG: lspci não encontrado.")
+        except Exception as e_lspci:
+            print(f"DEBUG: Erro ao obter GPU (Linux - lspci): {e_lspci}")
+    return gpu_name
+
+
+def get_gpu_macos():
+    try:
+        result = executar_comando(["system_profiler", "SPDisplaysDataType"], timeout=SONDAS_TIMEOUTS["gpu"],
+                                  check=True)
+        gpus = []
+        for line in result.stdout.splitlines():
+            stripped_line = line.strip()
+            if stripped_line.startswith("Chipset Model:"):
+                gpu_name = stripped_line.split(":", 1)[1].strip()
+                if gpu_name not in gpus:
+                    gpus.append(gpu_name)
+        return ", ".join(gpus) if gpus else "N/A"
+    except Exception as e:
+        print(f"DEBUG: Erro ao obter GPU (macOS): {e}")
+        return "N/A"
+
+
+# --- Funções Auxiliares para Tipo de Disco (Raiz) ---
+def get_disk_type_windows():
+    try:
+        ps_command = "(Get-PhysicalDisk (Get-Partition -DriveLetter C).DiskNumber).MediaType"
+        result = executar_comando(["powershell", "-NoProfile", "-Command", ps_command],
+                                  timeout=SONDAS_TIMEOUTS["tipo_disco"], check=True)
+        media_type_output = result.stdout.strip().upper()
+        if media_type_output == "3" or media_type_output == "HDD":
+            return "HDD"
+        elif media_type_output == "4" or media_type_output == "SSD":
+            return "SSD"
+        elif media_type_output == "5":
+            return "SSD (SCM)"
+        elif media_type_output == "0" or media_type_output == "UNSPECIFIED":
+            return "Desconhecido (Unspecified)"
+        else:
+            return f"Desconhecido ({media_type_output})"
+    except Exception as e:
+        print(f"DEBUG: Erro ao obter tipo de disco (Windows): {e}")
+        return "Desconhecido"
+
+
+def get_disk_type_linux(varrer_discos=listar_discos_linux):
+    try:
+        tipo = get_disk_type_linux_sysfs("/", varrer_discos())
+        if tipo != "Desconhecido":
+            return tipo
+    except Exception as e:
+        print(f"DEBUG: Erro ao obter tipo de disco via sysfs: {e}")
+    return get_disk_type_linux_subprocesso()
+
+
+def get_disk_type_linux_subprocesso():
+    try:
+        df_output_result = executar_comando(["df", "/"], check=True)
+        df_output = df_output_result.stdout
+        lines = df_output.strip().splitlines()
+        if len(lines) > 1:
+            device_path = lines[1].split()[0]
+            if device_path.startswith("/dev/"):
+                dev_name_full = device_path.split('/')[-1]
+                base_dev_name = dev_name_full
+                match_sd_hd_vd = re.match(r"([svh]d[a-z]+)[0-9]*$", dev_name_full)
+                if match_sd_hd_vd:
+                    base_dev_name = match_sd_hd_vd.group(1)
+                else:
+                    match_nvme = re.match(r"(nvme[0-9]+n[0-9]+)p[0-9]+$", dev_name_full)
+                    if match_nvme:
+                        base_dev_name = match_nvme.group(1)
+                    elif 'p' in base_dev_name and "nvme" in base_dev_name:
+                        base_dev_name = base_dev_name.split('p')[0]
+
+                if base_dev_name.startswith("nvme"):
+                    return "SSD (NVMe)"
+
+                rotational_file = f"/sys/block/{base_dev_name}/queue/rotational"
+                if os.path.exists(rotational_file):
+                    with open(rotational_file, "r") as f:
+                        val = f.read().strip()
+                    if val == "0":
+                        return "SSD"
+                    elif val == "1":
+                        return "HDD"
+        return "Desconhecido"
+    except Exception as e:
+        print(f"DEBUG: Erro ao obter tipo de disco (Linux): {e}")
+        return "Desconhecido"
+
+
+def get_disk_type_macos():
+    try:
+        result = executar_comando(["diskutil", "info", "/"], timeout=SONDAS_TIMEOUTS["tipo_disco"], check=True)
+        for line in result.stdout.splitlines():
+            sl = line.strip()
+            parts = sl.split(":", 1)
+            if len(parts) > 1:
+                key, value = parts[0].strip(), parts[1].strip()
+                if key == "Solid State" and value.upper() == "YES": return "SSD"
+                if key == "Solid State" and value.upper() == "NO": return "HDD"
+                if key == "Medium Type" and "SOLID STATE" in value.upper(): return "SSD"
+                if key == "Medium Type" and "ROTATIONAL" in value.upper(): return "HDD"
+        return "Desconhecido (macOS)"
+    except Exception as e:
+        print(f"DEBUG: Erro ao obter tipo de disco (macOS): {e}")
+        return "Desconhecido"
+
+
+# --- Inventário de Software (bancos de pacotes lidos diretamente, sem dpkg-query/rpm) ---
+DPKG_STATUS_PATH = "/var/lib/dpkg/status"
+RPMDB_SQLITE_PATHS = ["/var/lib/rpm/rpmdb.sqlite", "/usr/lib/sysimage/rpm/rpmdb.sqlite"]
+RPMDB_LEGADO_PATH = "/var/lib/rpm/Packages"  # Berkeley DB (RHEL/CentOS <= 8): lido via `rpm -qa`
+_RE_CAMPOS_DPKG = re.compile(r"^(Package|Status|Version|Architecture): *(.*)$", re.MULTILINE)
+
+# Tags do cabeçalho RPM e tipos de dado usados por elas
+_RPMTAG_NAME, _RPMTAG_VERSION, _RPMTAG_RELEASE, _RPMTAG_EPOCH, _RPMTAG_ARCH = 1000, 1001, 1002, 1003, 1022
+_RPM_TIPO_INT32, _RPM_TIPO_STRING, _RPM_TIPO_I18NSTRING = 4, 6, 9
+
+
+def _ler_pacotes_dpkg(caminho=DPKG_STATUS_PATH):
+    """ Pacotes instalados segundo o arquivo de status do dpkg. """
+    with open(caminho, "r", encoding="utf-8", errors="replace") as f:
+        texto = f.read()
+    pacotes = []
+    atual = None
+    # Uma única passada de regex sobre o arquivo; "Package" sempre abre uma nova estrofe
+    for campo, valor in _RE_CAMPOS_DPKG.findall(texto):
+        if campo == "Package":
+            atual = {"nome": valor.strip()}
+            pacotes.append(atual)
+        elif atual is not None:
+            atual[campo] = valor.strip()
+    return [
+        {"nome": p["nome"], "versao": p.get("Version", ""), "arquitetura": p.get("Architecture", "")}
+        for p in pacotes if p.get("Status", "").endswith(" installed")
+    ]
+
+
+def _decodificar_cabecalho_rpm(blob):
+    """ Extrai nome, versão ([época:]versão-release) e arquitetura de um cabeçalho RPM sem o "magic". """
+    quantidade, tamanho_dados = struct.unpack_from(">II", blob, 0)
+    inicio_dados = 8 + 16 * quantidade
+    if inicio_dados + tamanho_dados > len(blob):
+        raise ValueError("cabeçalho RPM truncado")
+    valores = {}
+    for posicao in range(8, inicio_dados, 16):
+        tag, tipo, deslocamento, _contagem = struct.unpack_from(">IIiI", blob, posicao)
+        if tag not in (_RPMTAG_NAME, _RPMTAG_VERSION, _RPMTAG_RELEASE, _RPMTAG_EPOCH, _RPMTAG_ARCH):
+            continue
+        inicio = inicio_dados + deslocamento
+        if tipo == _RPM_TIPO_INT32:
+            valores[tag] = struct.unpack_from(">i", blob, inicio)[0]
+        elif tipo in (_RPM_TIPO_STRING, _RPM_TIPO_I18NSTRING):
+            fim = blob.index(b"\0", inicio)
+            valores[tag] = blob[inicio:fim].decode("utf-8", "replace")
+    versao = f"{valores.get(_RPMTAG_VERSION, '')}-{valores.get(_RPMTAG_RELEASE, '')}"
+    if valores.get(_RPMTAG_EPOCH):
+        versao = f"{valores[_RPMTAG_EPOCH]}:{versao}"
+    return {"nome": valores.get(_RPMTAG_NAME, ""), "versao": versao, "arquitetura": valores.get(_RPMTAG_ARCH, "")}
+
+
+def _ler_pacotes_rpmdb(caminho):
+    """ Pacotes instalados lendo os cabeçalhos direto do rpmdb.sqlite (RPM >= 4.16), em modo somente leitura. """
+    import sqlite3
+    conexao = sqlite3.connect(f"file:{urllib.parse.quote(caminho)}?mode=ro", uri=True)
+    try:
+        blobs = conexao.execute("SELECT blob FROM Packages").fetchall()
+    finally:
+        conexao.close()
+    pacotes = []
+    for (blob,) in blobs:
+        try:
+            pacote = _decodificar_cabecalho_rpm(bytes(blob))
+        except (struct.error, ValueError) as e:
+            print(f"DEBUG: Cabeçalho RPM ilegível em {caminho}: {e}")
+            continue
+        if pacote["nome"] and pacote["nome"] != "gpg-pubkey":  # Chaves importadas não são software
+            pacotes.append(pacote)
+    return pacotes
+
+
+def _ler_pacotes_rpm_subprocesso():
+    """ Alternativa para bancos RPM antigos (Berkeley DB/ndb), que não são lidos diretamente. """
+    formato = "%{NAME}\\t%{EPOCHNUM}\\t%{VERSION}-%{RELEASE}\\t%{ARCH}\\n"
+    saida = executar_comando(["rpm", "-qa", "--qf", formato], timeout=SONDAS_TIMEOUTS["software"], check=True,
+                             max_saida=8 * SUBPROCESSO_SAIDA_MAX).stdout
+    pacotes = []
+    for linha in saida.splitlines():
+        partes = linha.split("\t")
+        if len(partes) != 4 or partes[0] == "gpg-pubkey":
+            continue
+        nome, epoca, versao, arquitetura = partes
+        pacotes.append({"nome": nome, "versao": f"{epoca}:{versao}" if epoca not in ("", "0") else versao,
+                        "arquitetura": arquitetura})
+    return pacotes
+
+
+def _chaves_desinstalacao_windows():
+    """ (raiz, caminho, flag de visão, arquitetura) das chaves Uninstall do registro. """
+    import winreg
+    caminho = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall"
+    return [
+        (winreg.HKEY_LOCAL_MACHINE, caminho, winreg.KEY_WOW64_64KEY, "x64"),
+        (winreg.HKEY_LOCAL_MACHINE, caminho, winreg.KEY_WOW64_32KEY, "x86"),
+        (winreg.HKEY_CURRENT_USER, caminho, 0, ""),
+    ]
+
+
+def _ler_programas_windows():
+    """ Programas listados em "Aplicativos instalados", lidos das chaves Uninstall do registro. """
+    import winreg
+    pacotes = {}
+    for raiz, caminho, visao, arquitetura in _chaves_desinstalacao_windows():
+        try:
+            chave = winreg.OpenKey(raiz, caminho, 0, winreg.KEY_READ | visao)
+        except OSError:
+            continue
+        with chave:
+            for indice in range(winreg.QueryInfoKey(chave)[0]):
+                try:
+                    with winreg.OpenKey(chave, winreg.EnumKey(chave, indice)) as subchave:
+                        valores = {}
+                        for nome_valor in ("DisplayName", "DisplayVersion", "SystemComponent", "ParentKeyName"):
+                            try:
+                                valores[nome_valor] = winreg.QueryValueEx(subchave, nome_valor)[0]
+                            except OSError:
+                                pass
+                except OSError:
+                    continue
+                nome = str(valores.get("DisplayName") or "").strip()
+                # Componentes de sistema e atualizações de outro produto não aparecem no Painel de Controle
+                if not nome or valores.get("SystemComponent") == 1 or valores.get("ParentKeyName"):
+                    continue
+                pacote = {"nome": nome, "versao": str(valores.get("DisplayVersion") or ""), "arquitetura": arquitetura}
+                pacotes.setdefault((pacote["nome"], pacote["arquitetura"]), pacote)
+    return list(pacotes.values())
+
+
+def _fonte_software():
+    """ Retorna (leitor, token) da fonte de inventário desta máquina, ou (None, None) se não houver.
+
+    O token muda sempre que o banco de pacotes muda (mtime/tamanho dos arquivos ou data de escrita das
+    subchaves de desinstalação do registro), sem precisar ler o banco.
+    """
+    sistema = platform.system()
+    if sistema == "Linux":
+        def _assinatura(*caminhos):
+            assinatura = []
+            for caminho in caminhos:
+                try:
+                    estado = os.stat(caminho)
+                    assinatura.append([caminho, estado.st_mtime_ns, estado.st_size])
+                except OSError:
+                    pass
+            return assinatura
+
+        if os.path.exists(DPKG_STATUS_PATH):
+            return _ler_pacotes_dpkg, _assinatura(DPKG_STATUS_PATH)
+        for caminho in RPMDB_SQLITE_PATHS:
+            if os.path.exists(caminho):
+                # Transações recentes podem estar só no WAL, sem alterar o arquivo principal
+                return (lambda: _ler_pacotes_rpmdb(caminho)), _assinatura(caminho, caminho + "-wal")
+        if os.path.exists(RPMDB_LEGADO_PATH):
+            return _ler_pacotes_rpm_subprocesso, _assinatura(RPMDB_LEGADO_PATH)
+    elif sistema == "Windows":
+        import winreg
+        token = []
+        for raiz, caminho, visao, arquitetura in _chaves_desinstalacao_windows():
+            try:
+                with winreg.OpenKey(raiz, caminho, 0, winreg.KEY_READ | visao) as chave:
+                    # Uma atualização no lugar reescreve só a subchave do programa (DisplayVersion), sem mudar a
+                    # data de escrita da chave pai: o token resume nome e data de escrita de cada subchave
+                    quantidade = winreg.QueryInfoKey(chave)[0]
+                    resumo = hashlib.sha256()
+                    for indice in range(quantidade):
+                        try:
+                            nome = winreg.EnumKey(chave, indice)
+                            with winreg.OpenKey(chave, nome) as subchave:
+                                resumo.update(f"{nome}\0{winreg.QueryInfoKey(subchave)[2]}\n".encode("utf-8"))
+                        except OSError:
+                            continue
+                    token.append([arquitetura, quantidade, resumo.hexdigest()])
+            except OSError:
+                pass
+        return _ler_programas_windows, token
+    return None, None
+
+
+def ler_cache_software(token=None):
+    """ Inventário guardado; com `token`, só se ainda corresponder ao banco de pacotes atual. """
+    try:
+        with open(CACHE_SOFTWARE_FILE, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cache, dict) or not isinstance(cache.get("pacotes"), list):
+        return None
+    if token is not None and cache.get("token") != token:
+        return None
+    return cache["pacotes"]
+
+
+def get_software_info(usar_cache=True):
+    """ Lista de pacotes instalados [{"nome", "versao", "arquitetura"}], ordenada; None se não suportado.
+
+    O banco de pacotes só é lido quando o token muda; nos demais logons vale a cópia em software_cache.json.
+    """
+    leitor, token = _fonte_software()
+    if leitor is None:
+        return None
+    if usar_cache:
+        em_cache = ler_cache_software(token)
+        if em_cache is not None:
+            return em_cache
+
+    pacotes = sorted(leitor(), key=lambda p: (p["nome"], p["arquitetura"], p["versao"]))
+    print(f"DEBUG: Inventário de software relido: {len(pacotes)} pacotes.")
+    try:
+        _gravar_atomico(CACHE_SOFTWARE_FILE, {"token": token, "pacotes": pacotes})
+    except OSError as e:
+        print(f"DEBUG: Erro ao salvar cache de software: {e}")
+    return pacotes
+
+
+def calcular_delta_software(anteriores, atuais):
+    """ Diferença entre dois inventários: pacotes adicionados, removidos e com versão alterada. """
+    antes = {(p["nome"], p["arquitetura"]): p["versao"] for p in anteriores}
+    depois = {(p["nome"], p["arquitetura"]): p["versao"] for p in atuais}
+    delta = {
+        "adicionados": [{"nome": n, "versao": depois[(n, a)], "arquitetura": a}
+                        for n, a in sorted(depois.keys() - antes.keys())],
+        "removidos": [{"nome": n, "versao": antes[(n, a)], "arquitetura": a}
+                      for n, a in sorted(antes.keys() - depois.keys())],
+        "atualizados": [{"nome": n, "arquitetura": a, "de": antes[(n, a)], "para": depois[(n, a)]}
+                        for n, a in sorted(antes.keys() & depois.keys()) if antes[(n, a)] != depois[(n, a)]],
+    }
+    return delta
+
+
+def aplicar_delta_software(anteriores, delta):
+    """ Inverso de calcular_delta_software: reconstrói o inventário atual a partir do anterior e da diferença. """
+    pacotes = {(p["nome"], p["arquitetura"]): p["versao"] for p in anteriores}
+    for p in delta.get("removidos", []):
+        pacotes.pop((p["nome"], p["arquitetura"]), None)
+    for p in delta.get("adicionados", []):
+        pacotes[(p["nome"], p["arquitetura"])] = p["versao"]
+    for p in delta.get("atualizados", []):
+        pacotes[(p["nome"], p["arquitetura"])] = p["para"]
+    return [{"nome": n, "versao": v, "arquitetura": a} for (n, a), v in sorted(pacotes.items())]
+
+
+# --- Identidade de Rede (interfaces locais e tabela de rotas; sem DNS nem conexões de saída) ---
+PROC_NET_ROUTE = "/proc/net/route"
+PROC_NET_IPV6_ROUTE = "/proc/net/ipv6_route"
+PROC_NET_IF_INET6 = "/proc/net/if_inet6"
+IFA_F_TEMPORARY = 0x01  # Endereço de privacidade (RFC 4941), trocado a cada poucas horas
+IFA_F_DEPRECATED = 0x20  # Endereço temporário já substituído, mantido só até as conexões antigas fecharem
+# Interfaces de contêineres, VMs e VPNs: preteridas na escolha da principal quando não há tabela de rotas
+PREFIXOS_INTERFACE_VIRTUAL = ("docker", "veth", "br-", "virbr", "vmnet", "vboxnet", "tun", "tap", "wg", "zt",
+                              "tailscale", "vethernet", "virtualbox", "vmware", "hyper-v", "npcap", "bluetooth")
+
+
+def _normalizar_mac(endereco):
+    mac = (endereco or "").replace("-", ":").upper()
+    if len(mac) != 17 or mac == "00:00:00:00:00:00":
+        return None
+    return mac
+
+
+def _ipv6_efemeros_linux():
+    """ Endereços IPv6 temporários ou depreciados (em hexadecimal, como em /proc/net/if_inet6). """
+    efemeros = set()
+    try:
+        with open(PROC_NET_IF_INET6, "r") as f:
+            for linha in f:
+                campos = linha.split()
+                # Endereço Índice Prefixo Escopo Flags Iface
+                if len(campos) >= 6 and int(campos[4], 16) & (IFA_F_TEMPORARY | IFA_F_DEPRECATED):
+                    efemeros.add(campos[0].lower())
+    except (OSError, ValueError):
+        pass
+    return efemeros
+
+
+def _interface_rota_padrao_linux():
+    """ Interface da rota padrão de menor métrica (IPv4; IPv6 se não houver), lida de /proc/net. """
+    candidatas = []
+    try:
+        with open(PROC_NET_ROUTE, "r") as f:
+            next(f, None)
+            for linha in f:
+                campos = linha.split()
+                # Iface Destination Gateway Flags RefCnt Use Metric Mask ...; 0x1 = RTF_UP
+                if len(campos) >= 8 and campos[1] == "00000000" and campos[7] == "00000000" \
+                        and int(campos[3], 16) & 0x1:
+                    candidatas.append((int(campos[6]), campos[0]))
+    except (OSError, ValueError):
+        pass
+    if not candidatas:
+        try:
+            with open(PROC_NET_IPV6_ROUTE, "r") as f:
+                for linha in f:
+                    campos = linha.split()
+                    # destino prefixo origem prefixo próximo_salto métrica refcnt uso flags iface
+                    if len(campos) == 10 and campos[1] == "00" and int(campos[0], 16) == 0 and campos[9] != "lo" \
+                            and int(campos[8], 16) & 0x1:
+                        candidatas.append((int(campos[5], 16), campos[9]))
+        except (OSError, ValueError):
+            pass
+    return min(candidatas)[1] if candidatas else None
+
+
+def _escolher_interface_principal(interfaces):
+    if platform.system() == "Linux":
+        nome = _interface_rota_padrao_linux()
+        if nome and any(i["nome"] == nome for i in interfaces):
+            return nome
+    # Sem tabela de rotas legível: a interface ativa, física e com IPv4 roteável mais rápida
+    def _roteavel(interface):
+        return interface["ativa"] and any(not ip.startswith("169.254.") for ip in interface["ipv4"])
+    fisicas = [i for i in interfaces if _roteavel(i) and i["mac"]
+               and not i["nome"].lower().startswith(PREFIXOS_INTERFACE_VIRTUAL)]
+    candidatas = fisicas or [i for i in interfaces if _roteavel(i)]
+    if not candidatas:
+        return None
+    return max(candidatas, key=lambda i: i["velocidade_mbps"] or 0)["nome"]
+
+
+# Valores de fábrica que não identificam a placa (BIOS genéricas, VMs)
+SERIAIS_INVALIDOS = {"", "0", "NONE", "N/A", "DEFAULT STRING", "TO BE FILLED BY O.E.M", "SYSTEM SERIAL NUMBER",
+                     "NOT SPECIFIED", "NOT APPLICABLE", "BASE BOARD SERIAL NUMBER", "0123456789", "SERIALNUMBER"}
+DMI_ID_DIR = "/sys/class/dmi/id"
+
+
+def _normalizar_serial(serial):
+    serial = str(serial or "").strip().strip(".").upper()
+    return None if serial in SERIAIS_INVALIDOS or set(serial) <= {"0", " ", "-"} else serial
+
+
+@functools.lru_cache(maxsize=1)
+def get_serial_placa():
+    """ Número de série da placa-mãe (ou do equipamento), ou None. Lido uma vez por processo. """
+    sistema = platform.system()
+    try:
+        if sistema == "Linux":
+            # board_serial/product_serial costumam ser legíveis só pelo root; sem eles, None
+            for nome in ("board_serial", "product_serial"):
+                serial = _normalizar_serial(_ler_texto(os.path.join(DMI_ID_DIR, nome)))
+                if serial:
+                    return serial
+        elif sistema == "Windows":
+            saida = executar_comando(["wmic", "baseboard", "get", "SerialNumber"], check=True).stdout
+            linhas = [linha.strip() for linha in saida.splitlines() if linha.strip()]
+            return _normalizar_serial(linhas[1]) if len(linhas) > 1 else None
+        elif sistema == "Darwin":
+            saida = executar_comando(["ioreg", "-rd1", "-c", "IOPlatformExpertDevice"], check=True).stdout
+            encontrado = re.search(r'"IOPlatformSerialNumber"\s*=\s*"([^"]+)"', saida)
+            return _normalizar_serial(encontrado.group(1)) if encontrado else None
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"DEBUG: Erro ao obter serial da placa: {e}")
+    return None
+
+
+@functools.lru_cache(maxsize=1)
+def descobrir_interfaces_rede():
+    """ Todas as interfaces de rede (exceto loopback), lidas uma vez por processo via psutil.
+
+    Cada item: nome, mac, ipv4, ipv6, velocidade_mbps (None se desconhecida), ativa e principal (a da rota
+    padrão). Não resolve nomes nem abre conexões. A lista é compartilhada: não a modifique.
+    """
+    import psutil
+    enderecos = psutil.net_if_addrs()
+    estatisticas = psutil.net_if_stats()
+    # psutil não expõe as flags do endereço; no Linux elas vêm de /proc (nos demais, ipv6 fica fora do hash)
+    efemeros = _ipv6_efemeros_linux() if platform.system() == "Linux" else set()
+    interfaces = []
+    for nome in sorted(enderecos):
+        mac, ipv4, ipv6 = None, [], []
+        for endereco in enderecos[nome]:
+            if endereco.family == psutil.AF_LINK:
+                mac = mac or _normalizar_mac(endereco.address)
+            elif endereco.family == socket.AF_INET:
+                ipv4.append(endereco.address)
+            elif endereco.family == socket.AF_INET6:
+                ip = endereco.address.split("%", 1)[0]  # Sem o sufixo de escopo (fe80::1%eth0)
+                if efemeros and socket.inet_pton(socket.AF_INET6, ip).hex() in efemeros:
+                    continue
+                ipv6.append(ip)
+        if nome == "lo" or "loopback" in nome.lower() or (ipv4 + ipv6 and all(
+                ip.startswith("127.") or ip == "::1" for ip in ipv4 + ipv6)):
+            continue
+        estatistica = estatisticas.get(nome)
+        interfaces.append({
+            "nome": nome, "mac": mac, "ipv4": ipv4, "ipv6": ipv6,
+            "velocidade_mbps": (estatistica.speed or None) if estatistica else None,
+            "ativa": bool(estatistica and estatistica.isup),
+            "principal": False,
+        })
+    principal = _escolher_interface_principal(interfaces)
+    for interface in interfaces:
+        interface["principal"] = interface["nome"] == principal
+    return interfaces
+
+
+def interface_principal():
+    return next((i for i in descobrir_interfaces_rede() if i["principal"]), None)
+
+
+# --- Funções Principais de Coleta e Envio ---
+def get_mac_address():
+    """ MAC da interface principal (ou da primeira que tiver um); sem uuid.getnode(), que pode sortear um. """
+    try:
+        principal = interface_principal()
+        if principal and principal["mac"]:
+            return principal["mac"]
+        return next((i["mac"] for i in descobrir_interfaces_rede() if i["mac"]), "Não disponível")
+    except Exception as e:
+        print(f"DEBUG: Erro ao obter MAC: {e}")
+        return "Não disponível"
+
+
+def _iniciar_sondas_em_daemons(sondas, executar, max_workers):
+    """ Distribui as sondas entre threads daemon e retorna nome -> Future.
+
+    Não usa ThreadPoolExecutor: o interpretador junta as threads dele na saída, e uma sonda travada
+    (WMI, py-cpuinfo, psutil numa montagem pendurada) prenderia o modo sem interface mesmo já reportada como N/A.
+    """
+    pendentes = [(nome, funcao, concurrent.futures.Future()) for nome, funcao in sondas.items()]
+    fila = iter(list(pendentes))
+    fila_lock = threading.Lock()
+
+    def _trabalhar():
+        while True:
+            with fila_lock:
+                item = next(fila, None)
+            if item is None:
+                return
+            nome, funcao, futuro = item
+            if not futuro.set_running_or_notify_cancel():
+                continue
+            try:
+                futuro.set_result(executar(nome, funcao))
+            except BaseException as e:
+                futuro.set_exception(e)
+
+    for _ in range(min(max_workers, len(pendentes))):
+        threading.Thread(target=_trabalhar, name="x9h-sonda", daemon=True).start()
+    return {nome: futuro for nome, _funcao, futuro in pendentes}
+
+
+def executar_sondas(sondas, timeouts=None, valor_padrao="N/A", max_workers=SONDAS_MAX_WORKERS):
+    """ Executa sondas independentes em paralelo, cada uma com seu próprio orçamento de tempo.
+
+    `sondas` é um dict nome -> função sem argumentos. Retorna (resultados, duracoes): sondas que
+    falharem ou estourarem o tempo recebem `valor_padrao`, sem bloquear as demais. Os comandos externos
+    de uma sonda que estoura o tempo são mortos; cancelar_operacoes() interrompe tudo com OperacaoCancelada.
+    """
+    timeouts = timeouts if timeouts is not None else SONDAS_TIMEOUTS
+    resultados, duracoes, threads_sondas = {}, {}, {}
+    if not sondas:
+        return resultados, duracoes
+    verificar_cancelamento()
+
+    def _cronometrar(nome, funcao):
+        inicio_sonda = time.perf_counter()
+        threads_sondas[nome] = threading.get_ident()
+        try:
+            with x9h_metricas.span(f"sonda.{nome}"):
+                return funcao()
+        finally:
+            duracoes[nome] = time.perf_counter() - inicio_sonda
+
+    inicio = time.perf_counter()
+    futuros = _iniciar_sondas_em_daemons(sondas, _cronometrar, max_workers)
+    try:
+        for nome, futuro in futuros.items():
+            limite = timeouts.get(nome, SONDA_TIMEOUT_PADRAO)
+            restante = max(0.0, inicio + limite - time.perf_counter())
+            # Espera em fatias curtas para notar um cancelamento sem aguardar o prazo inteiro
+            while not futuro.done() and restante > 0:
+                concurrent.futures.wait([futuro], timeout=min(0.1, restante))
+                verificar_cancelamento()
+                restante = max(0.0, inicio + limite - time.perf_counter())
+            try:
+                valor = futuro.result(timeout=0)
+                resultados[nome] = valor if valor is not None else valor_padrao
+            except concurrent.futures.TimeoutError:
+                print(f"DEBUG: Sonda '{nome}' excedeu {limite:.1f}s; usando '{valor_padrao}'.")
+                x9h_metricas.registrar("sonda.timeout", limite, sonda=nome)
+                if nome in threads_sondas:
+                    matar_processos_da_thread(threads_sondas[nome])
+                resultados[nome] = valor_padrao
+                duracoes.setdefault(nome, time.perf_counter() - inicio)
+            except Exception as e:
+                print(f"DEBUG: Erro na sonda '{nome}': {e}")
+                resultados[nome] = valor_padrao
+    finally:
+        # Não espera sondas atrasadas: as que nem começaram são descartadas, as travadas morrem com o processo
+        for futuro in futuros.values():
+            futuro.cancel()
+    verificar_cancelamento()
+    return resultados, dict(duracoes)
+
+
+def _sonda_gpu():
+    current_os = platform.system()
+    if current_os == "Windows":
+        return get_gpu_windows()
+    elif current_os == "Linux":
+        return get_gpu_linux()
+    elif current_os == "Darwin":
+        return get_gpu_macos()
+    return "N/A"
+
+
+def _sonda_tipo_disco(varrer_discos=listar_discos_linux):
+    current_os = platform.system()
+    if current_os == "Windows":
+        return get_disk_type_windows()
+    elif current_os == "Linux":
+        return get_disk_type_linux(varrer_discos)
+    elif current_os == "Darwin":
+        return get_disk_type_macos()
+    return "Desconhecido"
+
+
+def _sonda_discos(varrer_discos=listar_discos_linux):
+    # Windows/macOS: sem equivalente barato ao sysfs; o campo "discos" é omitido
+    return varrer_discos() if platform.system() == "Linux" else None
+
+
+def _sonda_processador():
+    import cpuinfo  # pip install py-cpuinfo
+    return cpuinfo.get_cpu_info().get('brand_raw', "N/A")
+
+
+def _sonda_ip():
+    # IPv4 da interface principal, sem gethostbyname (que pode travar no DNS ou devolver 127.0.1.1)
+    principal = interface_principal()
+    if principal and principal["ipv4"]:
+        return principal["ipv4"][0]
+    return next((i["ipv4"][0] for i in descobrir_interfaces_rede() if i["ativa"] and i["ipv4"]), "N/A")
+
+
+def _sonda_serial_placa():
+    return get_serial_placa() or "N/A"
+
+
+def _sonda_interfaces_rede():
+    return [dict(interface) for interface in descobrir_interfaces_rede()]
+
+
+def _sonda_disco_total():
+    # Tamanho do sistema de arquivos "/": somar os discos por trás dele contaria espelhos RAID/LVM em dobro.
+    # A capacidade de cada disco físico vai só no campo "discos"
+    import psutil
+    return f"{round(psutil.disk_usage('/').total / (1024 ** 3), 2)} GB"
+
+
+def _sonda_ram():
+    import psutil
+    return f"{round(psutil.virtual_memory().total / (1024 ** 3), 2)} GB"
+
+
+def _sonda_nucleos():
+    import psutil
+    return psutil.cpu_count(logical=False)
+
+
+def _sonda_threads():
+    import psutil
+    return psutil.cpu_count(logical=True)
+
+
+def _sonda_software():
+    try:
+        return get_software_info()
+    except Exception as e:
+        # Banco de pacotes ilegível: reaproveita o último inventário lido, mesmo desatualizado
+        print(f"DEBUG: Erro ao ler inventário de software: {e}")
+        return ler_cache_software()
+
+
+SONDAS_DISCO = ("tipo_disco", "discos")  # Recebem a varredura de discos compartilhada da coleta
+
+
+def _executar_uma_vez(funcao):
+    """ Versão de `funcao` (sem argumentos) que roda uma única vez; chamadas concorrentes esperam o resultado. """
+    lock = threading.Lock()
+    resultado = []
+
+    def chamar():
+        with lock:
+            if not resultado:
+                resultado.append(funcao())
+            return resultado[0]
+    return chamar
+
+
+SONDAS_HARDWARE = {
+    "gpu": _sonda_gpu,
+    "tipo_disco": _sonda_tipo_disco,
+    "discos": _sonda_discos,
+    "processador": _sonda_processador,
+    "ip": _sonda_ip,
+    "disco_total": _sonda_disco_total,
+    "ram": _sonda_ram,
+    "nucleos": _sonda_nucleos,
+    "threads": _sonda_threads,
+    "mac": get_mac_address,
+    "interfaces_rede": _sonda_interfaces_rede,
+    "serial_placa": _sonda_serial_placa,
+    "software": _sonda_software,
+}
+
+
+# --- Cache Persistente de Sondas ---
+def calcular_token_cache_sondas():
+    """ Token barato que muda quando o SO, o kernel ou o conjunto de dispositivos muda. """
+    partes = [platform.system(), platform.release(), platform.version(), platform.machine(), socket.gethostname()]
+    if platform.system() == "Linux":
+        partes.append(_ler_texto("/etc/machine-id") or _ler_texto("/var/lib/dbus/machine-id"))
+        partes.extend(_listar_diretorio("/sys/bus/pci/devices"))
+        partes.extend(_listar_diretorio("/sys/block"))
+    return hashlib.sha256("|".join(partes).encode("utf-8")).hexdigest()
+
+
+def ler_cache_sondas(token):
+    """ Retorna os campos ainda válidos do cache de sondas, ou {} se o token mudou. """
+    try:
+        with open(CACHE_SONDAS_FILE, "r") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("token") != token:
+        return {}
+
+    agora = time.time()
+    validos = {}
+    for nome, entrada in cache.get("campos", {}).items():
+        ttl = SONDAS_CACHE_TTL.get(nome)
+        if ttl is None or not isinstance(entrada, dict):
+            continue
+        if agora - entrada.get("coletado_em", 0) < ttl:
+            validos[nome] = entrada
+    return validos
+
+
+def salvar_cache_sondas(token, campos):
+    """ Grava o cache de sondas de forma atômica (arquivo temporário + os.replace). """
+    temporario = CACHE_SONDAS_FILE + ".tmp"
+    try:
+        with open(temporario, "w") as f:
+            json.dump({"token": token, "campos": campos}, f)
+        os.replace(temporario, CACHE_SONDAS_FILE)
+    except OSError as e:
+        print(f"DEBUG: Não foi possível gravar o cache de sondas: {e}")
+
+
+def get_hardware_info(usar_cache=True):
+    inicio = time.perf_counter()
+    token = calcular_token_cache_sondas() if usar_cache else None
+    em_cache = ler_cache_sondas(token) if usar_cache else {}
+    # sysfs e mountinfo são lidos uma vez por coleta; tipo_disco e discos saem do mesmo resultado
+    varrer_discos = _executar_uma_vez(listar_discos_linux)
+    pendentes = {nome: functools.partial(sonda, varrer_discos) if nome in SONDAS_DISCO else sonda
+                 for nome, sonda in SONDAS_HARDWARE.items() if nome not in em_cache}
+
+    resultados, duracoes = executar_sondas(pendentes)
+    tempos = ", ".join(f"{nome}={duracao * 1000:.0f}ms" for nome, duracao in sorted(duracoes.items()))
+    print(f"DEBUG: Tempo das sondas de hardware: {tempos or '-'} (em cache: {', '.join(sorted(em_cache)) or '-'})")
+
+    if usar_cache:
+        agora = time.time()
+        campos = dict(em_cache)
+        for nome, valor in resultados.items():
+            # Valores de falha não são guardados, para que a próxima execução tente de novo
+            if nome in SONDAS_CACHE_TTL and valor not in ("N/A", "Não disponível") \
+                    and not str(valor).startswith("Desconhecido"):
+                campos[nome] = {"valor": valor, "coletado_em": agora}
+        if campos != em_cache:
+            salvar_cache_sondas(token, campos)
+    for nome, entrada in em_cache.items():
+        resultados[nome] = entrada["valor"]
+    x9h_metricas.registrar("hardware.coleta", time.perf_counter() - inicio,
+                           sondas=len(pendentes), em_cache=len(em_cache))
+
+    tipo_disco = resultados["tipo_disco"]
+    info = {
+        "sistema": f"{platform.system()} {platform.release()}",
+        "arquitetura": platform.architecture()[0],
+        "nome_pc": socket.gethostname(),
+        "ip": resultados["ip"],
+        "mac": resultados["mac"],
+        "processador": resultados["processador"],
+        "gpu": resultados["gpu"],
+        "nucleos": resultados["nucleos"],
+        "threads": resultados["threads"],
+        "ram": resultados["ram"],
+        "disco_total": resultados["disco_total"],
+        "tipo_disco_principal": tipo_disco if tipo_disco != "N/A" else "Desconhecido"
+    }
+    if isinstance(resultados["discos"], list):
+        info["discos"] = resultados["discos"]
+    if resultados["serial_placa"] != "N/A":
+        info["serial_placa"] = resultados["serial_placa"]
+    if isinstance(resultados["interfaces_rede"], list):
+        info["interfaces_rede"] = resultados["interfaces_rede"]
+    software = resultados["software"]
+    if not isinstance(software, list):
+        software = ler_cache_software()  # Sonda estourou o tempo: usa o último inventário conhecido
+    if software is not None:
+        info["software"] = software
+    return info
+
+
+# --- Detecção de Mudanças desde o Último Envio Aceito ---
+# Mudam com Wi-Fi/VPN e, no IPv6, com os endereços temporários do Windows/macOS; não contam como alteração
+CAMPOS_VOLATEIS_INTERFACE = ("velocidade_mbps", "ativa", "ipv6")
+
+
+def _sem_campos_volateis(dados):
+    """ Cópia rasa de `dados` com as interfaces de rede reduzidas à identidade (nome, MAC, IPv4). """
+    interfaces = dados.get("interfaces_rede")
+    if not isinstance(interfaces, list):
+        return dados
+    estaveis = dict(dados)
+    estaveis["interfaces_rede"] = [
+        {chave: valor for chave, valor in interface.items() if chave not in CAMPOS_VOLATEIS_INTERFACE}
+        if isinstance(interface, dict) else interface
+        for interface in interfaces
+    ]
+    return estaveis
+
+
+def hash_canonico(dados):
+    """ SHA-256 da serialização canônica (chaves ordenadas, sem espaços) dos dados, sem os campos voláteis. """
+    texto = json.dumps(_sem_campos_volateis(dados), sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+                       default=str)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def ler_ultimo_envio():
+    try:
+        with open(ULTIMO_ENVIO_FILE, "r", encoding="utf-8") as f:
+            ultimo = json.load(f)
+        return ultimo if isinstance(ultimo, dict) else None
+    except (OSError, ValueError):
+        return None
+
+
+def registrar_envio_aceito(dados):
+    """ Guarda hash e conteúdo do último payload aceito pelo servidor. """
+    ultimo = {"hash": hash_canonico(dados), "dados": dados, "aceito_em": time.time()}
+    temporario = ULTIMO_ENVIO_FILE + ".tmp"
+    try:
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(ultimo, f)
+        os.replace(temporario, ULTIMO_ENVIO_FILE)
+    except OSError as e:
+        print(f"DEBUG: Erro ao registrar último envio: {e}")
+
+
+def verificar_envio(dados):
+    """ Decide o que enviar comparando `dados` com o último payload aceito.
+
+    Retorna ("nenhum", {}) se nada mudou e o batimento não venceu, ("parcial", campos_alterados) se o
+    servidor aceita atualizações parciais, ou ("completo", dados). No envio parcial, o inventário de
+    software alterado vai em "software_delta" em vez da lista completa.
+    """
+    ultimo = ler_ultimo_envio()
+    if not ultimo or not isinstance(ultimo.get("dados"), dict):
+        return "completo", dados
+    try:
+        idade_dias = (time.time() - float(ultimo.get("aceito_em", 0))) / 86400
+    except (TypeError, ValueError):
+        idade_dias = ENVIO_HEARTBEAT_DIAS
+    if idade_dias >= ENVIO_HEARTBEAT_DIAS:
+        return "completo", dados
+    if ultimo.get("hash") == hash_canonico(dados):
+        return "nenhum", {}
+
+    anteriores = ultimo["dados"]
+    if not API_SUPORTA_PARCIAL or anteriores.get("patrimonio") != dados.get("patrimonio"):
+        return "completo", dados
+    estaveis_anteriores, estaveis = _sem_campos_volateis(anteriores), _sem_campos_volateis(dados)
+    alterados = {chave: valor for chave, valor in dados.items() if estaveis_anteriores.get(chave) != estaveis[chave]}
+    alterados.update({chave: None for chave in anteriores if chave not in dados})  # Campos que deixaram de existir
+    if isinstance(alterados.get("software"), list) and isinstance(anteriores.get("software"), list):
+        # Inventário alterado vai como diferença: só pacotes adicionados, removidos e atualizados
+        alterados["software_delta"] = calcular_delta_software(anteriores["software"], alterados.pop("software"))
+    return "parcial", alterados
+
+
+# --- Cliente HTTP Compartilhado ---
+_sessao_http = None
+_sessao_http_lock = threading.Lock()
+_conexoes_http = weakref.WeakSet()  # Conexões abertas, para cancelar_operacoes() derrubar as que estão em uso
+_conexoes_http_lock = threading.Lock()
+
+
+def _criar_retry_get():
+    from urllib3.util.retry import Retry
+    # 429/503 ficam fora da lista: são tratados por _registrar_resposta_http com Retry-After, sem sleep aqui.
+    # Sem respect_retry_after_header=False o urllib3 repetiria 413/429/503 mesmo assim, dormindo o Retry-After inteiro
+    parametros = dict(total=HTTP_RETRIES_GET, connect=HTTP_RETRIES_GET, read=HTTP_RETRIES_GET,
+                      backoff_factor=HTTP_BACKOFF_FACTOR, status_forcelist=(500, 502, 504),
+                      raise_on_status=False, respect_retry_after_header=False)
+    try:
+        return Retry(allowed_methods=frozenset(["GET", "HEAD"]), **parametros)
+    except TypeError:  # urllib3 < 1.26
+        return Retry(method_whitelist=frozenset(["GET", "HEAD"]), **parametros)
+
+
+def _criar_adaptador_http(**parametros):
+    """ HTTPAdapter cujas conexões ficam registradas em _conexoes_http e recusam abrir após um cancelamento. """
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class _Rastreada:
+        def connect(self):
+            verificar_cancelamento()  # Fora das exceções de rede: o urllib3 não tenta de novo
+            super().connect()
+            with _conexoes_http_lock:
+                _conexoes_http.add(self)
+
+    class _ConexaoHTTP(_Rastreada, HTTPConnection):
+        pass
+
+    class _ConexaoHTTPS(_Rastreada, HTTPSConnection):
+        pass
+
+    class _PoolHTTP(HTTPConnectionPool):
+        ConnectionCls = _ConexaoHTTP
+
+    class _PoolHTTPS(HTTPSConnectionPool):
+        ConnectionCls = _ConexaoHTTPS
+
+    class AdaptadorCancelavel(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {"http": _PoolHTTP, "https": _PoolHTTPS}
+
+    return AdaptadorCancelavel(**parametros)
+
+
+def _derrubar_conexoes_http():
+    """ shutdown() nos sockets abertos: quem estiver bloqueado em connect/recv/send acorda na hora com erro. """
+    with _conexoes_http_lock:
+        conexoes = list(_conexoes_http)
+    for conexao in conexoes:
+        sock = getattr(conexao, "sock", None)
+        if sock is None:
+            continue
+        try:
+            socket.socket.shutdown(sock, socket.SHUT_RDWR)  # Direto no descritor, sem passar pelo estado TLS
+        except (OSError, TypeError):
+            pass
+
+
+def obter_sessao_http():
+    """ Retorna a Session compartilhada, criada na primeira chamada, com pool keep-alive e retries em GET. """
+    global _sessao_http
+    with _sessao_http_lock:
+        if _sessao_http is None:
+            import requests
+            import urllib3
+
+            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+            sessao = requests.Session()
+            sessao.verify = False
+            adaptador = _criar_adaptador_http(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE,
+                                              max_retries=_criar_retry_get())
+            sessao.mount("https://", adaptador)
+            sessao.mount("http://", adaptador)
+            _sessao_http = sessao
+            if x9h_metricas.METRICAS_ATIVAS:
+                _medir_dns(API_BASE_URL)
+        return _sessao_http
+
+
+def _medir_dns(url):
+    """ Resolve o host da API só para registrar quanto a resolução de nomes custa nesta rede. """
+    partes = urllib.parse.urlsplit(url)
+    with x9h_metricas.span("http.dns", host=partes.hostname) as s:
+        try:
+            socket.getaddrinfo(partes.hostname, partes.port or (443 if partes.scheme == "https" else 80),
+                               proto=socket.IPPROTO_TCP)
+        except OSError as e:
+            s.definir(erro=str(e))
+
+
+def fechar_sessao_http():
+    global _sessao_http
+    with _sessao_http_lock:
+        if _sessao_http is not None:
+            _sessao_http.close()
+            _sessao_http = None
+
+
+class ServidorSobrecarregado(Exception):
+    """ O servidor pediu (429/503 + Retry-After) que o cliente espere antes de novas requisições. """
+
+    def __init__(self, bloqueado_ate):
+        self.bloqueado_ate = bloqueado_ate
+        super().__init__(f"Servidor pediu para aguardar {max(0, bloqueado_ate - time.time()):.0f}s (Retry-After).")
+
+
+class LimitadorTaxa:
+    """ Token bucket: permite rajadas curtas e mantém a média em `por_minuto` requisições. """
+
+    def __init__(self, por_minuto, rajada):
+        self.intervalo = 60.0 / por_minuto
+        self.rajada = rajada
+        self.tokens = float(rajada)
+        self.atualizado_em = time.monotonic()
+        self.lock = threading.Lock()
+
+    def adquirir(self):
+        while True:
+            with self.lock:
+                agora = time.monotonic()
+                self.tokens = min(self.rajada, self.tokens + (agora - self.atualizado_em) / self.intervalo)
+                self.atualizado_em = agora
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                espera = (1 - self.tokens) * self.intervalo
+            if _cancelamento.wait(espera):
+                raise OperacaoCancelada()
+
+
+_limitador_http = LimitadorTaxa(HTTP_LIMITE_POR_MINUTO, HTTP_LIMITE_RAJADA)
+_bloqueado_ate = 0.0
+_bloqueio_lock = threading.Lock()
+
+
+def interpretar_retry_after(valor):
+    """ Converte Retry-After (segundos ou data HTTP) em segundos de espera; None se inválido. """
+    if not valor:
+        return None
+    valor = valor.strip()
+    if valor.isdigit():
+        return float(valor)
+    try:
+        data = email.utils.parsedate_to_datetime(valor)
+        return max(0.0, data.timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def servidor_bloqueado_ate():
+    """ Fim do Retry-After mais recente, inclusive o recebido por uma execução anterior (ex.: logon passado). """
+    persistido = ler_estado_servidor().get("bloqueado_ate") or 0.0
+    with _bloqueio_lock:
+        return max(_bloqueado_ate, min(persistido, time.time() + HTTP_RETRY_AFTER_MAX))
+
+
+def _registrar_resposta_http(response):
+    global _bloqueado_ate
+    aceita_codificacoes = response.headers.get("Accept-Encoding")
+    if aceita_codificacoes is not None and PAYLOAD_GZIP_MODO == "auto":
+        # RFC 7694: o servidor anuncia quais codificações aceita no corpo das requisições
+        atualizar_estado_servidor(aceita_gzip="gzip" in aceita_codificacoes.lower())
+    if response.status_code not in (429, 503):
+        return
+    espera = interpretar_retry_after(response.headers.get("Retry-After"))
+    espera = min(HTTP_RETRY_AFTER_MAX, espera if espera is not None else HTTP_RETRY_AFTER_PADRAO)
+    with _bloqueio_lock:
+        _bloqueado_ate = max(_bloqueado_ate, time.time() + espera)
+        bloqueado_ate = _bloqueado_ate
+    atualizar_estado_servidor(bloqueado_ate=bloqueado_ate)  # O próximo modo sem interface também espera
+    print(f"DEBUG: Servidor respondeu {response.status_code}; novas requisições suspensas por {espera:.0f}s.")
+
+
+def _requisitar(metodo, url, timeout, limitar=True, **kwargs):
+    verificar_cancelamento()
+    bloqueado_ate = servidor_bloqueado_ate()
+    if bloqueado_ate > time.time():
+        raise ServidorSobrecarregado(bloqueado_ate)
+    if limitar:
+        inicio_espera = time.perf_counter()
+        _limitador_http.adquirir()
+        espera = time.perf_counter() - inicio_espera
+        if espera > 0.001:
+            x9h_metricas.registrar("http.espera_limite", espera)
+    with x9h_metricas.span(f"http.{metodo}", rota=urllib.parse.urlsplit(url).path) as s:
+        try:
+            response = obter_sessao_http().request(metodo, url, timeout=timeout, **kwargs)
+        except Exception as e:
+            if _cancelamento.is_set() and not isinstance(e, OperacaoCancelada):
+                raise OperacaoCancelada() from e  # Erro de rede provocado pelo shutdown() dos sockets
+            raise
+        s.definir(status=response.status_code)
+    _registrar_resposta_http(response)
+    return response
+
+
+def http_get(url, timeout=HTTP_TIMEOUT_GET, limitar=True, **kwargs):
+    """ GET pelo cliente compartilhado. `limitar=False` não consome o limite local de taxa (páginas seguintes
+    de um mesmo catálogo, que já pagou pela primeira). """
+    return _requisitar("GET", url, timeout, limitar, **kwargs)
+
+
+def http_post(url, timeout=HTTP_TIMEOUT_POST, **kwargs):
+    # POST não é idempotente: o adaptador só repete GET/HEAD
+    return _requisitar("POST", url, timeout, **kwargs)
+
+
+def atraso_jitter_maquina(janela_segundos=JITTER_LOGON_SEGUNDOS):
+    """ Atraso fixo por máquina em [0, janela), derivado do MAC e do hostname.
+
+    Determinístico: a mesma máquina sempre espera o mesmo tempo, e uma sala inteira que liga junto
+    se espalha pela janela em vez de chegar ao servidor no mesmo segundo.
+    """
+    if janela_segundos <= 0:
+        return 0.0
+    semente = f"{get_mac_address()}|{socket.gethostname()}".encode("utf-8")
+    fracao = int.from_bytes(hashlib.sha256(semente).digest()[:8], "big") / 2 ** 64
+    return fracao * janela_segundos
+
+
+# --- Estado Persistente do Servidor (capacidades aprendidas entre execuções) ---
+_estado_servidor = None
+_estado_servidor_lock = threading.Lock()
+
+
+def ler_estado_servidor():
+    """ O que execuções anteriores aprenderam sobre API_BASE_URL ({} se o arquivo é de outro servidor). """
+    global _estado_servidor
+    with _estado_servidor_lock:
+        if _estado_servidor is None:
+            try:
+                with open(ESTADO_SERVIDOR_FILE, "r", encoding="utf-8") as f:
+                    estado = json.load(f)
+            except (OSError, ValueError):
+                estado = {}
+            _estado_servidor = estado if isinstance(estado, dict) and estado.get("api") == API_BASE_URL else {}
+        return dict(_estado_servidor)
+
+
+def atualizar_estado_servidor(**campos):
+    """ Grava os campos no estado persistente; não toca no disco se nada mudou. """
+    global _estado_servidor
+    ler_estado_servidor()
+    with _estado_servidor_lock:
+        if all(_estado_servidor.get(chave) == valor for chave, valor in campos.items()):
+            return
+        _estado_servidor = {**_estado_servidor, **campos, "api": API_BASE_URL}
+        try:
+            _gravar_atomico(ESTADO_SERVIDOR_FILE, _estado_servidor)
+        except OSError as e:
+            print(f"DEBUG: Não foi possível gravar o estado do servidor: {e}")
+
+
+def montar_payload(dados, parcial=False):
+    """ Payload do POST com `data` como objeto JSON (codificado uma única vez, junto com o envelope). """
+    payload = {"object_name": "equipament", "data": dados}
+    if parcial:
+        payload["partial"] = True
+    return payload
+
+
+def montar_payload_lote(lista_dados):
+    return {"object_name": "equipament", "batch": list(lista_dados)}
+
+
+def codificar_payload(payload):
+    """ Serializa o payload em JSON compacto (sem espaços) e UTF-8. """
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _deve_comprimir(corpo):
+    if PAYLOAD_GZIP_MODO not in ("1", "auto") or len(corpo) < PAYLOAD_GZIP_MIN_BYTES:
+        return False
+    if PAYLOAD_GZIP_MODO == "1":
+        return True
+    estado = ler_estado_servidor()
+    recusado_em = estado.get("gzip_recusado_em") or 0
+    return estado.get("aceita_gzip") is True and time.time() - recusado_em > PAYLOAD_GZIP_RECUSA_VALIDADE
+
+
+def _postar_payload(payload):
+    """ Faz o POST de um payload já montado. Retorna True se o servidor aceitou (200/201). """
+    import requests
+    metricas = x9h_metricas.resumo_para_envio()
+    if metricas is not None:
+        payload = {**payload, "metrics": metricas}  # Fora de "data": não entra no hash de detecção de mudança
+    corpo = codificar_payload(payload)
+    try:
+        if DEBUG_ATIVO:
+            print(f"DEBUG: Payload para {API_POST_URL}: {json.dumps(payload, indent=2, ensure_ascii=False)}")
+        comprimir = _deve_comprimir(corpo)
+        response = _postar_corpo(corpo, comprimir)
+        if comprimir and response.status_code not in (200, 201, 429, 503):
+            # Qualquer falha com corpo comprimido (415, 400, até um 500 do PHP) ganha uma tentativa sem gzip
+            print(f"DEBUG: POST comprimido recebeu status {response.status_code}; reenviando sem compressão.")
+            comprimir = False
+            response = _postar_corpo(corpo, comprimir)
+            if response.status_code in (200, 201) and PAYLOAD_GZIP_MODO == "auto":
+                atualizar_estado_servidor(gzip_recusado_em=time.time())  # Vale também para as próximas execuções
+        if response.status_code in [200, 201]:
+            print("Dados enviados com sucesso!")
+            return True
+        else:
+            print(f"Erro no envio. Status: {response.status_code}. Resposta: {response.text[:500]}")
+            return False
+    except OperacaoCancelada:
+        print("DEBUG: Envio POST cancelado.")
+        return False
+    except requests.exceptions.RequestException as e:
+        print(f"Erro na requisição POST: {e}")
+        return False
+    except Exception as e:
+        print(f"Erro inesperado durante o envio POST: {e}")
+        return False
+
+
+def _postar_corpo(corpo, comprimir):
+    headers = {"Content-Type": "application/json; charset=utf-8"}
+    if comprimir:
+        corpo_enviado = gzip.compress(corpo, compresslevel=6)
+        headers["Content-Encoding"] = "gzip"
+    else:
+        corpo_enviado = corpo
+    print(f"Enviando {len(corpo_enviado)} bytes para {API_POST_URL}"
+          f"{f' (gzip de {len(corpo)} bytes)' if comprimir else ''}.")
+    return http_post(API_POST_URL, data=corpo_enviado, headers=headers)
+
+
+def enviar_dados_post(user_data_with_ids, hardware_info, drenar_em_background=True):
+    """ Envia os dados se mudaram desde o último envio aceito (ou se o batimento venceu).
+
+    Se o envio falhar, o snapshot completo fica na fila local para reenvio automático.
+    """
+    dados = {**user_data_with_ids, **hardware_info}
+    tipo_envio, conteudo = verificar_envio(dados)
+    if tipo_envio == "nenhum":
+        print("Nenhuma alteração desde o último envio aceito; POST dispensado.")
+        remover_do_spool(dados.get("patrimonio"))
+        return True
+
+    bloqueado_ate = servidor_bloqueado_ate()
+    if bloqueado_ate > time.time():
+        print(f"Servidor pediu para aguardar mais {bloqueado_ate - time.time():.0f}s (Retry-After); "
+              f"envio guardado na fila local.")
+        enfileirar_envio(dados)
+        return False
+
+    if tipo_envio == "parcial":
+        print(f"Enviando apenas os campos alterados: {', '.join(sorted(conteudo))}")
+        payload = montar_payload({"patrimonio": dados.get("patrimonio"), **conteudo}, parcial=True)
+    else:
+        payload = montar_payload(dados)
+    if _postar_payload(payload):
+        registrar_envio_aceito(dados)
+        remover_do_spool(dados.get("patrimonio"))  # Snapshot antigo do mesmo patrimônio ficou obsoleto
+        return True
+    enfileirar_envio(dados)
+    if drenar_em_background and not cancelamento_solicitado():
+        iniciar_drenagem_spool_em_background()
+    return False
+
+
+# --- Fila Local de Envios Pendentes (spool) ---
+_spool_lock = threading.Lock()
+_thread_drenagem = None
+
+
+def _caminho_spool(patrimonio):
+    chave = re.sub(r"[^A-Za-z0-9_.-]", "_", str(patrimonio or "sem_patrimonio"))
+    return os.path.join(SPOOL_DIR, f"{chave}.json")
+
+
+def _gravar_atomico(caminho, conteudo):
+    """ Grava em arquivo temporário no mesmo diretório, fsync e os.replace: ou fica o antigo, ou o novo inteiro. """
+    temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(conteudo, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, caminho)
+    if hasattr(os, "O_DIRECTORY"):  # Garante que a renomeação em si sobreviva a uma queda de energia
+        fd = os.open(os.path.dirname(caminho), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def enfileirar_envio(dados, imediato=False):
+    """ Guarda o snapshot na fila; um snapshot mais novo do mesmo patrimônio substitui o anterior.
+
+    `imediato=True` deixa a entrada vencida já na próxima drenagem (o relay, que drena em intervalos fixos).
+    """
+    proxima = time.time() + (0.0 if imediato else calcular_backoff(0))
+    entrada = {
+        "dados": dados,
+        "enfileirado_em": time.time(),
+        "tentativas": 0,
+        "proxima_tentativa": max(proxima, servidor_bloqueado_ate()),
+    }
+    try:
+        with _spool_lock:
+            os.makedirs(SPOOL_DIR, exist_ok=True)
+            _gravar_atomico(_caminho_spool(dados.get("patrimonio")), entrada)
+        print(f"Envio guardado na fila local ({SPOOL_DIR}) para nova tentativa.")
+        return True
+    except OSError as e:
+        print(f"Erro ao guardar envio na fila local: {e}")
+        return False
+
+
+def remover_do_spool(patrimonio):
+    with _spool_lock:
+        try:
+            os.remove(_caminho_spool(patrimonio))
+        except OSError:
+            pass
+
+
+def listar_spool():
+    """ Retorna [(caminho, entrada)] da fila, ignorando temporários e arquivos corrompidos. """
+    entradas = []
+    with _spool_lock:
+        for nome in _listar_diretorio(SPOOL_DIR):
+            if not nome.endswith(".json"):
+                continue
+            caminho = os.path.join(SPOOL_DIR, nome)
+            try:
+                with open(caminho, "r", encoding="utf-8") as f:
+                    entrada = json.load(f)
+                if isinstance(entrada, dict) and isinstance(entrada.get("dados"), dict):
+                    entradas.append((caminho, entrada))
+            except (OSError, ValueError) as e:
+                print(f"DEBUG: Entrada inválida na fila ({caminho}): {e}")
+    return entradas
+
+
+def calcular_backoff(tentativas):
+    """ Backoff exponencial com 'full jitter': aleatório entre 0 e min(máx, base * 2^tentativas). """
+    return random.uniform(0, min(SPOOL_BACKOFF_MAX, SPOOL_BACKOFF_BASE * (2 ** tentativas)))
+
+
+def _adiar_entradas(entradas):
+    with _spool_lock:
+        for caminho, entrada in entradas:
+            if not os.path.exists(caminho):
+                continue  # Já enviado/substituído por outro caminho
+            entrada["tentativas"] = entrada.get("tentativas", 0) + 1
+            entrada["proxima_tentativa"] = max(time.time() + calcular_backoff(entrada["tentativas"]),
+                                               servidor_bloqueado_ate())
+            try:
+                _gravar_atomico(caminho, entrada)
+            except OSError as e:
+                print(f"DEBUG: Erro ao atualizar entrada da fila ({caminho}): {e}")
+
+
+def _remover_entradas(entradas):
+    with _spool_lock:
+        for caminho, entrada in entradas:
+            try:
+                # Só remove se não foi substituída por um snapshot mais novo enquanto enviávamos
+                with open(caminho, "r", encoding="utf-8") as f:
+                    if json.load(f).get("enfileirado_em") != entrada.get("enfileirado_em"):
+                        continue
+                os.remove(caminho)
+            except (OSError, ValueError):
+                pass
+
+
+def _patrimonio_local():
+    """ Patrimônio cadastrado nesta máquina (user_data.json), ou None. """
+    try:
+        with open(USER_DATA_FILE, "r") as f:
+            dados_locais = json.load(f)
+    except (OSError, ValueError):
+        return None
+    patrimonio = str(dados_locais.get("patrimonio", "")).strip() if isinstance(dados_locais, dict) else ""
+    return patrimonio or None
+
+
+def drenar_spool(registrar_aceitos=True):
+    """ Tenta enviar as entradas vencidas da fila. Retorna (enviadas, restantes).
+
+    Só o snapshot do patrimônio desta máquina vira o "último envio aceito" da detecção de mudanças;
+    `registrar_aceitos=False` (relay, cuja fila tem snapshots de outras máquinas) não registra nenhum.
+    """
+    agora = time.time()
+    todas = listar_spool()
+    if todas and servidor_bloqueado_ate() > agora:
+        print("DEBUG: Fila não drenada: servidor ainda dentro do Retry-After.")
+        return 0, len(todas)
+    vencidas = [(c, e) for c, e in todas if e.get("proxima_tentativa", 0) <= agora]
+    enviadas = 0
+    if API_SUPORTA_LOTE:
+        lotes = [vencidas[i:i + SPOOL_LOTE_MAX] for i in range(0, len(vencidas), SPOOL_LOTE_MAX)]
+    else:
+        lotes = [[entrada] for entrada in vencidas]
+
+    for indice, lote in enumerate(lotes):
+        if len(lote) == 1:
+            payload = montar_payload(lote[0][1]["dados"])
+        else:
+            payload = montar_payload_lote(e["dados"] for _c, e in lote)
+        if _postar_payload(payload):
+            _remover_entradas(lote)
+            patrimonio_local = _patrimonio_local() if registrar_aceitos else None
+            for _caminho, entrada in lote:
+                if patrimonio_local is not None and str(entrada["dados"].get("patrimonio")) == patrimonio_local:
+                    registrar_envio_aceito(entrada["dados"])
+            enviadas += len(lote)
+        elif cancelamento_solicitado():
+            break  # Envio interrompido por cancelar_operacoes(): não conta como tentativa falha
+        else:
+            # Servidor indisponível: adia este lote e os seguintes sem insistir agora
+            _adiar_entradas([entrada for lote_restante in lotes[indice:] for entrada in lote_restante])
+            break
+    return enviadas, len(todas) - enviadas
+
+
+def drenar_spool_ate(limite_segundos=None, parar=None):
+    """ Drena a fila repetidamente, respeitando o backoff, até esvaziar, estourar o limite ou `parar` ser setado. """
+    fim = time.time() + limite_segundos if limite_segundos is not None else None
+    while True:
+        _enviadas, restantes = drenar_spool()
+        if restantes == 0:
+            return True
+        if cancelamento_solicitado():
+            return False
+        proxima = min((e.get("proxima_tentativa", 0) for _c, e in listar_spool()), default=time.time())
+        proxima = max(proxima, servidor_bloqueado_ate())
+        espera = max(1.0, proxima - time.time())
+        if fim is not None and time.time() + espera > fim:
+            return False
+        if parar is not None:
+            if parar.wait(espera):
+                return False
+        elif _cancelamento.wait(espera):
+            return False
+
+
+def iniciar_drenagem_spool_em_background():
+    """ Inicia (se ainda não estiver rodando) uma thread daemon que drena a fila com backoff. """
+    global _thread_drenagem
+    with _spool_lock:
+        if _thread_drenagem is not None and _thread_drenagem.is_alive():
+            return _thread_drenagem
+        _thread_drenagem = threading.Thread(target=drenar_spool_ate, name="x9h-spool", daemon=True)
+        _thread_drenagem.start()
+        return _thread_drenagem
+
+
+# --- Cache Local dos Catálogos (ETag/Last-Modified + revalidação condicional) ---
+_cache_catalogos = None
+_cache_catalogos_lock = threading.Lock()
+
+
+def _carregar_cache_catalogos():
+    """ Lê o arquivo de cache uma única vez por processo; deve ser chamada com o lock adquirido. """
+    global _cache_catalogos
+    if _cache_catalogos is None:
+        try:
+            with open(CACHE_CATALOGOS_FILE, "r", encoding="utf-8") as f:
+                _cache_catalogos = json.load(f)
+        except (OSError, ValueError):
+            _cache_catalogos = {}
+        _cache_catalogos.setdefault("urls", {})
+        _cache_catalogos.setdefault("estatisticas", {})
+    return _cache_catalogos
+
+
+def _salvar_cache_catalogos():
+    temporario = CACHE_CATALOGOS_FILE + ".tmp"
+    try:
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(_cache_catalogos, f)
+        os.replace(temporario, CACHE_CATALOGOS_FILE)
+    except OSError as e:
+        print(f"DEBUG: Não foi possível gravar o cache de catálogos: {e}")
+
+
+def _registrar_estatistica_cache(nome):
+    estatisticas = _carregar_cache_catalogos()["estatisticas"]
+    estatisticas[nome] = estatisticas.get(nome, 0) + 1
+
+
+def obter_estatisticas_cache_catalogos():
+    """ Contadores acumulados: hits/misses da cópia local, revalidacoes (GET condicional), nao_modificados (304),
+    atualizacoes (200), misses_rede (download sem cópia local) e erros_rede. """
+    with _cache_catalogos_lock:
+        return dict(_carregar_cache_catalogos()["estatisticas"])
+
+
+def ler_catalogo_em_cache(url):
+    """ Retorna {"results": [...]} guardado para `url`, sem acessar a rede, ou None se não houver cópia. """
+    with _cache_catalogos_lock:
+        entrada = _carregar_cache_catalogos()["urls"].get(url)
+        if entrada and "paginas" not in entrada:
+            entrada = None  # Formato antigo (corpo inteiro, sem páginas): tratado como ausente
+        # Os contadores vão para o disco junto com a próxima gravação, sem regravar o cache só por uma leitura
+        _registrar_estatistica_cache("hits" if entrada else "misses")
+        if not entrada:
+            return None
+        return {"results": [item for pagina in entrada["paginas"] for item in pagina["itens"]]}
+
+
+_RE_INICIO_RESULTADOS = re.compile(r'"results"\s*:\s*\[')
+_RE_SEPARADORES = re.compile(r"[\s,]*")
+_CARACTERES_NUMERO = frozenset("0123456789.eE+-")
+
+
+def iterar_resultados_json(blocos):
+    """ Gera, um a um, os itens do array "results" de um JSON recebido em blocos de texto.
+
+    Cada item é decodificado assim que chega por completo, sem montar o corpo inteiro nem a árvore
+    completa em memória. Assume que "results" é a primeira chave com esse nome no documento, como nas
+    respostas da intranet.
+    """
+    decodificador = json.JSONDecoder()
+    blocos = iter(blocos)
+    buffer, pos = "", 0
+
+    def ler_mais():
+        nonlocal buffer, pos
+        bloco = next(blocos, None)
+        if bloco is None:
+            return False
+        buffer, pos = buffer[pos:] + bloco, 0
+        return True
+
+    while True:
+        inicio = _RE_INICIO_RESULTADOS.search(buffer, pos)
+        if inicio:
+            pos = inicio.end()
+            break
+        pos = max(pos, len(buffer) - 64)  # Guarda o final, onde o marcador pode ter sido cortado
+        if not ler_mais():
+            return
+
+    while True:
+        pos = _RE_SEPARADORES.match(buffer, pos).end()
+        if pos >= len(buffer):
+            if not ler_mais():
+                raise ValueError("JSON truncado dentro de 'results'.")
+            continue
+        if buffer[pos] == "]":
+            return
+        try:
+            item, fim = decodificador.raw_decode(buffer, pos)
+        except ValueError:
+            if not ler_mais():
+                raise
+            continue
+        if isinstance(item, (int, float)) and not isinstance(item, bool) \
+                and (fim == len(buffer) or buffer[fim] in _CARACTERES_NUMERO) and ler_mais():
+            continue  # Número cortado no fim do bloco (inclusive em "." ou "e"): decodifica de novo com mais dados
+        yield item
+        pos = fim
+
+
+def _url_com_pagina(url, pagina, por_pagina):
+    """ URL da página; `por_pagina=None` omite per_page e deixa o servidor usar o tamanho padrão dele. """
+    partes = urllib.parse.urlsplit(url)
+    consulta = urllib.parse.parse_qsl(partes.query, keep_blank_values=True)
+    consulta = [(k, v) for k, v in consulta if k not in ("page", "per_page")]
+    consulta.append(("page", str(pagina)))
+    if por_pagina is not None:
+        consulta.append(("per_page", str(por_pagina)))
+    return urllib.parse.urlunsplit(partes._replace(query=urllib.parse.urlencode(consulta, safe=",")))
+
+
+def _buscar_pagina_catalogo(url, pagina, por_pagina, headers, limitar=True):
+    """ Busca uma página em streaming. Retorna (itens, response); itens é None em 304. """
+    response = http_get(_url_com_pagina(url, pagina, por_pagina), headers=headers, stream=True, limitar=limitar)
+    try:
+        if response.status_code == 304:
+            return None, response
+        if pagina > 1 and response.status_code == 400:
+            return [], response  # WordPress responde 400 para página além da última
+        response.raise_for_status()
+        decodificador = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+        blocos = (decodificador.decode(bloco) for bloco in response.iter_content(CATALOGO_BLOCO_BYTES))
+        return list(iterar_resultados_json(blocos)), response
+    finally:
+        response.close()
+
+
+def buscar_catalogo(url, ao_receber_pagina=None):
+    """ Busca um catálogo página a página, com GET condicional (If-None-Match/If-Modified-Since) por página.
+
+    Retorna {"results": [...]}. `ao_receber_pagina(itens)` é chamada a cada página recebida, para que a
+    interface mostre os primeiros itens antes do fim do download. Páginas não modificadas (304) vêm da
+    cópia local; se a intranet estiver inacessível, devolve a cópia local inteira; sem cópia, propaga o erro.
+    """
+    with x9h_metricas.span("catalogo", rota=urllib.parse.urlsplit(url).path) as s:
+        resultado = _buscar_catalogo_paginas(url, ao_receber_pagina)
+        s.definir(itens=len(resultado["results"]))
+    return resultado
+
+
+def _paginas_revalidaveis(entrada, por_pagina):
+    """ Páginas em cache cortadas com o mesmo per_page: só elas podem ir num GET condicional. """
+    if not entrada or "por_pagina" not in entrada or entrada["por_pagina"] != por_pagina:
+        return []  # Um 304 para outro tamanho de página devolveria a fatia errada
+    return entrada.get("paginas", [])
+
+
+def _cabecalhos_condicionais(anterior):
+    headers = {}
+    if anterior and anterior.get("etag"):
+        headers["If-None-Match"] = anterior["etag"]
+    if anterior and anterior.get("last_modified"):
+        headers["If-Modified-Since"] = anterior["last_modified"]
+    return headers
+
+
+def _buscar_catalogo_paginas(url, ao_receber_pagina):
+    import requests
+    with _cache_catalogos_lock:
+        entrada = _carregar_cache_catalogos()["urls"].get(url)
+    paginas_cache = entrada.get("paginas", []) if entrada else []
+    por_pagina = CATALOGO_POR_PAGINA
+    revalidaveis = _paginas_revalidaveis(entrada, por_pagina)
+    paginas = []
+
+    try:
+        for pagina in range(1, CATALOGO_MAX_PAGINAS + 1):
+            anterior = revalidaveis[pagina - 1] if pagina <= len(revalidaveis) else None
+            headers = _cabecalhos_condicionais(anterior)
+
+            # O catálogo inteiro conta como uma requisição no limite local: só a primeira página paga,
+            # as seguintes vêm em sequência e nunca formam rajada
+            try:
+                itens, response = _buscar_pagina_catalogo(url, pagina, por_pagina, headers, limitar=pagina == 1)
+            except requests.HTTPError as e:
+                if pagina != 1 or por_pagina is None or getattr(e.response, "status_code", None) != 400:
+                    raise
+                # Servidor com limite de per_page menor que o nosso: segue com o tamanho padrão dele
+                print(f"DEBUG: {url} recusou per_page={por_pagina}; repetindo sem per_page.")
+                por_pagina = None
+                revalidaveis = _paginas_revalidaveis(entrada, por_pagina)
+                anterior = revalidaveis[0] if revalidaveis else None
+                itens, response = _buscar_pagina_catalogo(url, pagina, por_pagina, _cabecalhos_condicionais(anterior),
+                                                          limitar=False)
+            if itens is None:
+                if anterior is None:
+                    raise ValueError(f"304 sem cópia local para a página {pagina} de {url}")
+                itens = anterior["itens"]
+                estatistica = "nao_modificados"
+            else:
+                estatistica = "atualizacoes"
+                if paginas and itens == paginas[-1]["itens"]:
+                    break  # Servidor ignorou o parâmetro page e repetiu a mesma lista
+            with _cache_catalogos_lock:
+                _registrar_estatistica_cache("revalidacoes" if anterior else "misses_rede")
+                _registrar_estatistica_cache(estatistica)
+            if not itens and pagina > 1:
+                break
+
+            paginas.append({
+                "etag": response.headers.get("ETag", anterior.get("etag") if anterior else None),
+                "last_modified": response.headers.get("Last-Modified",
+                                                      anterior.get("last_modified") if anterior else None),
+                "itens": itens,
+            })
+            if ao_receber_pagina is not None and itens:
+                ao_receber_pagina(itens)
+
+            total_paginas = response.headers.get("X-WP-TotalPages")
+            if total_paginas is None and response.status_code == 304:
+                total_paginas = len(revalidaveis)
+            if total_paginas is not None:
+                if pagina >= int(total_paginas):
+                    break
+            elif por_pagina is not None and len(itens) != por_pagina:
+                break  # Página incompleta (ou servidor sem paginação devolvendo tudo): era a última
+    except Exception as e:
+        with _cache_catalogos_lock:
+            _registrar_estatistica_cache("erros_rede")
+            _salvar_cache_catalogos()
+        if paginas_cache:
+            print(f"DEBUG: Intranet indisponível para {url} ({e}); usando cópia local do catálogo.")
+            return {"results": [item for p in paginas_cache for item in p["itens"]]}
+        raise
+
+    with _cache_catalogos_lock:
+        _carregar_cache_catalogos()["urls"][url] = {"paginas": paginas, "por_pagina": por_pagina,
+                                                    "salvo_em": time.time()}
+        _salvar_cache_catalogos()
+    return {"results": [item for p in paginas for item in p["itens"]]}
+
+
+# --- Catálogo de Equipamentos (baixado uma vez, consultado em memória) ---
+class CatalogoEquipamentos:
+    """ Índices em memória sobre a resposta da API de configuração de equipamentos. """
+
+    def __init__(self, resultados):
+        self.por_patrimonio = {}
+        self.por_hostname = {}
+        self.por_mac = {}
+        self.por_serial = {}
+
+        for item_config in resultados:
+            if not isinstance(item_config, dict):
+                continue
+            sub_data = item_config.get("data", {}) if isinstance(item_config.get("data"), dict) else item_config
+            pat_num = sub_data.get("asset", sub_data.get("patrimonio"))
+            pat_str = str(pat_num).strip() if pat_num is not None else None
+            if not pat_str or pat_str in self.por_patrimonio:
+                continue  # Como na busca linear antiga, vale o primeiro registro de cada patrimônio
+
+            entrada = {"patrimonio": pat_str}
+            relationships = item_config.get("relationships", {})
+            if isinstance(relationships, dict):
+                applicant_data = relationships.get("applicant")
+                if isinstance(applicant_data, dict):
+                    if applicant_data.get("display_name"):
+                        entrada["responsavel_label"] = applicant_data.get("display_name")
+                    responsavel_id = applicant_data.get("ID", applicant_data.get("id"))
+                    if responsavel_id is not None:
+                        entrada["responsavel_id"] = str(responsavel_id)
+                place_data_wrapper = relationships.get("place")
+                if isinstance(place_data_wrapper, dict) and place_data_wrapper.get("id"):
+                    entrada["sala_id"] = str(place_data_wrapper.get("id"))
+            self.por_patrimonio[pat_str] = entrada
+
+            # Identidade registrada pelos envios anteriores: nome do PC, MACs de todas as interfaces e serial
+            hostname = str(sub_data.get("nome_pc") or sub_data.get("hostname") or "").strip().lower()
+            self._indexar(self.por_hostname, hostname, pat_str)
+            macs = [sub_data.get("mac")]
+            if isinstance(sub_data.get("interfaces_rede"), list):
+                macs += [i.get("mac") for i in sub_data["interfaces_rede"] if isinstance(i, dict)]
+            for mac in macs:
+                self._indexar(self.por_mac, _normalizar_mac(str(mac or "")), pat_str)
+            self._indexar(self.por_serial, _normalizar_serial(sub_data.get("serial_placa") or sub_data.get("serial")),
+                          pat_str)
+
+    @staticmethod
+    def _indexar(indice, chave, patrimonio):
+        """ Chave repetida em patrimônios diferentes (imagem clonada, placa trocada) fica ambígua: None. """
+        if chave:
+            indice[chave] = patrimonio if indice.get(chave, patrimonio) == patrimonio else None
+
+    def __len__(self):
+        return len(self.por_patrimonio)
+
+    def patrimonios_para_combobox(self):
+        return [{"label": pat, "id": pat} for pat in sorted(self.por_patrimonio)]
+
+    def configuracao(self, patrimonio_id):
+        """ Retorna {"responsavel_label", "responsavel_id", "sala_id"} (os que existirem) do patrimônio. """
+        entrada = self.por_patrimonio.get(str(patrimonio_id).strip())
+        if entrada is None:
+            return {}
+        return {chave: valor for chave, valor in entrada.items() if chave != "patrimonio"}
+
+    def patrimonio_por_hostname(self, hostname):
+        return self.por_hostname.get(str(hostname).strip().lower())
+
+    def patrimonio_por_mac(self, mac):
+        return self.por_mac.get(_normalizar_mac(str(mac).strip()))
+
+    def patrimonio_por_serial(self, serial):
+        return self.por_serial.get(_normalizar_serial(serial))
+
+    def localizar(self, seriais=(), macs=(), hostnames=()):
+        """ (patrimonio, critério) do primeiro identificador que casar sem ambiguidade, do mais específico
+        (serial da placa) ao menos (nome do PC); (None, None) se nenhum casar. """
+        for criterio, busca, chaves in (("serial", self.patrimonio_por_serial, seriais),
+                                         ("mac", self.patrimonio_por_mac, macs),
+                                         ("hostname", self.patrimonio_por_hostname, hostnames)):
+            for chave in chaves:
+                patrimonio = busca(chave) if chave else None
+                if patrimonio:
+                    return patrimonio, criterio
+        return None, None
+
+
+_catalogo_equipamentos = None
+_catalogo_equipamentos_lock = threading.Lock()
+_busca_equipamentos_lock = threading.Lock()  # Um download do catálogo por vez; quem chega no meio espera por ele
+
+
+def obter_catalogo_equipamentos(forcar_atualizacao=False, somente_cache=False, ao_receber_pagina=None):
+    """ Obtém o catálogo de equipamentos na primeira chamada e o reutiliza depois. Retorna None em caso de erro.
+
+    Com `forcar_atualizacao`, revalida na intranet; com `somente_cache`, monta a partir da cópia local.
+    `ao_receber_pagina` recebe os itens brutos de cada página conforme chegam. Uma consulta que chega
+    enquanto o catálogo é baixado (ex.: patrimônio escolhido com as páginas ainda chegando) espera esse
+    download e usa o resultado dele, em vez de iniciar outro.
+    """
+    global _catalogo_equipamentos
+    with _catalogo_equipamentos_lock:
+        if _catalogo_equipamentos is not None and not forcar_atualizacao:
+            return _catalogo_equipamentos
+    if somente_cache:
+        catalogo = _montar_catalogo_equipamentos(ler_catalogo_em_cache, API_GET_CONFIG_PATRIMONIO_URL)
+        # A cópia local só vira o catálogo do processo se não houver download em andamento nem já concluído;
+        # senão uma leitura de disco mais lenta sobrescreveria a versão recém-baixada
+        if catalogo is not None and _busca_equipamentos_lock.acquire(blocking=False):
+            try:
+                with _catalogo_equipamentos_lock:
+                    if _catalogo_equipamentos is None:
+                        _catalogo_equipamentos = catalogo
+            finally:
+                _busca_equipamentos_lock.release()
+        return catalogo
+    # A busca acontece fora de _catalogo_equipamentos_lock para não travar consultas ao catálogo atual
+    with _busca_equipamentos_lock:
+        with _catalogo_equipamentos_lock:
+            if _catalogo_equipamentos is not None and not forcar_atualizacao:
+                return _catalogo_equipamentos  # Carregado pelo download que estava em andamento
+        print(f"Buscando catálogo de equipamentos de: {API_GET_CONFIG_PATRIMONIO_URL}")
+        catalogo = _montar_catalogo_equipamentos(buscar_catalogo, API_GET_CONFIG_PATRIMONIO_URL, ao_receber_pagina)
+        if catalogo is None:
+            return None
+        with _catalogo_equipamentos_lock:
+            _catalogo_equipamentos = catalogo
+    return catalogo
+
+
+def _montar_catalogo_equipamentos(obter_dados, *args):
+    try:
+        data = obter_dados(*args)
+        if data is None:
+            return None
+        catalogo = CatalogoEquipamentos(data.get("results", []))
+        print(f"Catálogo de equipamentos carregado: {len(catalogo)} patrimônios.")
+        return catalogo
+    except Exception as e:
+        print(f"Erro ao obter catálogo de equipamentos: {e}")
+        return None
+
+
+def obter_patrimonios_para_combobox(forcar_atualizacao=False, somente_cache=False, ao_receber_pagina=None):
+    """Obtém lista de patrimônios do catálogo de equipamentos (None se `somente_cache` e não houver cópia).
+
+    `ao_receber_pagina` recebe a lista parcial {"label", "id"} de cada página conforme chega.
+    """
+    ao_receber_itens = None
+    if ao_receber_pagina is not None:
+        def ao_receber_itens(itens):
+            ao_receber_pagina(CatalogoEquipamentos(itens).patrimonios_para_combobox())
+    catalogo = obter_catalogo_equipamentos(forcar_atualizacao, somente_cache, ao_receber_itens)
+    if catalogo is None:
+        return None if somente_cache else []
+    patrimonios_list = catalogo.patrimonios_para_combobox()
+    print(f"Patrimônios (de config API para ComboBox) encontrados: {len(patrimonios_list)}")
+    return patrimonios_list
+
+
+def _montar_lista_salas(dados):
+    salas_results = dados.get("results", [])
+    lista_salas = []
+    for sala_item in salas_results:
+        if isinstance(sala_item, dict):
+            sala_data = sala_item.get("data", {})
+            numero = sala_data.get("number", "").strip()
+            descricao = sala_data.get("desc", "").strip()
+            nome_sala_parts = [p for p in [numero, descricao] if p]
+            nome_sala = " - ".join(nome_sala_parts)
+            sala_id = sala_item.get("id")
+            if nome_sala and sala_id is not None:
+                lista_salas.append({"label": nome_sala, "id": str(sala_id)})
+    lista_salas.sort(key=lambda x: x["label"])
+    return lista_salas
+
+
+def obter_salas(somente_cache=False, ao_receber_pagina=None):
+    try:
+        if somente_cache:
+            dados = ler_catalogo_em_cache(API_GET_PLACES_URL)
+            return _montar_lista_salas(dados) if dados is not None else None
+        ao_receber_itens = None
+        if ao_receber_pagina is not None:
+            def ao_receber_itens(itens):
+                ao_receber_pagina(_montar_lista_salas({"results": itens}))
+        return _montar_lista_salas(buscar_catalogo(API_GET_PLACES_URL, ao_receber_itens))
+    except Exception as e:
+        print(f"Erro obter salas: {e}")
+        return None if somente_cache else []
+
+
+def _montar_lista_usuarios(data):
+    usuarios = []
+    results = data.get("results", [])
+    for user_item in results:
+        if isinstance(user_item, dict):
+            nome_exibicao = user_item.get("display_name", "").strip()
+            identificador = user_item.get("ID")
+            if nome_exibicao and identificador is not None:
+                usuarios.append({"label": nome_exibicao, "id": str(identificador)})
+    usuarios.sort(key=lambda x: x["label"])
+    return usuarios
+
+
+def obter_usuarios(somente_cache=False, ao_receber_pagina=None):
+    try:
+        if somente_cache:
+            data = ler_catalogo_em_cache(API_GET_USERS_URL)
+            return _montar_lista_usuarios(data) if data is not None else None
+        ao_receber_itens = None
+        if ao_receber_pagina is not None:
+            def ao_receber_itens(itens):
+                ao_receber_pagina(_montar_lista_usuarios({"results": itens}))
+        return _montar_lista_usuarios(buscar_catalogo(API_GET_USERS_URL, ao_receber_itens))
+    except Exception as e:
+        print(f"Erro obter usuários: {e}")
+        return None if somente_cache else []
+
+
+def coletar_identidade_local():
+    """ Identificadores desta máquina para casar com o catálogo: seriais, MACs (principal primeiro) e nomes. """
+    serial = get_serial_placa()
+    interfaces = sorted(descobrir_interfaces_rede(), key=lambda i: not i["principal"])
+    nome = socket.gethostname().strip().lower()
+    return {
+        "seriais": [serial] if serial else [],
+        "macs": [i["mac"] for i in interfaces if i["mac"]],
+        "hostnames": list(dict.fromkeys([nome, nome.split(".", 1)[0]])),
+    }
+
+
+def localizar_patrimonio_local(identidade):
+    """ Patrimônio desta máquina no catálogo já carregado (memória ou cópia local; nenhuma requisição).
+
+    Retorna {"patrimonio", "criterio", "responsavel_label", "responsavel_id", "sala_id"} ou None.
+    """
+    catalogo = obter_catalogo_equipamentos(somente_cache=True)
+    if catalogo is None or not identidade:
+        return None
+    patrimonio, criterio = catalogo.localizar(**identidade)
+    if patrimonio is None:
+        return None
+    print(f"DEBUG: Patrimônio {patrimonio} identificado no catálogo pelo critério '{criterio}'.")
+    return {"patrimonio": patrimonio, "criterio": criterio, **catalogo.configuracao(patrimonio)}
+
+
+def carregar_configuracoes_por_patrimonio(patrimonio_id):
+    """Busca a configuração de UM patrimônio no catálogo em memória (sem nova requisição se já carregado)."""
+    if not patrimonio_id:
+        return {}
+    catalogo = obter_catalogo_equipamentos()
+    if catalogo is None:
+        print(f"Erro CRÍTICO ao carregar config. do patrimônio '{patrimonio_id}': catálogo indisponível.")
+        return {}
+
+    return_data = catalogo.configuracao(patrimonio_id)
+    if return_data:
+        print(f"DEBUG: Configuração para patrimônio {patrimonio_id}: Responsável Label='"
+              f"{return_data.get('responsavel_label')}', Sala ID='{return_data.get('sala_id')}'")
+    else:
+        print(f"Nenhuma config específica encontrada para {patrimonio_id} entre {len(catalogo)} patrimônios.")
+    return return_data
+
+
+# --- Modo Sem Interface (Agente para Execução Agendada) ---
+# Códigos de saída para o agendador de tarefas
+EXIT_OK = 0
+EXIT_FALHA_ENVIO = 1
+EXIT_SEM_CADASTRO = 2
+EXIT_ERRO_INESPERADO = 3
+
+
+def ler_dados_usuario():
+    """ Lê o user_data.json salvo pela interface; retorna None se ausente, ilegível ou incompleto. """
+    try:
+        with open(USER_DATA_FILE, "r") as f:
+            dados_locais = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"DEBUG: Não foi possível ler {USER_DATA_FILE}: {e}")
+        return None
+    if not isinstance(dados_locais, dict):
+        return None
+    dados = {campo: str(dados_locais.get(campo, "")).strip() for campo in ("patrimonio", "responsavel", "sala")}
+    if not all(dados.values()):
+        print(f"DEBUG: {USER_DATA_FILE} incompleto: {dados}")
+        return None
+    return dados
+
+
+def executar_coleta_sem_interface(usar_jitter=True):
+    """ Coleta o hardware e envia usando o cadastro já salvo, sem Qt. Retorna um código de saída EXIT_*. """
+    dados_usuario = ler_dados_usuario()
+    if dados_usuario is None:
+        print("Máquina sem cadastro local válido; execute o X9H com interface para registrá-la.")
+        return EXIT_SEM_CADASTRO
+    try:
+        if usar_jitter:
+            atraso = atraso_jitter_maquina()
+            print(f"Aguardando {atraso:.0f}s (jitter desta máquina) antes de acessar o servidor...")
+            time.sleep(atraso)
+        if listar_spool():
+            print("Reenviando envios pendentes da fila local...")
+            with x9h_metricas.span("headless.fila"):
+                drenar_spool()
+        print("Coletando informações de hardware...")
+        hardware_info = get_hardware_info()
+        # O processo termina em seguida: o snapshot que falhar fica na fila para o próximo logon
+        with x9h_metricas.span("headless.envio") as s:
+            enviado = enviar_dados_post(dados_usuario, hardware_info, drenar_em_background=False)
+            s.definir(sucesso=enviado)
+        return EXIT_OK if enviado else EXIT_FALHA_ENVIO
+    except Exception as e:
+        print(f"Erro inesperado no modo sem interface: {e}")
+        return EXIT_ERRO_INESPERADO
+    finally:
+        fechar_sessao_http()
@@ -0,0 +1,788 @@
+""" Interface gráfica (PyQt5) do X9H. Importada apenas quando a janela vai de fato ser exibida. """
+import os
+import json
+import time
+import unicodedata
+from PyQt5 import QtWidgets, QtCore, QtGui  # Adicionado QtGui para QPixmap no futuro, se necessário
+
+from x9h_coleta import (
+    USER_DATA_FILE,
+    get_hardware_info,
+    enviar_dados_post,
+    obter_patrimonios_para_combobox,
+    obter_usuarios,
+    obter_salas,
+    carregar_configuracoes_por_patrimonio,
+    coletar_identidade_local,
+    localizar_patrimonio_local,
+    listar_spool,
+    iniciar_drenagem_spool_em_background,
+    OperacaoCancelada,
+    cancelar_operacoes,
+    reiniciar_cancelamento,
+)
+import x9h_metricas
+
+
+# --- ComboBox com Busca (type-ahead insensível a acentos e maiúsculas) ---
+LIMITE_SUGESTOES = 300  # Linhas exibidas no popup de busca; o restante aparece refinando a consulta
+
+
+def normalizar_texto(texto):
+    """ Remove acentos e caixa: 'José Antônio' -> 'jose antonio'. """
+    decomposto = unicodedata.normalize("NFKD", texto or "")
+    # Um str.replace por marca combinante presente é bem mais rápido que filtrar caractere a caractere
+    for caractere in set(decomposto):
+        if unicodedata.combining(caractere):
+            decomposto = decomposto.replace(caractere, "")
+    return decomposto.casefold()
+
+
+def normalizar_textos(textos):
+    """ normalizar_texto em lote: normaliza tudo numa única string, bem mais rápido para listas grandes. """
+    textos = [t.replace("\n", " ") for t in textos]
+    if not textos:
+        return []
+    return normalizar_texto("\n".join(textos)).split("\n")
+
+
+class ModeloListaItens(QtCore.QAbstractListModel):
+    """ Itens (rótulo, id) de um combo, carregados com um único reset em vez de N chamadas a addItem.
+
+    Mantém dicionários id -> linha e rótulo -> linha para seleção em O(1), no lugar de findData/findText.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rotulos = []
+        self._ids = []
+        self._linha_por_id = {}
+        self._linha_por_rotulo = {}
+
+    def definir_itens(self, placeholder, itens):
+        self.beginResetModel()
+        self._rotulos = [placeholder] + [item["label"] for item in itens]
+        self._ids = [None] + [item["id"] for item in itens]
+        # Percorre de trás para frente para que, em duplicatas, valha a primeira ocorrência (como findData)
+        linhas = range(len(self._rotulos) - 1, 0, -1)
+        self._linha_por_id = dict(zip(reversed(self._ids[1:]), linhas))
+        rotulos_invertidos = "\n".join(r.replace("\n", " ") for r in reversed(self._rotulos[1:]))
+        self._linha_por_rotulo = dict(zip(rotulos_invertidos.casefold().split("\n"), linhas))
+        self.endResetModel()
+
+    def adicionar_itens(self, itens):
+        """ Acrescenta itens ao fim da lista (página recém-chegada) sem resetar o modelo. """
+        if not itens:
+            return
+        inicio = len(self._rotulos)
+        self.beginInsertRows(QtCore.QModelIndex(), inicio, inicio + len(itens) - 1)
+        for linha, item in enumerate(itens, inicio):
+            self._rotulos.append(item["label"])
+            self._ids.append(item["id"])
+            self._linha_por_id.setdefault(item["id"], linha)
+            self._linha_por_rotulo.setdefault(item["label"].replace("\n", " ").casefold(), linha)
+        self.endInsertRows()
+
+    def rotulos(self):
+        return self._rotulos
+
+    def linha_por_id(self, item_id):
+        return self._linha_por_id.get(item_id, -1)
+
+    def linha_por_rotulo(self, rotulo):
+        """ Equivale a findText(rotulo, Qt.MatchFixedString): comparação exata, sem diferenciar caixa. """
+        return self._linha_por_rotulo.get(rotulo.casefold(), -1)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._rotulos)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rotulos):
+            return None
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            return self._rotulos[index.row()]
+        if role == QtCore.Qt.UserRole:
+            return self._ids[index.row()]
+        return None
+
+
+class ModeloFiltroBusca(QtCore.QAbstractListModel):
+    """ Lista filtrada por substring sobre rótulos pré-normalizados, usada pelo popup de sugestões.
+
+    O filtro roda em Python puro sobre o índice normalizado e o modelo expõe só as linhas que casaram,
+    em vez de um QSortFilterProxyModel chamando filterAcceptsRow para cada uma das N linhas a cada tecla.
+    Se a nova consulta contém a anterior, filtra apenas os resultados anteriores. O popup exibe no
+    máximo LIMITE_SUGESTOES linhas, o que mantém constante o custo do QCompleter a cada reset.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rotulos = []
+        self._normalizados = []
+        self._linhas = []  # Linhas da lista completa que casam com a consulta atual
+        self._consulta = ""
+
+    def definir_rotulos(self, rotulos):
+        self.beginResetModel()
+        self._rotulos = list(rotulos)
+        self._normalizados = normalizar_textos(self._rotulos)
+        self._linhas = list(range(len(self._rotulos)))
+        self._consulta = ""
+        self.endResetModel()
+
+    def adicionar_rotulos(self, rotulos):
+        """ Indexa rótulos acrescentados ao fim da lista completa, mantendo a consulta atual. """
+        if not rotulos:
+            return
+        inicio = len(self._rotulos)
+        novos = normalizar_textos(rotulos)
+        self.beginResetModel()
+        self._rotulos.extend(rotulos)
+        self._normalizados.extend(novos)
+        self._linhas.extend(linha for linha, normalizado in enumerate(novos, inicio)
+                            if self._consulta in normalizado)
+        self.endResetModel()
+
+    def filtrar(self, texto):
+        consulta = normalizar_texto(texto).strip()
+        if consulta == self._consulta:
+            return
+        if self._consulta and self._consulta in consulta:
+            candidatas = self._linhas
+        else:
+            candidatas = range(len(self._normalizados))
+        normalizados = self._normalizados
+        self.beginResetModel()
+        self._linhas = [i for i in candidatas if consulta in normalizados[i]] if consulta else list(candidatas)
+        self._consulta = consulta
+        self.endResetModel()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        # O popup (e o QCompleter, que consulta cada linha exposta) só vê as primeiras LIMITE_SUGESTOES
+        return 0 if parent.isValid() else min(len(self._linhas), LIMITE_SUGESTOES)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._linhas):
+            return None
+        linha_original = self._linhas[index.row()]
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            return self._rotulos[linha_original]
+        if role == QtCore.Qt.UserRole:
+            return linha_original
+        return None
+
+
+class ComboBoxPesquisavel(QtWidgets.QComboBox):
+    """ QComboBox editável: digitar filtra as opções por trecho do nome, ignorando acentos e maiúsculas. """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setEditable(True)
+        self.setInsertPolicy(QtWidgets.QComboBox.NoInsert)
+        self.modelo_itens = ModeloListaItens(self)
+        self.setModel(self.modelo_itens)
+
+        self.modelo_filtro = ModeloFiltroBusca(self)
+        completer = QtWidgets.QCompleter(self.modelo_filtro, self)
+        completer.setCompletionMode(QtWidgets.QCompleter.UnfilteredPopupCompletion)
+        completer.setCaseSensitivity(QtCore.Qt.CaseInsensitive)
+        completer.popup().setUniformItemSizes(True)
+        self.setCompleter(completer)
+
+        completer.activated[QtCore.QModelIndex].connect(self._on_sugestao_escolhida)
+        self.lineEdit().textEdited.connect(self._on_texto_editado)
+        self.lineEdit().editingFinished.connect(self._restaurar_texto_selecionado)
+
+    def definir_itens(self, placeholder, itens):
+        """ Substitui as opções por [placeholder] + itens, preservando a seleção atual quando possível. """
+        selecionado = self.currentData()
+        self.blockSignals(True)  # Evita disparar currentIndexChanged durante o preenchimento
+        self.modelo_itens.definir_itens(placeholder, itens)
+        indice = self.modelo_itens.linha_por_id(selecionado) if selecionado is not None else -1
+        self.setCurrentIndex(indice if indice != -1 else 0)
+        self.blockSignals(False)
+        self.modelo_filtro.definir_rotulos(self.modelo_itens.rotulos())
+        self.setEnabled(True)
+
+    def adicionar_itens(self, itens):
+        """ Acrescenta opções ao fim da lista sem mexer na seleção atual. """
+        self.modelo_itens.adicionar_itens(itens)
+        self.modelo_filtro.adicionar_rotulos([item["label"] for item in itens])
+
+    def indice_por_id(self, item_id):
+        return self.modelo_itens.linha_por_id(item_id)
+
+    def indice_por_rotulo(self, rotulo):
+        return self.modelo_itens.linha_por_rotulo(rotulo)
+
+    def _on_texto_editado(self, texto):
+        self.modelo_filtro.filtrar(texto)
+        self.completer().complete()
+
+    def _on_sugestao_escolhida(self, indice_sugestao):
+        linha = indice_sugestao.data(QtCore.Qt.UserRole)
+        if linha is not None:
+            self.setCurrentIndex(linha)
+        self._restaurar_texto_selecionado()
+
+    def _restaurar_texto_selecionado(self):
+        # Texto digitado que não virou seleção é descartado; o campo volta a mostrar o item escolhido
+        if self.currentIndex() >= 0 and self.currentText() != self.itemText(self.currentIndex()):
+            self.setEditText(self.itemText(self.currentIndex()))
+        self.modelo_filtro.filtrar("")
+
+
+# --- Classe Trabalhadora para Envio em Background ---
+class SubmissionWorker(QtCore.QObject):
+    submission_success = QtCore.pyqtSignal(str)
+    submission_failure = QtCore.pyqtSignal(str)
+    finished = QtCore.pyqtSignal()
+
+    def __init__(self, user_data_to_save_dict, parent=None):
+        super().__init__(parent)
+        self.user_data_to_save = user_data_to_save_dict
+        self._is_running = True
+
+    @QtCore.pyqtSlot()
+    def run_submission(self):
+        if not self._is_running:
+            self.finished.emit()
+            return
+        reiniciar_cancelamento()
+        try:
+            print("WORKER THREAD: Coletando informações de hardware...")
+            hardware_info = get_hardware_info()
+            if not self._is_running: self.finished.emit(); return
+            print("WORKER THREAD: Informações de hardware coletadas. Enviando dados...")
+            if enviar_dados_post(self.user_data_to_save, hardware_info):
+                if self._is_running: self.submission_success.emit(
+                    "Dados salvos localmente e sincronizados com o servidor!")
+            else:
+                if self._is_running: self.submission_failure.emit(
+                    "Os dados foram salvos localmente, mas houve um erro ao enviá-los para o servidor.\n"
+                    "O envio ficou na fila e será repetido automaticamente.\n"
+                    "Verifique sua conexão e os logs no console para detalhes."
+                )
+        except OperacaoCancelada:
+            print("WORKER THREAD: Coleta/envio cancelado.")
+        except Exception as e:
+            print(f"WORKER THREAD: Exceção na thread de submissão: {e}")
+            if self._is_running: self.submission_failure.emit(f"Ocorreu um erro inesperado durante o envio: {e}")
+        finally:
+            self.finished.emit()
+
+    def stop(self):  # Chamado se a janela principal tentar fechar durante o envio
+        self._is_running = False
+        cancelar_operacoes()  # Mata os comandos das sondas e derruba o POST em andamento
+
+
+# --- Classe Trabalhadora para Carregar Catálogos em Background ---
+class CatalogoWorker(QtCore.QObject):
+    pagina_recebida = QtCore.pyqtSignal(str, object)
+    catalogo_carregado = QtCore.pyqtSignal(str, object)
+    finished = QtCore.pyqtSignal()
+
+    def __init__(self, nome_catalogo, funcao_busca, parent=None):
+        super().__init__(parent)
+        self.nome_catalogo = nome_catalogo
+        self.funcao_busca = funcao_busca
+
+    @QtCore.pyqtSlot()
+    def run(self):
+        itens = []
+        try:
+            itens = self.funcao_busca(self._on_pagina)
+        except Exception as e:
+            print(f"WORKER THREAD: Exceção ao carregar catálogo '{self.nome_catalogo}': {e}")
+        finally:
+            self.catalogo_carregado.emit(self.nome_catalogo, itens)
+            self.finished.emit()
+
+    def _on_pagina(self, itens):
+        self.pagina_recebida.emit(self.nome_catalogo, itens)
+
+
+# --- Classe Trabalhadora para Buscar a Configuração do Patrimônio Selecionado ---
+CONFIG_DEBOUNCE_MS = 250  # Espera após a última troca de seleção antes de buscar (rolagem pelo teclado)
+
+
+class ConfigPatrimonioWorker(QtCore.QObject):
+    """ Busca a configuração de um patrimônio fora da thread da interface; pedidos já superados são pulados. """
+    configuracao_pronta = QtCore.pyqtSignal(int, str, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.geracao_atual = 0  # Atualizado pela interface a cada nova seleção
+
+    @QtCore.pyqtSlot(int, str)
+    def buscar(self, geracao, patrimonio_id):
+        if geracao != self.geracao_atual:
+            return  # Outra seleção chegou enquanto este pedido esperava na fila
+        config = {}
+        try:
+            config = carregar_configuracoes_por_patrimonio(patrimonio_id)
+        except Exception as e:
+            print(f"WORKER THREAD: Exceção ao buscar config. do patrimônio '{patrimonio_id}': {e}")
+        self.configuracao_pronta.emit(geracao, patrimonio_id, config)
+
+
+# --- Classe Trabalhadora para Ler a Identidade da Máquina em Background ---
+class IdentificacaoWorker(QtCore.QObject):
+    """ Lê serial da placa, MACs e nome do PC (no Windows o serial exige um wmic) fora da thread da interface. """
+    identidade_pronta = QtCore.pyqtSignal(object)
+    finished = QtCore.pyqtSignal()
+
+    @QtCore.pyqtSlot()
+    def run(self):
+        identidade = None
+        try:
+            identidade = coletar_identidade_local()
+        except Exception as e:
+            print(f"WORKER THREAD: Exceção ao ler a identidade da máquina: {e}")
+        finally:
+            self.identidade_pronta.emit(identidade)
+            self.finished.emit()
+
+
+# --- Interface Gráfica ---
+class FormDialog(QtWidgets.QMainWindow):
+    solicitar_config = QtCore.pyqtSignal(int, str)
+
+    def __init__(self):
+        self._inicio_ui = time.perf_counter()
+        super().__init__()
+        self.submission_thread = None  # Para manter referência à thread
+        self.submission_worker = None  # Para manter referência ao worker
+
+        self.setWindowTitle("Registro de Equipamento - STI FAFARM")
+        self.setFixedSize(480, 400)
+        self.setStyleSheet("""
+            QWidget { font-size: 10pt; } 
+            QLabel { margin-bottom: 2px; }
+            QComboBox { padding: 4px; margin-bottom: 8px; border: 1px solid #ccc; border-radius: 3px;}
+            QPushButton { 
+                background-color: #3498db; color: white; 
+                padding: 10px 15px; border-radius: 5px; margin-top: 10px;
+                font-weight: bold;
+            }
+            QPushButton:hover { background-color: #2980b9; }
+            QFormLayout QLabel { font-weight: normal; }
+        """)
+
+        central_widget = QtWidgets.QWidget()
+        self.setCentralWidget(central_widget)
+
+        main_layout = QtWidgets.QVBoxLayout(central_widget)
+        form_layout = QtWidgets.QFormLayout()
+        form_layout.setSpacing(10)
+        form_layout.setContentsMargins(15, 15, 15, 15)
+
+        # Os combos começam com um marcador de carregamento; os catálogos chegam em segundo plano
+        self.lista_patrimonios, self.usuarios, self.salas = [], [], []
+        self.catalogo_threads = []
+        self.catalogo_workers = []
+        self._catalogos_pendentes = set()
+        self._catalogos_parciais = set()  # Pendentes que já receberam a primeira página
+        self._identidade_local = None
+        self._preselecao_pendente = True  # Até haver cadastro salvo ou escolha do usuário
+        self._aviso_preselecao = None  # (patrimônio, mensagem) exibida quando a config. dele chegar
+        self._dados_locais = {}
+        self.iniciar_worker_config()
+
+        # Patrimônio
+        self.combo_patrimonio = ComboBoxPesquisavel(self)
+        self.combo_patrimonio.currentIndexChanged.connect(self.on_patrimonio_selection_changed)
+        form_layout.addRow(QtWidgets.QLabel("<b>Patrimônio:</b>"), self.combo_patrimonio)
+
+        # Responsável
+        self.combo_responsavel = ComboBoxPesquisavel(self)
+        form_layout.addRow(QtWidgets.QLabel("<b>Responsável:</b>"), self.combo_responsavel)
+
+        # Sala
+        self.combo_sala = ComboBoxPesquisavel(self)
+        form_layout.addRow(QtWidgets.QLabel("<b>Local/Sala:</b>"), self.combo_sala)
+
+        for combo in (self.combo_patrimonio, self.combo_responsavel, self.combo_sala):
+            combo.definir_itens("Carregando...", [])
+            combo.setEnabled(False)
+
+        main_layout.addLayout(form_layout)
+        main_layout.addStretch(1)
+
+        self.status_label = QtWidgets.QLabel("Pronto.")
+        self.status_label.setStyleSheet("font-style: italic; color: gray; padding: 5px;")
+        main_layout.addWidget(self.status_label)
+
+        self.btn_salvar = QtWidgets.QPushButton("Salvar e Enviar Dados")
+        self.btn_salvar.setFixedHeight(40)
+        self.btn_salvar.setCursor(QtCore.Qt.PointingHandCursor)
+        self.btn_salvar.clicked.connect(self.salvar_e_enviar)
+        main_layout.addWidget(self.btn_salvar)
+
+        self.iniciar_identificacao()
+        self.iniciar_carregamento_catalogos()
+        if listar_spool():
+            iniciar_drenagem_spool_em_background()  # Reenvia o que ficou pendente de execuções anteriores
+        x9h_metricas.registrar("ui.construcao", time.perf_counter() - self._inicio_ui)
+
+    def iniciar_carregamento_catalogos(self):
+        """ Preenche os combos a partir do cache local e revalida patrimônios, usuários e salas em paralelo,
+        cada um em sua própria QThread (stale-while-revalidate). Sem cópia local, os combos são
+        preenchidos página a página conforme a intranet responde. """
+        catalogos = (
+            ("patrimonios", obter_patrimonios_para_combobox,
+             lambda ao_receber_pagina: obter_patrimonios_para_combobox(True, ao_receber_pagina=ao_receber_pagina)),
+            ("usuarios", obter_usuarios, lambda ao_receber_pagina: obter_usuarios(ao_receber_pagina=ao_receber_pagina)),
+            ("salas", obter_salas, lambda ao_receber_pagina: obter_salas(ao_receber_pagina=ao_receber_pagina)),
+        )
+        for nome_catalogo, funcao_cache, _funcao_busca in catalogos:
+            with x9h_metricas.span("ui.catalogo_cache", catalogo=nome_catalogo) as s:
+                itens_em_cache = funcao_cache(somente_cache=True)
+                if itens_em_cache is not None:
+                    self._aplicar_catalogo(nome_catalogo, itens_em_cache)
+                else:
+                    self._catalogos_pendentes.add(nome_catalogo)
+                s.definir(em_cache=itens_em_cache is not None)
+        self._inicio_revalidacao = time.perf_counter()
+
+        if self._catalogos_pendentes:
+            self.status_label.setText("Carregando listas do servidor...")
+        else:
+            self._on_catalogos_prontos()
+
+        for nome_catalogo, _funcao_cache, funcao_busca in catalogos:
+            thread = QtCore.QThread(self)
+            worker = CatalogoWorker(nome_catalogo, funcao_busca)
+            worker.moveToThread(thread)
+            thread.started.connect(worker.run)
+            worker.pagina_recebida.connect(self.on_pagina_recebida)
+            worker.catalogo_carregado.connect(self.on_catalogo_carregado)
+            worker.finished.connect(thread.quit)
+            self.catalogo_threads.append(thread)
+            self.catalogo_workers.append(worker)
+            thread.start()
+
+    def iniciar_worker_config(self):
+        self._geracao_config = 0
+        self._patrimonio_config_pendente = None
+        self.timer_config = QtCore.QTimer(self)
+        self.timer_config.setSingleShot(True)
+        self.timer_config.setInterval(CONFIG_DEBOUNCE_MS)
+        self.timer_config.timeout.connect(self._disparar_busca_config)
+        self.config_thread = QtCore.QThread(self)
+        self.config_worker = ConfigPatrimonioWorker()
+        self.config_worker.moveToThread(self.config_thread)
+        self.solicitar_config.connect(self.config_worker.buscar)
+        self.config_worker.configuracao_pronta.connect(self.on_config_patrimonio_pronta)
+        self.config_thread.start()
+
+    def iniciar_identificacao(self):
+        self.identificacao_thread = QtCore.QThread(self)
+        self.identificacao_worker = IdentificacaoWorker()
+        self.identificacao_worker.moveToThread(self.identificacao_thread)
+        self.identificacao_thread.started.connect(self.identificacao_worker.run)
+        self.identificacao_worker.identidade_pronta.connect(self.on_identidade_pronta)
+        self.identificacao_worker.finished.connect(self.identificacao_thread.quit)
+        self.identificacao_thread.start()
+
+    @QtCore.pyqtSlot(object)
+    def on_identidade_pronta(self, identidade):
+        self._identidade_local = identidade
+        self.tentar_preselecionar_patrimonio()
+
+    def tentar_preselecionar_patrimonio(self):
+        """ Seleciona sozinho o patrimônio desta máquina (serial, MAC ou nome do PC no catálogo de equipamentos),
+        o que preenche Responsável e Sala. Só age enquanto nada foi salvo nem escolhido e os combos estão prontos.
+        """
+        if not self._preselecao_pendente or self._identidade_local is None or self._catalogos_pendentes:
+            return
+        if self.combo_patrimonio.currentIndex() > 0:
+            self._preselecao_pendente = False
+            return
+        encontrado = localizar_patrimonio_local(self._identidade_local)
+        if encontrado is None:
+            return  # Catálogo revalidado pode trazer o patrimônio: tenta de novo quando chegar
+        indice = self.combo_patrimonio.indice_por_id(encontrado["patrimonio"])
+        if indice == -1:
+            return
+        self._preselecao_pendente = False
+        criterios = {"serial": "serial da placa", "mac": "endereço MAC", "hostname": "nome do computador"}
+        self._aviso_preselecao = (encontrado["patrimonio"],
+                                  f"Patrimônio {encontrado['patrimonio']} identificado automaticamente "
+                                  f"({criterios[encontrado['criterio']]}). Confira e envie.")
+        self.combo_patrimonio.setCurrentIndex(indice)
+
+    def _aplicar_catalogo(self, nome_catalogo, itens):
+        if nome_catalogo == "patrimonios":
+            self.lista_patrimonios = itens
+            self.combo_patrimonio.definir_itens("-- Selecione um Patrimônio --", itens)
+        elif nome_catalogo == "usuarios":
+            self.usuarios = itens
+            self.combo_responsavel.definir_itens("-- Selecione um Responsável --", itens)
+        elif nome_catalogo == "salas":
+            self.salas = itens
+            self.combo_sala.definir_itens("-- Selecione um Local/Sala --", itens)
+
+    @QtCore.pyqtSlot(str, object)
+    def on_pagina_recebida(self, nome_catalogo, itens):
+        # Só alimenta combos ainda sem conteúdo; com cópia local exibida, espera a lista completa
+        if nome_catalogo not in self._catalogos_pendentes or not itens:
+            return
+        if nome_catalogo not in self._catalogos_parciais:
+            self._catalogos_parciais.add(nome_catalogo)
+            x9h_metricas.registrar("ui.primeira_pagina", time.perf_counter() - self._inicio_revalidacao,
+                                   catalogo=nome_catalogo)
+            self._aplicar_catalogo(nome_catalogo, list(itens))
+            return
+        if nome_catalogo == "patrimonios":
+            self.lista_patrimonios.extend(itens)
+            self.combo_patrimonio.adicionar_itens(itens)
+        elif nome_catalogo == "usuarios":
+            self.usuarios.extend(itens)
+            self.combo_responsavel.adicionar_itens(itens)
+        elif nome_catalogo == "salas":
+            self.salas.extend(itens)
+            self.combo_sala.adicionar_itens(itens)
+
+    @QtCore.pyqtSlot(str, object)
+    def on_catalogo_carregado(self, nome_catalogo, itens):
+        itens = itens or []
+        x9h_metricas.registrar("ui.catalogo_revalidado", time.perf_counter() - self._inicio_revalidacao,
+                               catalogo=nome_catalogo, itens=len(itens))
+        atuais = {"patrimonios": self.lista_patrimonios, "usuarios": self.usuarios, "salas": self.salas}
+        aguardando = nome_catalogo in self._catalogos_pendentes
+        # Sem rede e sem novidade, a cópia local já exibida continua valendo
+        if aguardando or (itens and itens != atuais.get(nome_catalogo)):
+            self._aplicar_catalogo(nome_catalogo, itens)
+
+        if not aguardando:
+            if nome_catalogo == "patrimonios":
+                self.tentar_preselecionar_patrimonio()  # A revalidação pode ter trazido o cadastro desta máquina
+            return
+        self._catalogos_pendentes.discard(nome_catalogo)
+        self._catalogos_parciais.discard(nome_catalogo)
+        if not self._catalogos_pendentes:
+            self._on_catalogos_prontos()
+        else:
+            self.status_label.setText(f"Carregando listas do servidor... (faltam {len(self._catalogos_pendentes)})")
+
+    def _on_catalogos_prontos(self):
+        x9h_metricas.registrar("ui.pronto", time.perf_counter() - self._inicio_ui)
+        with x9h_metricas.span("ui.dados_locais"):
+            self.carregar_dados_locais_ui()
+        self.tentar_preselecionar_patrimonio()
+
+    def on_patrimonio_selection_changed(self, index):
+        patrimonio_id_selecionado = self.combo_patrimonio.itemData(index)
+        current_pat_text = self.combo_patrimonio.currentText()
+        self.status_label.setText(f"Patrimônio '{current_pat_text}' selecionado.")
+
+        if patrimonio_id_selecionado is not None:
+            self.tentar_carregar_config_patrimonio_ui(patrimonio_id_selecionado)
+        else:
+            self._cancelar_busca_config()
+            self.combo_responsavel.setCurrentIndex(0)
+            self.combo_sala.setCurrentIndex(0)
+            self.status_label.setText("Selecione um patrimônio.")
+
+    def carregar_dados_locais_ui(self):
+        self.status_label.setText("Carregando dados locais...")
+        if not os.path.exists(USER_DATA_FILE):
+            self.status_label.setText("Nenhum dado local salvo encontrado.")
+            return
+        try:
+            with open(USER_DATA_FILE, "r") as f:
+                dados_locais = json.load(f)
+            self._dados_locais = dados_locais if isinstance(dados_locais, dict) else {}
+
+            patrimonio_local_id = str(dados_locais.get("patrimonio", "")).strip()
+            if patrimonio_local_id:
+                self._preselecao_pendente = False  # O cadastro salvo prevalece sobre a identificação automática
+                index_pat = self.combo_patrimonio.indice_por_id(patrimonio_local_id)
+                if index_pat != -1:
+                    self.combo_patrimonio.setCurrentIndex(index_pat)
+                else:
+                    print(f"DEBUG: Patrimônio local '{patrimonio_local_id}' não encontrado na lista.")
+                    self.status_label.setText(f"Patrimônio local '{patrimonio_local_id}' não listado.")
+
+            if self.combo_responsavel.currentIndex() <= 0:
+                id_responsavel_local = str(dados_locais.get("responsavel", "")).strip()
+                if id_responsavel_local:
+                    index_resp = self.combo_responsavel.indice_por_id(id_responsavel_local)
+                    if index_resp != -1:
+                        self.combo_responsavel.setCurrentIndex(index_resp)
+
+            if self.combo_sala.currentIndex() <= 0:
+                id_sala_local = str(dados_locais.get("sala", "")).strip()
+                if id_sala_local:
+                    index_sala = self.combo_sala.indice_por_id(id_sala_local)
+                    if index_sala != -1:
+                        self.combo_sala.setCurrentIndex(index_sala)
+
+            if patrimonio_local_id or self.combo_patrimonio.currentIndex() > 0:
+                self.status_label.setText("Dados locais e/ou de API para patrimônio carregados.")
+            else:
+                self.status_label.setText("Dados locais carregados (sem seleção de patrimônio).")
+
+        except FileNotFoundError:
+            self.status_label.setText(f"Arquivo de dados local ({USER_DATA_FILE}) não encontrado.")
+        except json.JSONDecodeError:
+            self.status_label.setText(f"Erro ao ler {USER_DATA_FILE}. Arquivo pode estar corrompido.")
+            print(f"DEBUG: Erro de decodificação JSON ao ler {USER_DATA_FILE}.")
+        except Exception as e:
+            print(f"DEBUG: Erro ao carregar dados locais para UI: {e}")
+            self.status_label.setText("Erro inesperado ao carregar dados locais.")
+
+    def tentar_carregar_config_patrimonio_ui(self, patrimonio_id):
+        """ Agenda a busca da configuração do patrimônio; trocas rápidas de seleção geram uma busca só.
+
+        A busca roda no ConfigPatrimonioWorker; cada pedido leva um número de geração e respostas de
+        pedidos já superados são descartadas, de modo que só a seleção mais recente preenche os combos.
+        """
+        if not patrimonio_id:
+            return
+        self._geracao_config += 1
+        self._patrimonio_config_pendente = str(patrimonio_id)
+        self.config_worker.geracao_atual = self._geracao_config
+        self.status_label.setText(f"Buscando config. API para patrimônio {patrimonio_id}...")
+        self.timer_config.start()
+
+    def _disparar_busca_config(self):
+        self.solicitar_config.emit(self._geracao_config, self._patrimonio_config_pendente)
+
+    def _cancelar_busca_config(self):
+        self.timer_config.stop()
+        self._geracao_config += 1
+        self.config_worker.geracao_atual = self._geracao_config
+
+    @QtCore.pyqtSlot(int, str, object)
+    def on_config_patrimonio_pronta(self, geracao, patrimonio_id, config_api):
+        if geracao != self._geracao_config:
+            return  # Resposta de uma seleção que já mudou
+        self._aplicar_config_patrimonio(patrimonio_id, config_api or {})
+
+    def _selecionar_ou_dados_locais(self, combo, indice, chave_local, patrimonio_id):
+        """ Seleciona `indice` se encontrado; senão, o valor salvo localmente para este patrimônio; senão, nada. """
+        if indice == -1 and str(self._dados_locais.get("patrimonio", "")).strip() == patrimonio_id:
+            id_local = str(self._dados_locais.get(chave_local, "")).strip()
+            indice = combo.indice_por_id(id_local) if id_local else -1
+        combo.setCurrentIndex(max(indice, 0))
+
+    def _aplicar_config_patrimonio(self, patrimonio_id, config_api):
+        if not config_api:
+            self.status_label.setText(f"Nenhuma config. da API para {patrimonio_id} (ou erro na busca).")
+            self._selecionar_ou_dados_locais(self.combo_responsavel, -1, "responsavel", patrimonio_id)
+            self._selecionar_ou_dados_locais(self.combo_sala, -1, "sala", patrimonio_id)
+            return
+        print(f"DEBUG: config_api recebida para {patrimonio_id}: {config_api}")
+
+        index_resp = -1
+        responsavel_label_da_api = config_api.get("responsavel_label")
+        if responsavel_label_da_api:
+            index_resp = self.combo_responsavel.indice_por_rotulo(responsavel_label_da_api)
+            if index_resp == -1:
+                print(f"DEBUG: FALHA - Responsável '{responsavel_label_da_api}' (da API) não encontrado na lista do ComboBox.")
+        else:
+            print("DEBUG: 'responsavel_label' não encontrado ou vazio na config_api.")
+        self._selecionar_ou_dados_locais(self.combo_responsavel, index_resp, "responsavel", patrimonio_id)
+
+        index_sala = -1
+        sala_id_da_api = config_api.get("sala_id")
+        if sala_id_da_api:
+            index_sala = self.combo_sala.indice_por_id(str(sala_id_da_api))
+            if index_sala == -1:
+                print(f"DEBUG: FALHA - Sala com ID '{sala_id_da_api}' (da API) não encontrada na lista do ComboBox.")
+        else:
+            print("DEBUG: 'sala_id' não encontrado ou vazio na config_api.")
+        self._selecionar_ou_dados_locais(self.combo_sala, index_sala, "sala", patrimonio_id)
+
+        if self._aviso_preselecao and self._aviso_preselecao[0] == patrimonio_id:
+            self.status_label.setText(self._aviso_preselecao[1])
+        else:
+            self.status_label.setText(f"Campos atualizados por API para {patrimonio_id}.")
+        self._aviso_preselecao = None
+
+    def salvar_e_enviar(self):
+        patrimonio_id = self.combo_patrimonio.currentData()
+        responsavel_id = self.combo_responsavel.currentData()
+        sala_id = self.combo_sala.currentData()
+
+        erros = []
+        if patrimonio_id is None: erros.append("O campo <b>Patrimônio</b> é obrigatório.")
+        if responsavel_id is None: erros.append("O campo <b>Responsável</b> é obrigatório.")
+        if sala_id is None: erros.append("O campo <b>Local/Sala</b> é obrigatório.")
+
+        if erros:
+            QtWidgets.QMessageBox.warning(self, "Campos Obrigatórios", "<br>".join(erros))
+            return
+
+        user_data_to_save = {
+            "patrimonio": patrimonio_id,
+            "responsavel": responsavel_id,
+            "sala": sala_id
+        }
+
+        try:
+            with open(USER_DATA_FILE, "w") as f:
+                json.dump(user_data_to_save, f, indent=4)
+            print(f"Dados locais salvos com sucesso em {USER_DATA_FILE}")
+        except IOError as e:
+            QtWidgets.QMessageBox.critical(self, "Erro ao Salvar Localmente",
+                                           f"Não foi possível salvar os dados localmente:\n{e}")
+            return
+
+        self.btn_salvar.setEnabled(False)
+        self.status_label.setText("Enviando dados para o servidor... Por favor, aguarde.")
+
+        if self.submission_thread and self.submission_thread.isRunning():
+            print("DEBUG: Submissão anterior ainda em progresso. Cancelando nova tentativa.")  # Evita múltiplas threads
+            self.btn_salvar.setEnabled(True)  # Reabilita o botão se a lógica chegar aqui por engano
+            return
+
+        self.submission_thread = QtCore.QThread(self)
+        self.submission_worker = SubmissionWorker(user_data_to_save)
+        self.submission_worker.moveToThread(self.submission_thread)
+
+        self.submission_thread.started.connect(self.submission_worker.run_submission)
+        self.submission_worker.submission_success.connect(self.handle_submission_success)
+        self.submission_worker.submission_failure.connect(self.handle_submission_failure)
+        self.submission_worker.finished.connect(self.submission_thread.quit)
+        self.submission_thread.finished.connect(self.submission_worker.deleteLater)
+        self.submission_thread.finished.connect(self.submission_thread.deleteLater)
+        self.submission_thread.finished.connect(lambda: self.btn_salvar.setEnabled(True))  # Reabilita o botão sempre
+
+        self.submission_thread.start()
+
+    @QtCore.pyqtSlot(str)
+    def handle_submission_success(self, message):
+        self.status_label.setText("Envio concluído com sucesso.")
+        QtWidgets.QMessageBox.information(self, "Sucesso", message)
+        self.close()
+
+    @QtCore.pyqtSlot(str)
+    def handle_submission_failure(self, error_message):
+        self.status_label.setText("Falha no envio. Verifique o console.")
+        QtWidgets.QMessageBox.critical(self, "Falha no Envio", error_message)
+
+    def closeEvent(self, event):
+        print("DEBUG: Close event chamado na FormDialog")
+        if self.submission_thread and self.submission_thread.isRunning():
+            print("DEBUG: Tentando parar a thread de submissão antes de fechar...")
+            if hasattr(self.submission_worker, 'stop'):  # Verifica se o worker tem o método stop
+                self.submission_worker.stop()
+            self.submission_thread.quit()
+            if not self.submission_thread.wait(1000):  # Espera até 1 segundo
+                print("DEBUG: A thread de submissão não parou a tempo. Forçando o fechamento.")
+        threads_ativas = [thread for thread in self.catalogo_threads + [self.identificacao_thread]
+                          if thread.isRunning()]
+        if threads_ativas:
+            cancelar_operacoes()  # Derruba downloads de catálogo e comandos em andamento para as threads terminarem já
+        for thread in threads_ativas:
+            thread.quit()
+            thread.wait(500)
+        self._cancelar_busca_config()
+        self.config_thread.quit()
+        if not self.config_thread.wait(200):
+            cancelar_operacoes()  # Busca de config. presa no download do catálogo
+            self.config_thread.wait(500)
+        super().closeEvent(event)
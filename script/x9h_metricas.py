@@ -0,0 +1,193 @@
+""" Instrumentação leve: spans cronometrados, histogramas de latência e perfil opcional com cProfile.
+
+Desligada por padrão. Com X9H_METRICAS=1 (ou o caminho de um arquivo), cada execução acrescenta seus
+spans e um resumo com histogramas ao arquivo JSON-lines ao sair. Desligada, `span()` devolve sempre o
+mesmo objeto nulo e o custo por chamada é o de uma verificação de flag.
+"""
+import os
+import sys
+import json
+import time
+import atexit
+import random
+import threading
+import collections
+
+_VALOR_METRICAS = os.environ.get("X9H_METRICAS", "0")
+METRICAS_ATIVAS = _VALOR_METRICAS not in ("", "0")
+METRICAS_NO_ENVIO = os.environ.get("X9H_METRICAS_ENVIO", "0") == "1"  # Anexa o resumo ao payload do POST
+
+# Limites superiores (ms) dos baldes do histograma; o último balde ("+inf") pega o resto
+BALDES_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+MAX_SPANS_EXPORTADOS = 5000  # Só os mais recentes ficam em memória (o relay roda por semanas)
+MAX_AMOSTRAS_PERCENTIL = 1024  # Amostra uniforme por nome de span, de onde saem p50 e p95
+METRICAS_MAX_BYTES = 2 * 1024 * 1024  # Acima disso o arquivo vira .1 e um novo é iniciado
+
+_arquivo_metricas = None if _VALOR_METRICAS in ("", "0", "1") else _VALOR_METRICAS
+_lock = threading.Lock()
+_spans = collections.deque(maxlen=MAX_SPANS_EXPORTADOS)
+_duracoes_por_nome = {}
+_inicio_execucao = time.time()
+_exportado = False
+
+
+def definir_arquivo_padrao(caminho):
+    """ Arquivo usado quando X9H_METRICAS=1 (o chamador conhece o diretório de dados do X9H). """
+    global _arquivo_metricas
+    if _arquivo_metricas is None:
+        _arquivo_metricas = caminho
+
+
+class _SpanNulo:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def definir(self, **atributos):
+        pass
+
+
+_SPAN_NULO = _SpanNulo()
+
+
+class Span:
+    """ Trecho cronometrado; use como `with span("http.GET", url=...) as s: ...; s.definir(status=200)`. """
+    __slots__ = ("nome", "atributos", "_inicio")
+
+    def __init__(self, nome, atributos):
+        self.nome = nome
+        self.atributos = atributos
+        self._inicio = 0.0
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo_exc, exc, tb):
+        if tipo_exc is not None:
+            self.atributos["erro"] = tipo_exc.__name__
+        registrar(self.nome, time.perf_counter() - self._inicio, **self.atributos)
+        return False
+
+    def definir(self, **atributos):
+        self.atributos.update(atributos)
+
+
+class _Estatistica:
+    """ Contagem, soma, máximo e baldes exatos; percentis de uma amostra de reservatório de tamanho fixo. """
+    __slots__ = ("contagem", "soma_ms", "max_ms", "baldes", "amostra")
+
+    def __init__(self):
+        self.contagem = 0
+        self.soma_ms = 0.0
+        self.max_ms = 0.0
+        self.baldes = {}
+        self.amostra = []
+
+    def adicionar(self, valor):
+        self.contagem += 1
+        self.soma_ms += valor
+        self.max_ms = max(self.max_ms, valor)
+        rotulo = next((f"<={limite}" for limite in BALDES_MS if valor <= limite), "+inf")
+        self.baldes[rotulo] = self.baldes.get(rotulo, 0) + 1
+        if len(self.amostra) < MAX_AMOSTRAS_PERCENTIL:
+            self.amostra.append(valor)
+        else:
+            # Algoritmo R: cada valor visto até agora tem a mesma chance de estar na amostra
+            indice = random.randrange(self.contagem)
+            if indice < MAX_AMOSTRAS_PERCENTIL:
+                self.amostra[indice] = valor
+
+
+def span(nome, **atributos):
+    if not METRICAS_ATIVAS:
+        return _SPAN_NULO
+    return Span(nome, atributos)
+
+
+def registrar(nome, duracao_s, **atributos):
+    """ Registra uma duração já medida (para fases que começam e terminam em callbacks diferentes). """
+    if not METRICAS_ATIVAS:
+        return
+    duracao_ms = duracao_s * 1000
+    registro = {"nome": nome, "ms": round(duracao_ms, 3), "fim": round(time.time() - _inicio_execucao, 3),
+                "thread": threading.current_thread().name}
+    if atributos:
+        registro["atributos"] = atributos
+    with _lock:
+        _spans.append(registro)
+        estatistica = _duracoes_por_nome.get(nome)
+        if estatistica is None:
+            estatistica = _duracoes_por_nome[nome] = _Estatistica()
+        estatistica.adicionar(duracao_ms)
+
+
+def _percentil(ordenadas, fracao):
+    return ordenadas[min(len(ordenadas) - 1, int(fracao * len(ordenadas)))]
+
+
+def resumo():
+    """ Histogramas por nome de span: contagem, soma, p50, p95 (estimados), máximo e contagem por balde. """
+    with _lock:
+        copias = {nome: (e.contagem, e.soma_ms, e.max_ms, dict(e.baldes), sorted(e.amostra))
+                  for nome, e in _duracoes_por_nome.items()}
+    histogramas = {}
+    for nome, (contagem, soma_ms, max_ms, baldes, ordenadas) in copias.items():
+        histogramas[nome] = {
+            "contagem": contagem, "soma_ms": round(soma_ms, 3),
+            "p50_ms": round(_percentil(ordenadas, 0.5), 3), "p95_ms": round(_percentil(ordenadas, 0.95), 3),
+            "max_ms": round(max_ms, 3), "baldes": baldes,
+        }
+    return histogramas
+
+
+def resumo_para_envio():
+    """ Resumo compacto para anexar ao POST, ou None se não habilitado por X9H_METRICAS_ENVIO. """
+    if not (METRICAS_ATIVAS and METRICAS_NO_ENVIO):
+        return None
+    return {nome: {"n": h["contagem"], "p50": h["p50_ms"], "p95": h["p95_ms"], "max": h["max_ms"]}
+            for nome, h in resumo().items()}
+
+
+def exportar():
+    """ Acrescenta os spans e o resumo desta execução ao arquivo de métricas (uma vez por processo). """
+    global _exportado
+    if not METRICAS_ATIVAS or _exportado or not _arquivo_metricas:
+        return
+    _exportado = True
+    with _lock:
+        spans = list(_spans)
+    execucao = {"pid": os.getpid(), "inicio": _inicio_execucao, "argv": sys.argv[1:]}
+    try:
+        if os.path.exists(_arquivo_metricas) and os.path.getsize(_arquivo_metricas) > METRICAS_MAX_BYTES:
+            os.replace(_arquivo_metricas, _arquivo_metricas + ".1")
+        with open(_arquivo_metricas, "a", encoding="utf-8") as f:
+            for registro in spans:
+                f.write(json.dumps({"tipo": "span", **execucao, **registro}, ensure_ascii=False) + "\n")
+            f.write(json.dumps({"tipo": "resumo", **execucao, "duracao_s": round(time.time() - _inicio_execucao, 3),
+                                "histogramas": resumo()}, ensure_ascii=False) + "\n")
+        print(f"DEBUG: {len(spans)} spans de métricas gravados em {_arquivo_metricas}")
+    except OSError as e:
+        print(f"DEBUG: Não foi possível gravar métricas em {_arquivo_metricas}: {e}")
+
+
+if METRICAS_ATIVAS:
+    atexit.register(exportar)
+
+
+def executar_com_perfil(funcao, arquivo_saida, linhas=25):
+    """ Executa `funcao()` sob cProfile, grava as estatísticas em `arquivo_saida` e imprime as mais caras. """
+    import cProfile
+    import pstats
+
+    perfil = cProfile.Profile()
+    try:
+        return perfil.runcall(funcao)
+    finally:
+        perfil.dump_stats(arquivo_saida)
+        print(f"DEBUG: Perfil gravado em {arquivo_saida} (abra com: python -m pstats {arquivo_saida})")
+        pstats.Stats(perfil).sort_stats("cumulative").print_stats(linhas)
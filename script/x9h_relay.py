@@ -0,0 +1,408 @@
+""" Modo relay: um X9H por sub-rede recebe os envios das máquinas locais e os repassa à intranet em lotes.
+
+Uso: python X9H.py --relay [--porta 8780] [--upstream https://intranet.../wp-json/intranet/v1]
+Nas máquinas: X9H_API_BASE=http://<relay>:8780/wp-json/intranet/v1
+
+  POST /submission    aceita {"data": ...}, {"data": ..., "partial": true}, {"batch": [...]} e corpo gzip.
+                      Cada envio é mesclado ao último estado conhecido do patrimônio e vai para a fila local
+                      (um snapshot por patrimônio); a fila é repassada a cada X9H_RELAY_INTERVALO segundos,
+                      em lotes se X9H_API_LOTE=1. Um envio idêntico ao último repassado é descartado.
+  GET  catálogos      usuários, salas e equipamentos, servidos da cópia do relay (revalidada na intranet no
+                      máximo a cada X9H_RELAY_CATALOGO_TTL segundos) e paginados como o WordPress.
+
+Um envio parcial de patrimônio que o relay ainda não conhece recebe 409: a máquina guarda o snapshot completo
+na própria fila e o reenvia inteiro. O estado mesclado de cada patrimônio fica também em disco (estados/), de
+modo que um relay reiniciado continua aceitando os envios parciais.
+"""
+import os
+import json
+import gzip
+import zlib
+import hashlib
+import signal
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import x9h_coleta
+import x9h_metricas
+
+RELAY_PORTA_PADRAO = 8780
+RELAY_INTERVALO_ENVIO = float(os.environ.get("X9H_RELAY_INTERVALO", "60"))
+RELAY_CATALOGO_TTL = float(os.environ.get("X9H_RELAY_CATALOGO_TTL", "300"))
+RELAY_JANELA_DUPLICADOS = 24 * 3600  # Snapshot idêntico dentro dessa janela não é repassado de novo
+RELAY_CORPO_MAX = 16 * 1024 * 1024
+RELAY_POR_PAGINA_MAX = 1000
+RELAY_GZIP_MIN_BYTES = 1024
+
+# Caminhos relativos a API_BASE_URL que o relay serve a partir da própria cópia (nada além disso é repassado)
+ROTAS_CATALOGO = ("/users/", "/submissions/object/place", "/submissions/equipaments/")
+ROTA_ENVIO = "/submission"
+
+
+# --- Catálogos Servidos da Cópia Local ---
+class CatalogosRelay:
+    """ Cópia em memória dos catálogos da intranet, uma busca por URL de cada vez e no máximo uma por TTL. """
+
+    def __init__(self, ttl=RELAY_CATALOGO_TTL):
+        self.ttl = ttl
+        self._entradas = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _lock_da_url(self, url):
+        with self._lock:
+            return self._locks.setdefault(url, threading.Lock())
+
+    def obter(self, url):
+        """ Retorna {"itens", "obtido_em", "paginas"}; várias máquinas pedindo ao mesmo tempo geram uma só busca. """
+        with self._lock_da_url(url):
+            entrada = self._entradas.get(url)
+            if entrada is not None and time.time() - entrada["obtido_em"] < self.ttl:
+                return entrada
+            try:
+                with x9h_metricas.span("relay.catalogo", rota=urllib.parse.urlsplit(url).path):
+                    itens = x9h_coleta.buscar_catalogo(url)["results"]
+            except Exception as e:
+                if entrada is None:
+                    raise
+                print(f"DEBUG: Relay não revalidou {url} ({e}); servindo a cópia anterior.")
+                entrada["obtido_em"] = time.time()  # Não insiste a cada pedido enquanto a intranet estiver fora
+                return entrada
+            if entrada is None or entrada["itens"] != itens:
+                entrada = {"itens": itens, "paginas": {}}
+            entrada["obtido_em"] = time.time()
+            self._entradas[url] = entrada
+            return entrada
+
+
+def pagina_serializada(entrada, pagina, por_pagina):
+    """ (etag, corpo JSON, corpo gzip) da página, calculados uma vez por versão do catálogo. """
+    chave = (pagina, por_pagina)
+    serializada = entrada["paginas"].get(chave)
+    if serializada is None:
+        itens = entrada["itens"][(pagina - 1) * por_pagina:pagina * por_pagina]
+        corpo = json.dumps({"results": itens}, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        etag = f'"{hashlib.sha1(corpo).hexdigest()[:16]}-{pagina}-{por_pagina}"'
+        serializada = entrada["paginas"][chave] = (etag, corpo, gzip.compress(corpo, compresslevel=5))
+    return serializada
+
+
+# --- Agregação dos Envios por Patrimônio ---
+def mesclar_parcial(base, parcial):
+    """ Aplica um envio parcial (campos alterados, None = removido, software_delta) ao snapshot completo. """
+    dados = dict(base)
+    for chave, valor in parcial.items():
+        if chave == "software_delta":
+            dados["software"] = x9h_coleta.aplicar_delta_software(base.get("software") or [], valor)
+        elif valor is None:
+            dados.pop(chave, None)
+        else:
+            dados[chave] = valor
+    return dados
+
+
+class AgregadorEnvios:
+    """ Mantém o último estado de cada patrimônio e põe na fila só o que mudou.
+
+    O estado de cada patrimônio é gravado em `diretorio` e relido ao iniciar: sem isso, depois de reiniciar o
+    relay responderia 409 a todos os envios parciais até cada máquina reenviar o snapshot completo.
+    """
+
+    def __init__(self, diretorio=None):
+        self.diretorio = diretorio or os.path.join(x9h_coleta.BASE_APP_PATH, "estados")
+        self._estados = {}
+        self._ultimos_enfileirados = {}  # patrimonio -> (hash, quando)
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.contadores = {"recebidos": 0, "enfileirados": 0, "duplicados": 0, "sem_base": 0}
+        self._carregar_estados()
+
+    def _caminho_estado(self, patrimonio):
+        return os.path.join(self.diretorio, f"{hashlib.sha1(str(patrimonio).encode('utf-8')).hexdigest()}.json")
+
+    def _carregar_estados(self):
+        try:
+            nomes = [nome for nome in os.listdir(self.diretorio) if nome.endswith(".json")]
+        except OSError:
+            return
+        for nome in nomes:
+            try:
+                with open(os.path.join(self.diretorio, nome), "r", encoding="utf-8") as f:
+                    estado = json.load(f)
+                patrimonio = estado["patrimonio"]
+                self._estados[patrimonio] = estado["dados"]
+                self._ultimos_enfileirados[patrimonio] = (estado["hash"], estado["enfileirado_em"])
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"DEBUG: Estado do relay ilegível ({nome}): {e}")
+        print(f"DEBUG: Relay recarregou o estado de {len(self._estados)} patrimônio(s).")
+
+    def _gravar_estado(self, patrimonio, dados, resumo, quando):
+        # Sem fsync: a cópia durável é a da fila; perder este arquivo só faz a máquina reenviar o snapshot completo
+        caminho = self._caminho_estado(patrimonio)
+        temporario = f"{caminho}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.diretorio, exist_ok=True)
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump({"patrimonio": patrimonio, "dados": dados, "hash": resumo, "enfileirado_em": quando}, f)
+            os.replace(temporario, caminho)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"DEBUG: Não foi possível gravar o estado do relay para {patrimonio}: {e}")
+
+    def _lock_do_patrimonio(self, patrimonio):
+        with self._lock:
+            return self._locks.setdefault(patrimonio, threading.Lock())
+
+    def receber(self, registro, parcial=False):
+        """ Retorna "enfileirado", "duplicado" ou "sem_base" (parcial sem estado conhecido). """
+        patrimonio = registro.get("patrimonio")
+        if not patrimonio:
+            raise ValueError("envio sem patrimônio")
+        # Um envio de cada vez por patrimônio: a gravação na fila (fsync) não segura as demais máquinas
+        with self._lock_do_patrimonio(patrimonio):
+            with self._lock:
+                self.contadores["recebidos"] += 1
+                base = self._estados.get(patrimonio)
+                anterior = self._ultimos_enfileirados.get(patrimonio)
+            if parcial:
+                if base is None:
+                    with self._lock:
+                        self.contadores["sem_base"] += 1
+                    return "sem_base"
+                dados = mesclar_parcial(base, registro)
+            else:
+                dados = dict(registro)
+            resumo = x9h_coleta.hash_canonico(dados)
+            with self._lock:
+                self._estados[patrimonio] = dados
+            if anterior and anterior[0] == resumo and time.time() - anterior[1] < RELAY_JANELA_DUPLICADOS:
+                with self._lock:
+                    self.contadores["duplicados"] += 1
+                return "duplicado"
+            if not x9h_coleta.enfileirar_envio(dados, imediato=True):
+                raise OSError("não foi possível gravar na fila local")
+            agora = time.time()
+            self._gravar_estado(patrimonio, dados, resumo, agora)
+            with self._lock:
+                self._ultimos_enfileirados[patrimonio] = (resumo, agora)
+                self.contadores["enfileirados"] += 1
+            return "enfileirado"
+
+
+def descomprimir_gzip_limitado(corpo, limite=RELAY_CORPO_MAX):
+    """ Descomprime um corpo gzip sem passar de `limite` bytes; None se o conteúdo for maior que isso. """
+    descompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    dados = descompressor.decompress(corpo, limite + 1)
+    if len(dados) > limite:
+        return None  # Para no primeiro byte além do limite (ex.: gzip bomb de poucos KB)
+    if not descompressor.eof:
+        raise ValueError("corpo gzip truncado")
+    return dados
+
+
+# --- Servidor HTTP ---
+class ManipuladorRelay(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "X9HRelay/1.0"
+
+    def log_message(self, formato, *args):
+        if x9h_coleta.DEBUG_ATIVO:
+            super().log_message(formato, *args)
+
+    def _responder(self, status, corpo=b"", cabecalhos=None, corpo_gzip=None):
+        self.send_response(status)
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.send_header("Accept-Encoding", "gzip")  # Aceita POST comprimido (RFC 7694)
+        if status != 304:
+            if len(corpo) >= RELAY_GZIP_MIN_BYTES and "gzip" in self.headers.get("Accept-Encoding", ""):
+                corpo = corpo_gzip or gzip.compress(corpo, compresslevel=5)
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Type", "application/json; charset=UTF-8")
+            self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        if corpo and status != 304:
+            self.wfile.write(corpo)
+
+    def _responder_json(self, status, objeto, cabecalhos=None):
+        self._responder(status, json.dumps(objeto, separators=(",", ":"), ensure_ascii=False).encode("utf-8"),
+                        cabecalhos)
+
+    def _caminho_relativo(self):
+        partes = urllib.parse.urlsplit(self.path)
+        caminho = partes.path
+        if caminho.startswith(self.server.prefixo):
+            caminho = caminho[len(self.server.prefixo):]
+        return caminho, partes.query
+
+    def do_GET(self):
+        caminho, consulta = self._caminho_relativo()
+        if caminho not in ROTAS_CATALOGO:
+            self._responder_json(404, {"code": "rest_no_route"})
+            return
+        parametros = urllib.parse.parse_qsl(consulta, keep_blank_values=True)
+        try:
+            valores = dict(parametros)
+            pagina = max(1, int(valores.get("page", "1")))
+            por_pagina = min(RELAY_POR_PAGINA_MAX, max(1, int(valores.get("per_page", "10"))))
+        except ValueError:
+            self._responder_json(400, {"code": "rest_invalid_param"})
+            return
+        # A mesma consulta (sem a paginação) na intranet: ex. ?client=x9h&type=... dos equipamentos
+        consulta_upstream = urllib.parse.urlencode([(k, v) for k, v in parametros if k not in ("page", "per_page")],
+                                                   safe=",")
+        url = x9h_coleta.API_BASE_URL + caminho + (f"?{consulta_upstream}" if consulta_upstream else "")
+        try:
+            entrada = self.server.catalogos.obter(url)
+        except Exception as e:
+            print(f"DEBUG: Relay sem cópia de {url}: {e}")
+            self._responder_json(502, {"code": "upstream_unavailable"})
+            return
+
+        itens = entrada["itens"]
+        total_paginas = max(1, -(-len(itens) // por_pagina))
+        if pagina > total_paginas:
+            self._responder_json(400, {"code": "rest_post_invalid_page_number"})
+            return
+        etag, corpo, corpo_gzip = pagina_serializada(entrada, pagina, por_pagina)
+        cabecalhos = {"X-WP-Total": str(len(itens)), "X-WP-TotalPages": str(total_paginas), "ETag": etag}
+        if self.headers.get("If-None-Match") == etag:
+            self._responder(304, cabecalhos=cabecalhos)
+            return
+        self._responder(200, corpo, cabecalhos, corpo_gzip)
+
+    def do_POST(self):
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        if tamanho > RELAY_CORPO_MAX:
+            self._responder_json(413, {"code": "payload_too_large"})
+            self.close_connection = True
+            return
+        corpo = self.rfile.read(tamanho)
+        caminho, _consulta = self._caminho_relativo()
+        if caminho.rstrip("/") != ROTA_ENVIO:
+            self._responder_json(404, {"code": "rest_no_route"})
+            return
+        with x9h_metricas.span("relay.post") as s:
+            try:
+                if self.headers.get("Content-Encoding", "").lower() == "gzip":
+                    corpo = descomprimir_gzip_limitado(corpo)
+                    if corpo is None:
+                        s.definir(status=413)
+                        self._responder_json(413, {"code": "payload_too_large"})
+                        return
+                payload = json.loads(corpo.decode("utf-8"))
+                if isinstance(payload.get("batch"), list):
+                    registros, parcial = payload["batch"], False
+                else:
+                    registros, parcial = [payload.get("data")], bool(payload.get("partial"))
+                if not all(isinstance(r, dict) for r in registros):
+                    raise ValueError("registro inválido")
+            except (OSError, EOFError, ValueError, AttributeError, zlib.error) as e:
+                s.definir(status=400)
+                self._responder_json(400, {"code": "invalid_submission", "message": str(e)})
+                return
+            try:
+                resultados = [self.server.agregador.receber(r, parcial) for r in registros]
+            except ValueError as e:
+                s.definir(status=400)
+                self._responder_json(400, {"code": "invalid_submission", "message": str(e)})
+                return
+            except OSError as e:
+                s.definir(status=503)
+                self._responder_json(503, {"code": "relay_spool_error", "message": str(e)})
+                return
+            if "sem_base" in resultados:
+                s.definir(status=409)
+                self._responder_json(409, {"code": "partial_without_base",
+                                           "message": "Patrimônio desconhecido pelo relay; envie o snapshot completo."})
+                return
+            s.definir(status=201, registros=len(registros))
+        self._responder_json(201, {"success": True, "recebidos": len(registros),
+                                   "enfileirados": resultados.count("enfileirado"),
+                                   "duplicados": resultados.count("duplicado")})
+
+
+class ServidorRelay:
+    """ Servidor do relay mais a thread que repassa a fila à intranet: `with ServidorRelay(...) as relay: ...`. """
+
+    def __init__(self, host="0.0.0.0", porta=RELAY_PORTA_PADRAO, intervalo_envio=RELAY_INTERVALO_ENVIO):
+        self.httpd = ThreadingHTTPServer((host, porta), ManipuladorRelay)
+        self.httpd.daemon_threads = True
+        self.httpd.prefixo = urllib.parse.urlsplit(x9h_coleta.API_BASE_URL).path.rstrip("/")
+        self.httpd.catalogos = CatalogosRelay()
+        self.httpd.agregador = AgregadorEnvios()
+        self.intervalo_envio = intervalo_envio
+        self._parar = threading.Event()
+        self._threads = []
+
+    @property
+    def agregador(self):
+        return self.httpd.agregador
+
+    @property
+    def url_base(self):
+        host, porta = self.httpd.server_address[:2]
+        return f"http://{'127.0.0.1' if host == '0.0.0.0' else host}:{porta}{self.httpd.prefixo}"
+
+    def repassar_fila(self):
+        """ Uma rodada de envio da fila à intranet. Retorna (enviadas, restantes). """
+        with x9h_metricas.span("relay.repasse") as s:
+            # A fila tem snapshots de várias máquinas: nenhum deles é o "último envio" deste host
+            enviadas, restantes = x9h_coleta.drenar_spool(registrar_aceitos=False)
+            s.definir(enviadas=enviadas, restantes=restantes)
+        if enviadas or restantes:
+            print(f"DEBUG: Relay repassou {enviadas} envio(s) à intranet; {restantes} na fila.")
+        return enviadas, restantes
+
+    def _laco_repasse(self):
+        while not self._parar.wait(self.intervalo_envio):
+            try:
+                self.repassar_fila()
+            except Exception as e:
+                print(f"DEBUG: Erro ao repassar a fila do relay: {e}")
+
+    def iniciar(self):
+        os.makedirs(x9h_coleta.BASE_APP_PATH, exist_ok=True)
+        for alvo, nome in ((self.httpd.serve_forever, "x9h-relay-http"), (self._laco_repasse, "x9h-relay-envio")):
+            thread = threading.Thread(target=alvo, name=nome, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def parar(self):
+        self._parar.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        for thread in self._threads:
+            thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.parar()
+        return False
+
+
+def executar_relay(host="0.0.0.0", porta=RELAY_PORTA_PADRAO):
+    """ Roda o relay até Ctrl+C ou SIGTERM; o que não for repassado fica na fila em disco para a próxima execução. """
+    relay = ServidorRelay(host, porta).iniciar()
+    print(f"Relay X9H ouvindo em {relay.url_base} (intranet: {x9h_coleta.API_BASE_URL}; dados em "
+          f"{x9h_coleta.BASE_APP_PATH}).")
+    encerrar = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: encerrar.set())  # Parada do serviço (systemd, kill)
+    try:
+        while not encerrar.wait(1.0):
+            pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("Encerrando o relay...")
+        relay.parar()
+        try:
+            relay.repassar_fila()
+        except Exception as e:
+            print(f"DEBUG: Fila do relay não repassada ao encerrar: {e}")
+        x9h_coleta.fechar_sessao_http()
+    return 0